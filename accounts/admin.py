@@ -2,6 +2,10 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from django.utils.html import format_html
 from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from .models import OutboxMessage
+from .thumbnails import thumbnail_urls
 
 CustomUser = get_user_model()
 
@@ -68,13 +72,34 @@ class CustomUserAdmin(UserAdmin):
 
     readonly_fields = ('profile_image_preview', 'last_login', 'date_joined')
 
-    # Method to show image preview
+    # Method to show image preview (the small thumbnail once it exists)
     def profile_image_preview(self, obj):
         if obj.profile_image:
+            urls = thumbnail_urls(obj.profile_image, 'small')
             return format_html(
-                '<img src="{}" style="width: 60px; height: 60px; border-radius: 8px; object-fit: cover;" />',
-                obj.profile_image.url
+                '<img src="{}" style="width: 60px; height: 60px; border-radius: 8px; object-fit: cover;" loading="lazy" />',
+                urls[1] if urls else obj.profile_image.url
             )
         return "(No Image)"
 
     profile_image_preview.short_description = "Profile Preview"
+
+
+# --------------------------
+# Outgoing Mail
+# --------------------------
+@admin.register(OutboxMessage)
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = ('subject', 'recipients', 'status', 'attempts', 'next_attempt_at', 'created_at', 'sent_at')
+    list_filter = ('status',)
+    search_fields = ('subject',)
+    readonly_fields = ('attempts', 'claim', 'last_error', 'created_at', 'sent_at')
+    actions = ['retry_now']
+
+    @admin.action(description="Retry selected pending messages now")
+    def retry_now(self, request, queryset):
+        # Failed messages have had their body cleared; there is nothing to resend.
+        updated = queryset.exclude(status=OutboxMessage.SENT).exclude(body='').update(
+            status=OutboxMessage.PENDING, attempts=0, next_attempt_at=timezone.now(), claim='',
+        )
+        self.message_user(request, f"{updated} messages queued; `manage.py send_outbox_mail` sends them.")
@@ -0,0 +1,61 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from accounts.thumbnails import DEFAULTS, generate_thumbnails
+from learners.models import Learner
+from teachers.models import Teacher
+
+
+MODELS = {
+    'users': get_user_model(),
+    'teachers': Teacher,
+    'learners': Learner,
+}
+
+
+class Command(BaseCommand):
+    help = "Generate missing profile image thumbnails for existing users, teachers and learners"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--model", choices=sorted(MODELS), action="append", dest="models",
+                            help="Only this kind of profile (repeatable)")
+        parser.add_argument("--force", action="store_true", help="Regenerate thumbnails that already exist")
+        parser.add_argument("--workers", type=int,
+                            default=getattr(settings, 'THUMBNAILS', {}).get('WORKERS', DEFAULTS['WORKERS']),
+                            help="Images processed in parallel")
+
+    def _generate(self, name, force):
+        try:
+            return generate_thumbnails(name, force=force), None
+        except Exception as exc:
+            return 0, exc
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        start = time.perf_counter()
+        images = written = failed = 0
+        with ThreadPoolExecutor(max_workers=options["workers"]) as pool:
+            for label in options["models"] or MODELS:
+                names = list(
+                    MODELS[label].objects.exclude(profile_image='').exclude(profile_image__isnull=True)
+                    .order_by().values_list('profile_image', flat=True).distinct()
+                )
+                self.stdout.write(self.style.NOTICE(f"Generating thumbnails for {len(names)} {label} images..."))
+                results = pool.map(self._generate, names, [options["force"]] * len(names))
+                for name, (count, error) in zip(names, results):
+                    images += 1
+                    written += count
+                    if error is not None:
+                        failed += 1
+                        self.stderr.write(f"{name}: {error}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Checked {images} images, wrote {written} thumbnails ({failed} failed) "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from accounts.outbox import dispatch
+
+
+class Command(BaseCommand):
+    help = "Send queued outbox mail that is due, including retries of failed sends"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, help="Messages sent per connection (default: OUTBOX['BATCH_SIZE'])")
+        parser.add_argument("--loop", action="store_true", help="Keep running, checking for due mail every --interval seconds")
+        parser.add_argument("--interval", type=float, default=30, help="Seconds between checks with --loop")
+
+    def _dispatch(self, batch_size):
+        start = time.perf_counter()
+        report = dispatch(batch_size)
+        if report.sent or report.retrying or report.failed:
+            self.stdout.write(f"{report} in {time.perf_counter() - start:.1f}s")
+        return report
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+        if options["interval"] <= 0:
+            raise CommandError("--interval must be positive")
+
+        if not options["loop"]:
+            report = self._dispatch(options["batch_size"])
+            self.stdout.write(self.style.SUCCESS(f"Outbox: {report}"))
+            return
+
+        self.stdout.write(self.style.NOTICE(f"Sending outbox mail every {options['interval']:g}s (Ctrl+C to stop)..."))
+        try:
+            while True:
+                close_old_connections()
+                self._dispatch(options["batch_size"])
+                time.sleep(options["interval"])
+        except KeyboardInterrupt:
+            self.stdout.write(self.style.SUCCESS("Stopped."))
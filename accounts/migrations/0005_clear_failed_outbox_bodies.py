@@ -0,0 +1,18 @@
+from django.db import migrations
+
+
+def clear_failed_bodies(apps, schema_editor):
+    # Failed onboarding mail held the new account's password in plain text.
+    OutboxMessage = apps.get_model('accounts', 'OutboxMessage')
+    OutboxMessage.objects.filter(status='failed').exclude(body='').update(body='')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_outboxmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(clear_failed_bodies, migrations.RunPython.noop),
+    ]
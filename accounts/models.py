@@ -35,3 +35,46 @@ class CustomUser(AbstractUser):
         # Safe fallback if role is missing
         role_display = self.get_role_display() if self.role else "No Role"
         return f"{self.username} ({role_display})"
+
+
+class OutboxMessage(models.Model):
+    """
+    An email waiting to be sent by accounts/outbox.py.
+    Written in the same transaction as the change it reports, so a rolled
+    back request never sends mail and a committed one always does.
+    """
+
+    PENDING = 'pending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (SENT, 'Sent'),
+        (FAILED, 'Failed'),
+    ]
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    next_attempt_at = models.DateTimeField()
+    # Set by the dispatcher sending the message, so two never send it twice.
+    claim = models.CharField(max_length=32, blank=True)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['next_attempt_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_due_idx'),
+        ]
+        verbose_name = 'Outbox Message'
+        verbose_name_plural = 'Outbox Messages'
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)} ({self.get_status_display()})"
@@ -0,0 +1,262 @@
+"""
+Transactional email outbox.
+
+Views queue mail with enqueue_mail() inside their transaction instead of
+calling send_mail(): the OutboxMessage row commits or rolls back with the
+change it reports, and the request never waits for the mail server.
+
+Once the transaction commits, a background thread sends what is due in
+batches of settings.OUTBOX['BATCH_SIZE'] over one reused connection. A
+message that fails is retried after RETRY_DELAY seconds, doubling up to
+MAX_RETRY_DELAY, and marked failed after MAX_ATTEMPTS. Retries, and mail
+queued while no web process was running, are sent by
+
+    manage.py send_outbox_mail --loop
+
+(or the same command without --loop from cron). Any number of dispatchers
+can run: each claims its batch first, and a claim left by a dispatcher that
+died expires after LEASE seconds. Bodies of sent and failed messages are
+cleared, so credentials in onboarding mail don't stay in the table; a
+teacher whose mail failed needs a password reset, not a retry.
+
+Usage:
+    enqueue_mail("Your Teacher Account", body, [user.email])
+    enqueue_mails([(subject, body, [email]), ...])   # bulk
+    dispatch()    # send everything due now; returns a DispatchReport
+"""
+import atexit
+import logging
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from threading import Lock
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 6,
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 3600,
+    'LEASE': 300,
+    'ASYNC': True,
+}
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'OUTBOX', {})}
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before the next attempt after `attempts` failures.
+    """
+    config = _config()
+    return min(config['RETRY_DELAY'] * 2 ** (attempts - 1), config['MAX_RETRY_DELAY'])
+
+
+# --------------------------
+# Queueing
+# --------------------------
+
+def enqueue_mail(subject, body, recipients, from_email=None):
+    """
+    Queue an email in the current transaction; it is sent after commit.
+    Returns the OutboxMessage, or None when there is nobody to send to.
+    """
+    recipients = [address for address in recipients if address]
+    if not recipients:
+        return None
+    message = OutboxMessage.objects.create(
+        subject=subject,
+        body=body,
+        from_email=from_email or '',
+        recipients=recipients,
+        next_attempt_at=timezone.now(),
+    )
+    transaction.on_commit(schedule)
+    return message
+
+
+def enqueue_mails(mails, from_email=None):
+    """
+    Queue many (subject, body, recipients) emails with one insert.
+    Returns how many were queued.
+    """
+    now = timezone.now()
+    messages = [
+        OutboxMessage(
+            subject=subject, body=body, from_email=from_email or '',
+            recipients=[address for address in recipients if address], next_attempt_at=now,
+        )
+        for subject, body, recipients in mails
+    ]
+    messages = [message for message in messages if message.recipients]
+    OutboxMessage.objects.bulk_create(messages, batch_size=500)
+    if messages:
+        transaction.on_commit(schedule)
+    return len(messages)
+
+
+# --------------------------
+# Sending
+# --------------------------
+
+class DispatchReport:
+    def __init__(self):
+        self.sent = 0
+        self.retrying = 0
+        self.failed = 0  # gave up after MAX_ATTEMPTS
+
+    def __str__(self):
+        return f"{self.sent} sent, {self.retrying} to retry, {self.failed} failed"
+
+
+def claim_due(batch_size):
+    """
+    Claim up to `batch_size` due messages for this dispatcher and return them.
+    """
+    now = timezone.now()
+    due = list(
+        OutboxMessage.objects.filter(status=OutboxMessage.PENDING, next_attempt_at__lte=now)
+        .order_by('next_attempt_at').values_list('pk', flat=True)[:batch_size]
+    )
+    if not due:
+        return []
+    token = uuid.uuid4().hex
+    # Moving next_attempt_at past the lease hides the messages from other
+    # dispatchers, and retries them if this one dies before recording them.
+    OutboxMessage.objects.filter(
+        pk__in=due, status=OutboxMessage.PENDING, next_attempt_at__lte=now,
+    ).update(claim=token, next_attempt_at=now + timedelta(seconds=_config()['LEASE']))
+    return list(OutboxMessage.objects.filter(claim=token))
+
+
+def _email(message, connection):
+    return EmailMessage(
+        subject=message.subject,
+        body=message.body,
+        from_email=message.from_email or None,
+        to=message.recipients,
+        connection=connection,
+    )
+
+
+def deliver(messages):
+    """
+    Send messages over one connection; returns [(message, error or None)].
+    """
+    connection = get_connection(fail_silently=False)
+    try:
+        connection.open()
+    except Exception as exc:
+        return [(message, exc) for message in messages]
+
+    results = []
+    try:
+        for index, message in enumerate(messages):
+            try:
+                connection.send_messages([_email(message, connection)])
+            except Exception as exc:
+                results.append((message, exc))
+                # The connection may be broken; start a new one for the rest.
+                connection.close()
+                try:
+                    connection.open()
+                except Exception as exc:
+                    results += [(rest, exc) for rest in messages[index + 1:]]
+                    break
+            else:
+                results.append((message, None))
+    finally:
+        connection.close()
+    return results
+
+
+def _record(results, report):
+    now = timezone.now()
+    sent = [message.pk for message, error in results if error is None]
+    if sent:
+        OutboxMessage.objects.filter(pk__in=sent).update(
+            status=OutboxMessage.SENT, sent_at=now, body='', claim='', last_error='',
+        )
+        report.sent += len(sent)
+
+    max_attempts = _config()['MAX_ATTEMPTS']
+    for message, error in results:
+        if error is None:
+            continue
+        attempts = message.attempts + 1
+        gave_up = attempts >= max_attempts
+        OutboxMessage.objects.filter(pk=message.pk).update(
+            attempts=F('attempts') + 1,
+            status=OutboxMessage.FAILED if gave_up else OutboxMessage.PENDING,
+            next_attempt_at=now + timedelta(seconds=retry_delay(attempts)),
+            last_error=f"{type(error).__name__}: {error}"[:1000],
+            claim='',
+            **({'body': ''} if gave_up else {}),
+        )
+        if gave_up:
+            report.failed += 1
+            logger.error("Giving up on outbox message %s after %s attempts: %s", message.pk, attempts, error)
+        else:
+            report.retrying += 1
+            logger.warning("Outbox message %s failed (attempt %s): %s", message.pk, attempts, error)
+
+
+def dispatch(batch_size=None):
+    """
+    Send every message due now, one batch (and connection) at a time.
+    """
+    batch_size = batch_size or _config()['BATCH_SIZE']
+    report = DispatchReport()
+    while True:
+        messages = claim_due(batch_size)
+        if not messages:
+            return report
+        _record(deliver(messages), report)
+
+
+# --------------------------
+# Background thread
+# --------------------------
+
+def _dispatch_logged():
+    try:
+        dispatch()
+    except Exception:
+        logger.exception("Could not dispatch outbox mail")
+    finally:
+        # This thread's connections; the request threads keep theirs.
+        connections.close_all()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # One thread: a second would only find the first one's claims.
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='outbox')
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def schedule():
+    """
+    Send due mail in the background, or inline when OUTBOX['ASYNC'] is False.
+    """
+    if _config()['ASYNC']:
+        _get_executor().submit(_dispatch_logged)
+    else:
+        dispatch()
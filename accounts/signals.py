@@ -0,0 +1,35 @@
+"""
+Queue thumbnail generation when a profile image is uploaded or replaced.
+The work is scheduled after the transaction commits, so a rolled back
+upload never reaches the worker pool.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+
+from learners.models import Learner
+from teachers.models import Teacher
+
+from .thumbnails import schedule
+
+
+def stash_previous_image(sender, instance, raw=False, **kwargs):
+    instance._thumbnail_previous = None
+    if not raw and instance.pk is not None:
+        instance._thumbnail_previous = sender.objects.filter(pk=instance.pk).values_list(
+            'profile_image', flat=True
+        ).first()
+
+
+def schedule_thumbnails(sender, instance, raw=False, **kwargs):
+    name = instance.profile_image.name if instance.profile_image else None
+    if raw or not name or name == getattr(instance, '_thumbnail_previous', None):
+        return
+    transaction.on_commit(partial(schedule, name))
+
+
+for model in (get_user_model(), Teacher, Learner):
+    pre_save.connect(stash_previous_image, sender=model, dispatch_uid=f'thumbnails_pre_{model._meta.label}')
+    post_save.connect(schedule_thumbnails, sender=model, dispatch_uid=f'thumbnails_post_{model._meta.label}')
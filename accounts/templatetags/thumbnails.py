@@ -0,0 +1,29 @@
+# accounts/templatetags/thumbnails.py
+from django import template
+from django.utils.html import format_html
+
+from accounts.thumbnails import thumbnail_urls
+
+register = template.Library()
+
+
+@register.simple_tag
+def profile_thumbnail(image, size='small', css_class='', alt='Profile Image'):
+    """
+    Usage in template:
+      {% load thumbnails %}
+      {% profile_thumbnail learner.profile_image "small" "w-12 h-12 rounded-full" %}
+    Renders a <picture> with the WebP thumbnail and a JPEG fallback, or the
+    original image while the thumbnails are still being generated.
+    """
+    if not image:
+        return ''
+    urls = thumbnail_urls(image, size)
+    if urls is None:
+        return format_html('<img src="{}" alt="{}" class="{}" loading="lazy">', image.url, alt, css_class)
+    webp, jpeg = urls
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">'
+        '<img src="{}" alt="{}" class="{}" loading="lazy"></picture>',
+        webp, jpeg, alt, css_class,
+    )
@@ -1,3 +1,120 @@
-from django.test import TestCase
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+from django.core import mail
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.mail.backends.locmem import EmailBackend
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from PIL import Image
+
+from utils.testing import make_learner, make_school, make_ward
+
+from .models import OutboxMessage
+from .outbox import claim_due, dispatch, enqueue_mail, enqueue_mails, retry_delay
+from .thumbnails import generate_thumbnails, schedule, thumbnail_name, thumbnail_urls
+
+
+# --------------------------
+# Outbox
+# --------------------------
+
+@override_settings(OUTBOX={'MAX_ATTEMPTS': 2, 'RETRY_DELAY': 60, 'MAX_RETRY_DELAY': 100})
+class OutboxTests(TestCase):
+
+    def make_due(self):
+        OutboxMessage.objects.update(next_attempt_at=timezone.now())
+
+    def test_sends_after_commit(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            message = enqueue_mail("Your Teacher Account", "Password: s3cret", ['wanjiru@example.com', ''])
+            self.assertIsNone(enqueue_mail("Nobody", "body", ['']))
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(message.recipients, ['wanjiru@example.com'])
+
+        report = dispatch()
+
+        self.assertEqual((report.sent, report.retrying, report.failed), (1, 0, 0))
+        self.assertEqual(mail.outbox[0].to, ['wanjiru@example.com'])
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.body), (OutboxMessage.SENT, ''))
+        self.assertEqual(dispatch().sent, 0)
+
+    def test_retries_then_gives_up(self):
+        enqueue_mail("Your Teacher Account", "Password: s3cret", ['wanjiru@example.com'])
+
+        failing = mock.patch.object(EmailBackend, 'send_messages', side_effect=OSError("connection refused"))
+        with failing, self.assertLogs('accounts.outbox', 'WARNING'):
+            self.assertEqual(dispatch().retrying, 1)
+            message = OutboxMessage.objects.get()
+            self.assertEqual((message.status, message.attempts), (OutboxMessage.PENDING, 1))
+            self.assertEqual(message.body, "Password: s3cret")
+            self.assertEqual(dispatch().retrying, 0)  # not due yet
+
+            self.make_due()
+            self.assertEqual(dispatch().failed, 1)
+
+        message.refresh_from_db()
+        self.assertEqual((message.status, message.body), (OutboxMessage.FAILED, ''))
+        self.assertEqual(message.last_error, "OSError: connection refused")
+        self.assertEqual(mail.outbox, [])
+
+    def test_retry_delay_doubles_up_to_the_maximum(self):
+        self.assertEqual([retry_delay(n) for n in range(1, 4)], [60, 100, 100])
+
+    def test_claimed_messages_are_not_claimed_twice(self):
+        enqueue_mails([(f"Account {n}", "body", [f"t{n}@example.com"]) for n in range(3)])
+
+        first = claim_due(2)
+        second = claim_due(2)
+
+        self.assertEqual((len(first), len(second)), (2, 1))
+        self.assertFalse({message.pk for message in first} & {message.pk for message in second})
+        self.assertEqual(claim_due(2), [])
+
+
+# --------------------------
+# Thumbnails
+# --------------------------
+
+def image_file(name, image_format):
+    buffer = BytesIO()
+    Image.new('RGB', (300, 200), 'teal').save(buffer, image_format)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+@override_settings(
+    STORAGES={'default': {'BACKEND': 'django.core.files.storage.InMemoryStorage'}},
+    THUMBNAILS={'SIZES': {'small': 16, 'medium': 32}, 'ASYNC': False},
+)
+class ThumbnailTests(TestCase):
+
+    def test_generated_after_upload(self):
+        school = make_school(make_ward(), 'S1')
+        with self.captureOnCommitCallbacks(execute=True):
+            learner = make_learner(school, 'BC1', profile_image=image_file('jane.png', 'PNG'))
+        name = learner.profile_image.name
+
+        webp, jpeg = thumbnail_urls(learner.profile_image, 'small')
+        self.assertTrue(jpeg.endswith(f'{name}.small.jpg'))
+        self.assertTrue(webp.endswith(f'{name}.small.webp'))
+        with default_storage.open(thumbnail_name(name, 'medium', 'jpg')) as fh:
+            self.assertEqual(Image.open(fh).size, (32, 32))
+        self.assertIsNone(thumbnail_urls(learner.profile_image, 'large'))
+
+        # Only uploads queue work, not other saves.
+        with self.captureOnCommitCallbacks() as callbacks:
+            learner.first_name = 'Jane'
+            learner.save()
+        self.assertNotIn(schedule, [getattr(callback, 'func', None) for callback in callbacks])
+
+    def test_same_name_different_extension(self):
+        for name, image_format in [('jane.png', 'PNG'), ('jane.jpg', 'JPEG')]:
+            default_storage.save(name, image_file(name, image_format))
+        self.assertNotEqual(thumbnail_name('jane.png', 'small', 'jpg'), thumbnail_name('jane.jpg', 'small', 'jpg'))
+
+        self.assertEqual(generate_thumbnails('jane.png'), 4)
+        self.assertEqual(generate_thumbnails('jane.jpg'), 4)
+        self.assertEqual(generate_thumbnails('jane.jpg'), 0)
+        self.assertEqual(generate_thumbnails('jane.jpg', force=True), 4)
@@ -0,0 +1,185 @@
+"""
+Profile image thumbnails.
+
+Every uploaded profile image (CustomUser, Teacher, Learner) gets a square
+WebP and JPEG thumbnail per size in settings.THUMBNAILS['SIZES'], stored
+next to the original under its full name, so jane.png and jane.jpg don't
+share thumbnails:
+
+    learner_profiles/jane.png
+    learner_profiles/jane.png.small.webp
+    learner_profiles/jane.png.small.jpg
+
+Thumbnails are generated after the upload's transaction commits, in a
+small thread pool (Pillow releases the GIL while decoding and resizing),
+so the request that saved the image does not wait for them. Templates
+ask for a size with the {% profile_thumbnail %} tag and fall back to the
+original until the thumbnail exists. `manage.py generate_thumbnails`
+backfills images uploaded before this pipeline or while it was down.
+"""
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from threading import Lock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'SIZES': {'small': 96, 'medium': 192},
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'ASYNC': True,
+}
+
+FORMATS = (('webp', 'WEBP'), ('jpg', 'JPEG'))
+
+# "thumbnails:v2:<name>" -> True once an image's thumbnails are known to exist.
+CACHE_PREFIX = 'thumbnails:v2:'
+MISSING_TIMEOUT = 60
+
+_executor = None
+_executor_lock = Lock()
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'THUMBNAILS', {})}
+
+
+def thumbnail_name(name, size, extension):
+    """
+    Storage name of one thumbnail of the image stored as `name`.
+    """
+    return f"{name}.{size}.{extension}"
+
+
+def thumbnail_names(name):
+    return [
+        thumbnail_name(name, size, extension)
+        for size in _config()['SIZES'] for extension, _ in FORMATS
+    ]
+
+
+# --------------------------
+# Generating
+# --------------------------
+
+def _render(image, pixels, image_format, quality):
+    from PIL import ImageOps
+
+    thumb = ImageOps.fit(image, (pixels, pixels), method=3)  # 3 = BICUBIC
+    buffer = BytesIO()
+    options = {'quality': quality}
+    if image_format == 'JPEG':
+        options.update(optimize=True, progressive=True)
+    else:
+        options['method'] = 4
+    thumb.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def generate_thumbnails(name, storage=default_storage, force=False):
+    """
+    Write every thumbnail of one stored image; returns how many were written.
+    Existing thumbnails are kept unless force=True.
+    """
+    from PIL import Image, ImageOps
+
+    config = _config()
+    wanted = [
+        (size, pixels, extension, image_format)
+        for size, pixels in config['SIZES'].items()
+        for extension, image_format in FORMATS
+        if force or not storage.exists(thumbnail_name(name, size, extension))
+    ]
+    if not wanted:
+        cache.set(CACHE_PREFIX + name, True, timeout=None)
+        return 0
+
+    with storage.open(name, 'rb') as fh:
+        image = Image.open(fh)
+        # Let the JPEG decoder scale down while decoding; much faster for photos.
+        largest = max(config['SIZES'].values())
+        image.draft('RGB', (largest * 2, largest * 2))
+        image = ImageOps.exif_transpose(image)
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        image.load()
+
+    for size, pixels, extension, image_format in wanted:
+        target = thumbnail_name(name, size, extension)
+        if storage.exists(target):
+            storage.delete(target)
+        storage.save(target, ContentFile(_render(image, pixels, image_format, config['QUALITY'])))
+
+    cache.set(CACHE_PREFIX + name, True, timeout=None)
+    return len(wanted)
+
+
+def _generate_logged(name):
+    try:
+        generate_thumbnails(name, force=True)
+    except Exception:
+        logger.exception("Could not generate thumbnails for %s", name)
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_config()['WORKERS'], thread_name_prefix='thumbnails'
+            )
+            atexit.register(_executor.shutdown, wait=True)
+        return _executor
+
+
+def schedule(name):
+    """
+    (Re)generate a newly uploaded image's thumbnails in the background, or
+    inline when THUMBNAILS['ASYNC'] is False.
+    """
+    if not name:
+        return
+    cache.delete(CACHE_PREFIX + name)
+    if _config()['ASYNC']:
+        _get_executor().submit(_generate_logged, name)
+    else:
+        _generate_logged(name)
+
+
+# --------------------------
+# Serving
+# --------------------------
+
+def has_thumbnails(name, storage=default_storage):
+    """
+    Whether an image's thumbnails exist, remembered in the cache so list
+    pages don't check storage for every row.
+    """
+    key = CACHE_PREFIX + name
+    found = cache.get(key)
+    if found is None:
+        found = all(storage.exists(target) for target in thumbnail_names(name))
+        cache.set(key, found, timeout=None if found else MISSING_TIMEOUT)
+    return found
+
+
+def thumbnail_urls(image, size):
+    """
+    Return (webp url, jpeg url) for an ImageFieldFile, or None when the
+    thumbnails are not ready yet and the original should be used.
+    """
+    if not image or size not in _config()['SIZES']:
+        return None
+    if not has_thumbnails(image.name, image.storage):
+        return None
+    return tuple(
+        image.storage.url(thumbnail_name(image.name, size, extension))
+        for extension, _ in FORMATS
+    )
@@ -0,0 +1,134 @@
+import asyncio
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from benchmarks.stats import summarize
+
+
+# dashboard -> (role, sync url name, async url name)
+DASHBOARDS = {
+    'cs': ('cabinet_secretary', 'home:cs_dashboard', 'home:async_cs_dashboard'),
+    'county': ('county_director', 'home:county_dashboard', 'home:async_county_dashboard'),
+    'subcounty': ('subcounty_director', 'home:subcounty_dashboard', 'home:async_subcounty_dashboard'),
+    'school-admin': ('school_admin', 'home:school_admin_dashboard', 'home:async_school_admin_dashboard'),
+    'teacher': ('teacher', 'home:teacher_dashboard', 'home:async_teacher_dashboard'),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare p50/p99 latency of a dashboard served by the sync view through "
+        "the WSGI handler against its async view through the ASGI handler, "
+        "under concurrent load"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dashboard", choices=sorted(DASHBOARDS), default="teacher")
+        parser.add_argument("--username", help="User to log in as (default: first user with the dashboard's role)")
+        parser.add_argument("--requests", type=int, default=200, help="Requests per handler")
+        parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight at once")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        role, sync_url, async_url = DASHBOARDS[options["dashboard"]]
+        user = self._get_user(role, options["username"])
+        total, concurrency = options["requests"], options["concurrency"]
+
+        self.stdout.write(self.style.NOTICE(
+            f"Benchmarking '{options['dashboard']}' dashboard as {user.username}: "
+            f"{total} requests, concurrency {concurrency}..."
+        ))
+
+        results = {
+            'dashboard': options["dashboard"],
+            'requests': total,
+            'concurrency': concurrency,
+            'wsgi': self._run_wsgi(reverse(sync_url), user, total, concurrency),
+            'asgi': asyncio.run(self._run_asgi(reverse(async_url), user, total, concurrency)),
+        }
+
+        self.stdout.write(f"{'handler':<8}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'mean ms':>10}{'req/s':>10}")
+        for handler in ('wsgi', 'asgi'):
+            r = results[handler]
+            self.stdout.write(
+                f"{handler.upper():<8}{r['p50_ms']:>10}{r['p90_ms']:>10}{r['p99_ms']:>10}"
+                f"{r['mean_ms']:>10}{r['throughput_rps']:>10}"
+            )
+
+        if options["json_path"]:
+            with open(options["json_path"], "w", encoding="utf-8") as fh:
+                json.dump(results, fh, indent=2)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark complete"))
+
+    def _get_user(self, role, username):
+        User = get_user_model()
+        if username:
+            user = User.objects.filter(username=username).first()
+        else:
+            users = User.objects.filter(role=role, is_active=True)
+            if role == 'teacher':
+                users = users.filter(teacher_profile__isnull=False)
+            user = users.order_by('pk').first()
+        if user is None:
+            raise CommandError(
+                f"No {role} user found. Pass --username, or load data with "
+                f"`manage.py generate_synthetic --password <password>`."
+            )
+        return user
+
+    def _check(self, status, handler):
+        if status != 200:
+            raise CommandError(f"{handler} request returned HTTP {status}")
+
+    def _run_wsgi(self, url, user, total, concurrency):
+        local = threading.local()
+
+        def client():
+            if not hasattr(local, 'client'):
+                local.client = Client()
+                local.client.force_login(user)
+            return local.client
+
+        def one(_):
+            c = client()
+            start = time.perf_counter()
+            response = c.get(url)
+            elapsed = time.perf_counter() - start
+            self._check(response.status_code, "WSGI")
+            return elapsed
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            list(pool.map(one, range(concurrency)))  # warm up one client per thread
+            start = time.perf_counter()
+            latencies = list(pool.map(one, range(total)))
+            wall = time.perf_counter() - start
+
+        return summarize(latencies, wall)
+
+    async def _run_asgi(self, url, user, total, concurrency):
+        client = AsyncClient()
+        await client.aforce_login(user)
+        slots = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with slots:
+                start = time.perf_counter()
+                response = await client.get(url)
+                elapsed = time.perf_counter() - start
+            self._check(response.status_code, "ASGI")
+            return elapsed
+
+        await asyncio.gather(*(one() for _ in range(concurrency)))  # warm up
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(one() for _ in range(total)))
+        wall = time.perf_counter() - start
+
+        return summarize(list(latencies), wall)
@@ -0,0 +1,99 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, reset_queries
+from django.db.models import Count
+
+from benchmarks.stats import summarize
+from learners.models import Learner
+from location.models import County
+from schools.models import School
+
+
+TABLES = ('learners_learner', 'learners_learner_subjects')
+
+
+def table_sizes(table):
+    """
+    Bytes used by a table and each of its indexes, from SQLite's dbstat table.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE tbl_name = %s AND type IN ('table', 'index')", [table]
+        )
+        names = [row[0] for row in cursor.fetchall()]
+        sizes = {}
+        for name in names:
+            cursor.execute("SELECT coalesce(sum(pgsize), 0) FROM dbstat WHERE name = %s", [name])
+            sizes[name] = cursor.fetchone()[0]
+    return sizes
+
+
+def join_cases():
+    """
+    name -> callable running one query that joins learners to their subjects.
+    """
+    Enrollment = Learner.subjects.through
+    school = School.objects.order_by('pk').first()
+    county = County.objects.order_by('pk').first()
+    page = list(
+        Learner.objects.filter(school=school).order_by('pk').values_list('pk', flat=True)[:50]
+    )
+    return {
+        # learner_detail / prefetch_related('subjects') for a page of learners
+        'page_subjects': lambda: list(
+            Enrollment.objects.filter(learner_id__in=page).select_related('subject')
+        ),
+        'school_enrollments': lambda: Enrollment.objects.filter(learner__school=school).count(),
+        'county_subject_counts': lambda: list(
+            Enrollment.objects.filter(learner__school__county=county, learner__status=Learner.ACTIVE)
+            .values('subject_id').annotate(n=Count('pk'))
+        ),
+        'national_enrollments': lambda: Enrollment.objects.filter(learner__status=Learner.ACTIVE).count(),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Report the size of the learner and learner-subject tables and their indexes, "
+        "and time queries joining learners to subjects (SQLite only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per join query")
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Table sizes are read from SQLite's dbstat table.")
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1")
+
+        pk = Learner._meta.pk
+        results = {'learner_pk': f"{pk.name} ({pk.get_internal_type()})", 'sizes': {}, 'joins': {}}
+        self.stdout.write(self.style.NOTICE(f"Learner primary key: {results['learner_pk']}"))
+
+        for table in TABLES:
+            sizes = table_sizes(table)
+            results['sizes'][table] = sizes
+            self.stdout.write(f"{table}: {sum(sizes.values()) / 2**20:.1f} MiB")
+            for name, size in sorted(sizes.items(), key=lambda item: -item[1]):
+                self.stdout.write(f"  {name:<60}{size / 2**20:>8.1f} MiB")
+
+        self.stdout.write(f"{'query':<26}{'p50 ms':>10}{'p90 ms':>10}{'max ms':>10}")
+        for name, run in join_cases().items():
+            run()  # warm the page cache
+            latencies = []
+            for _ in range(options["repeat"]):
+                start = time.perf_counter()
+                run()
+                latencies.append(time.perf_counter() - start)
+            reset_queries()
+            summary = results['joins'][name] = summarize(latencies)
+            self.stdout.write(f"{name:<26}{summary['p50_ms']:>10}{summary['p90_ms']:>10}{summary['max_ms']:>10}")
+
+        if options["json_path"]:
+            with open(options["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
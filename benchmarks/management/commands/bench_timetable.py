@@ -0,0 +1,111 @@
+import json
+import random
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+
+from benchmarks.stats import summarize
+from teachers.timetable import Solver, check_loads
+
+
+def synthetic_school(streams, subjects, lessons, streams_per_teacher):
+    """
+    [(assignment id, teacher, stream, subject, lessons)] for a school where
+    every stream takes every subject and each teacher teaches one subject
+    in `streams_per_teacher` streams.
+    """
+    assignments, teacher = [], 0
+    for subject in range(subjects):
+        for stream in range(streams):
+            if stream % streams_per_teacher == 0:
+                teacher += 1
+            assignments.append((len(assignments), teacher, stream, subject, lessons))
+    return assignments
+
+
+def clashes(solver):
+    """
+    Lessons sharing a slot with another lesson of their teacher or stream.
+    """
+    seen = Counter()
+    for key, slot in solver.slots.items():
+        teacher, stream, _ = solver.lessons[key]
+        seen[('t', teacher, slot)] += 1
+        seen[('s', stream, slot)] += 1
+    return sum(n - 1 for n in seen.values() if n > 1)
+
+
+class Command(BaseCommand):
+    help = "Time the timetable solver on a synthetic school: a full solve, then re-solving single changed assignments"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--streams", type=int, default=40)
+        parser.add_argument("--subjects", type=int, default=9)
+        parser.add_argument("--lessons", type=int, default=4, help="Lessons per subject per week")
+        parser.add_argument("--streams-per-teacher", type=int, default=8)
+        parser.add_argument("--days", type=int, default=5)
+        parser.add_argument("--periods", type=int, default=8)
+        parser.add_argument("--changes", type=int, default=50, help="Single-assignment re-solves to time")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--json", dest="json_path", help="Also write the results to this JSON file")
+
+    def handle(self, *args, **options):
+        for name in ("streams", "subjects", "lessons", "streams_per_teacher", "days", "periods"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+
+        assignments = synthetic_school(
+            options["streams"], options["subjects"], options["lessons"], options["streams_per_teacher"]
+        )
+        check_loads([row[1:] for row in assignments], options["days"] * options["periods"])
+        total = sum(row[4] for row in assignments)
+        self.stdout.write(self.style.NOTICE(
+            f"{options['streams']} streams, {len({row[1] for row in assignments})} teachers, {total} lessons "
+            f"in {options['days']} x {options['periods']} periods..."
+        ))
+
+        start = time.perf_counter()
+        solver = Solver(options["days"], options["periods"])
+        for pk, teacher, stream, subject, count in sorted(assignments, key=lambda row: (-row[4], row[0])):
+            for number in range(count):
+                solver.add((pk, number), teacher, stream, subject)
+        full = time.perf_counter() - start
+        results = {'lessons': total, 'full_solve_s': round(full, 3), 'clashes': clashes(solver)}
+
+        # Hand one assignment to another teacher of the same subject, as
+        # update_timetable does: remove its lessons and add them back.
+        rng = random.Random(options["seed"])
+        latencies, moved = [], []
+        teachers_by_subject = {}
+        for _, teacher, _, subject, _ in assignments:
+            teachers_by_subject.setdefault(subject, set()).add(teacher)
+        for _ in range(options["changes"]):
+            pk, teacher, stream, subject, count = assignments[rng.randrange(len(assignments))]
+            teacher = rng.choice(sorted(teachers_by_subject[subject]))
+            keys = [(pk, number) for number in range(count)]
+            if len(solver.busy[('t', teacher)]) + count > solver.size:
+                continue
+            before = dict(solver.slots)
+            step = time.perf_counter()
+            for key in keys:
+                solver.remove(key)
+            for key in keys:
+                solver.add(key, teacher, stream, subject)
+            latencies.append(time.perf_counter() - step)
+            assignments[pk] = (pk, teacher, stream, subject, count)
+            moved.append(sum(1 for key, slot in solver.slots.items() if before.get(key) != slot and key[0] != pk))
+        results['resolve'] = summarize(latencies)
+        results['resolve']['other_lessons_moved_max'] = max(moved, default=0)
+        results['clashes_after_changes'] = clashes(solver)
+
+        self.stdout.write(f"Full solve: {full * 1000:.1f} ms, {results['clashes']} clashes")
+        self.stdout.write(
+            f"Re-solve one assignment ({len(latencies)} changes): p50 {results['resolve']['p50_ms']} ms, "
+            f"max {results['resolve']['max_ms']} ms, at most {results['resolve']['other_lessons_moved_max']} "
+            f"other lessons moved, {results['clashes_after_changes']} clashes"
+        )
+        if options["json_path"]:
+            with open(options["json_path"], "w") as fh:
+                json.dump(results, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Results written to {options['json_path']}"))
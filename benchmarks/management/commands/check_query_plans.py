@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from benchmarks.plans import explain, plan_cases, problems
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN QUERY PLAN on the hot list and dashboard querysets and fail "
+        "if any of them scans a whole table or sorts with a temp B-tree (SQLite only)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--case", action="append", dest="cases", help="Only check this case (repeatable)")
+        parser.add_argument("--analyze", action="store_true",
+                            help="Run ANALYZE first so the planner sees current table statistics")
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("Query plans are only checked on SQLite.")
+
+        if options["analyze"]:
+            with connection.cursor() as cursor:
+                cursor.execute("ANALYZE")
+
+        cases = plan_cases()
+        unknown = set(options["cases"] or []) - set(cases)
+        if unknown:
+            raise CommandError(f"Unknown case(s): {', '.join(sorted(unknown))}")
+
+        names = options["cases"] or list(cases)
+        failed = []
+        for name in names:
+            queryset, allowed = cases[name]
+            plan = explain(queryset)
+            bad = problems(plan, allowed)
+            self.stdout.write(self.style.ERROR(f"FAIL {name}") if bad else f"ok   {name}")
+            for line in plan:
+                self.stdout.write(self.style.ERROR(f"       {line}") if line in bad else f"       {line}")
+            if bad:
+                failed.append(name)
+
+        if failed:
+            raise CommandError(f"{len(failed)} queryset(s) need an index: {', '.join(failed)}")
+        self.stdout.write(self.style.SUCCESS(f"All {len(names)} query plans use indexes"))
@@ -0,0 +1,407 @@
+import os
+import random
+import time
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.contrib.admin.models import LogEntry
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q
+
+from home.stats import invalidate_headline_stats
+from learners.models import DuplicateCandidate, Learner
+from location.models import County, Ward
+from reports.rollups import rebuild_rollups
+from schools.models import School
+from subjects.models import Subject
+from teachers.models import Stream, Teacher, ClassAssignment, SubjectAssignment, Timetable, TimetableLesson
+
+
+# School level -> (share of schools, grades offered)
+SCHOOL_LEVELS = {
+    'PrePrimary': (0.10, ['PP1', 'PP2']),
+    'Primary': (0.65, ['Grade 1', 'Grade 2', 'Grade 3', 'Grade 4', 'Grade 5', 'Grade 6']),
+    'Secondary': (0.25, ['Grade 7', 'Grade 8', 'Grade 9', 'Grade 10', 'Grade 11', 'Grade 12']),
+}
+
+# Compulsory national subjects created when none exist for a level.
+CBC_SUBJECTS = {
+    'PrePrimary': [
+        'Language Activities', 'Mathematical Activities', 'Environmental Activities',
+        'Psychomotor and Creative Activities', 'Religious Education Activities',
+    ],
+    'LowerPrimary': [
+        'Indigenous Language Activities', 'Kiswahili Language Activities', 'English Language Activities',
+        'Mathematics Activities', 'Hygiene and Nutrition Activities', 'Movement and Creative Activities',
+    ],
+    'UpperPrimary': [
+        'English', 'Kiswahili', 'Mathematics', 'Science and Technology',
+        'Agriculture and Nutrition', 'Social Studies', 'Creative Arts', 'Religious Education',
+    ],
+    'JuniorSecondary': [
+        'English (JSS)', 'Kiswahili (JSS)', 'Mathematics (JSS)', 'Integrated Science',
+        'Pre-Technical Studies', 'Social Studies (JSS)', 'Agriculture (JSS)', 'Religious Education (JSS)',
+    ],
+    'SeniorSecondary': [
+        'English (SSS)', 'Kiswahili (SSS)', 'Core Mathematics', 'Community Service Learning',
+        'Physical Education (SSS)',
+    ],
+}
+
+FIRST_NAMES = {
+    'M': ['Brian', 'Kevin', 'Dennis', 'Collins', 'Kiprono', 'Otieno', 'Mwangi', 'Kamau', 'Juma', 'Baraka', 'Ian', 'Amani'],
+    'F': ['Faith', 'Mercy', 'Sharon', 'Cheptoo', 'Akinyi', 'Wanjiru', 'Njeri', 'Achieng', 'Zawadi', 'Imani', 'Grace', 'Neema'],
+}
+FIRST_NAMES['O'] = FIRST_NAMES['M'] + FIRST_NAMES['F']
+LAST_NAMES = [
+    'Kiplagat', 'Odhiambo', 'Mutua', 'Wafula', 'Kariuki', 'Chebet', 'Onyango', 'Njoroge',
+    'Barasa', 'Koech', 'Omondi', 'Wambui', 'Langat', 'Mohamed', 'Nyambura', 'Ruto',
+]
+
+
+# Learner columns written by create_learners(), in row order.
+LEARNER_COLUMNS = [
+    'birth_certificate_number', 'admission_number', 'first_name', 'last_name', 'date_of_birth',
+    'gender', 'school', 'grade', 'year', 'admission_date', 'class_teacher', 'parent_full_name',
+    'parent_contact', 'relationship_to_learner', 'county', 'sub_county', 'ward', 'postal_address', 'status',
+]
+
+
+def entry_age(grade):
+    """Typical age on 1 January of the school year."""
+    return 4 if grade == 'PP1' else 5 if grade == 'PP2' else int(grade.split()[-1]) + 5
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic national dataset (schools, streams, teachers, "
+        "assignments and learners) on the real locations.csv hierarchy. "
+        "The defaults give about 2.4M learners; --schools-per-ward 10 gives about 10M."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--file", default=os.path.join(settings.BASE_DIR, "locations.csv"),
+                            help="Locations CSV, imported first if no counties exist")
+        parser.add_argument("--counties", type=int, help="Only use the first N counties")
+        parser.add_argument("--schools-per-ward", type=int, default=2)
+        parser.add_argument("--streams-per-grade", type=int, default=2)
+        parser.add_argument("--teachers-per-school", type=int, default=12)
+        parser.add_argument("--learners-per-stream", type=int, default=45,
+                            help="Average class size; each stream varies by +/-25%%")
+        parser.add_argument("--year", type=int, default=date.today().year)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--prefix", default="SYN",
+                            help="Prefix for school codes, usernames and IDs of generated rows")
+        parser.add_argument("--flush", action="store_true",
+                            help="Delete rows generated earlier with the same prefix first")
+        parser.add_argument("--password",
+                            help="Create a <prefix>-cs Cabinet Secretary login with this password "
+                                 "(not created without it; generated teachers cannot log in)")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.prefix = options["prefix"]
+        self.year = options["year"]
+        started = time.monotonic()
+
+        if options["flush"]:
+            self.flush()
+        elif School.objects.filter(code__startswith=self.prefix).exists():
+            raise CommandError(
+                f"Synthetic data with prefix '{self.prefix}' already exists. Use --flush or another --prefix."
+            )
+
+        if not County.objects.exists():
+            call_command("import_location", file=options["file"], stdout=self.stdout)
+
+        if connection.vendor == 'sqlite':
+            # Trade crash safety for speed while loading; this connection only.
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA synchronous = OFF")
+                cursor.execute("PRAGMA journal_mode = MEMORY")
+
+        subjects = self.ensure_subjects()
+        schools = self.create_schools(options["counties"], options["schools_per_ward"])
+        streams = self.create_streams(schools, options["streams_per_grade"])
+        teachers = self.create_teachers(schools, options["teachers_per_school"])
+        class_teachers = self.create_assignments(streams, teachers, subjects)
+        learners = self.create_learners(schools, streams, class_teachers, options["learners_per_stream"])
+        self.create_dashboard_user(options["password"])
+
+        self.stdout.write(self.style.NOTICE("Rebuilding rollups..."))
+        rebuild_rollups()
+        invalidate_headline_stats()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(schools)} schools, {len(streams)} streams, {len(teachers)} teachers and "
+            f"{learners} learners in {time.monotonic() - started:.0f}s"
+        ))
+
+    # --------------------------
+    # Steps
+    # --------------------------
+
+    def flush(self):
+        """
+        Delete earlier synthetic rows without loading them: bulk deletes
+        skip the per-row signal handlers, and the rollups are rebuilt at the end.
+        """
+        self.stdout.write(self.style.NOTICE(f"Deleting synthetic data with prefix '{self.prefix}'..."))
+        User = get_user_model()
+        schools = School.objects.filter(code__startswith=self.prefix)
+        users = User.objects.filter(username__startswith=f"{self.prefix.lower()}-")
+        with transaction.atomic():
+            # SET_NULL references from rows that stay.
+            DuplicateCandidate.objects.filter(reviewed_by__in=users).update(reviewed_by=None)
+            Learner.objects.filter(class_teacher__school__in=schools).update(class_teacher=None)
+
+            # Every table referencing the deleted rows, children first. A
+            # model with a foreign key to any of these belongs in this list.
+            for queryset in (
+                DuplicateCandidate.objects.filter(
+                    Q(learner__school__in=schools) | Q(duplicate__school__in=schools)
+                ),
+                Learner.subjects.through.objects.filter(
+                    Q(learner__school__in=schools) | Q(subject__school__in=schools)
+                ),
+                Learner.objects.filter(school__in=schools),
+                TimetableLesson.objects.filter(
+                    Q(timetable__school__in=schools) | Q(stream__school__in=schools) | Q(teacher__school__in=schools)
+                ),
+                Timetable.objects.filter(school__in=schools),
+                SubjectAssignment.objects.filter(
+                    Q(stream__school__in=schools) | Q(teacher__school__in=schools) | Q(subject__school__in=schools)
+                ),
+                ClassAssignment.objects.filter(Q(stream__school__in=schools) | Q(teacher__school__in=schools)),
+                Subject.objects.filter(school__in=schools),
+                Teacher.objects.filter(Q(school__in=schools) | Q(user__in=users)),
+                LogEntry.objects.filter(user__in=users),
+                User.groups.through.objects.filter(**{f"{User._meta.model_name}__in": users}),
+                User.user_permissions.through.objects.filter(**{f"{User._meta.model_name}__in": users}),
+                users,
+                Stream.objects.filter(school__in=schools),
+                schools,
+            ):
+                queryset._raw_delete(queryset.db)
+
+    def ensure_subjects(self):
+        """
+        Return {subject level: [compulsory national subject ids]}.
+        """
+        Subject.objects.bulk_create([
+            Subject(name=name, grade_level=level, is_compulsory=True)
+            for level, names in CBC_SUBJECTS.items()
+            for name in names
+        ], ignore_conflicts=True)
+
+        subjects = {level: [] for level in CBC_SUBJECTS}
+        for pk, level in Subject.objects.filter(school__isnull=True, is_compulsory=True).values_list('pk', 'grade_level'):
+            subjects[level].append(pk)
+        return subjects
+
+    def create_schools(self, counties, per_ward):
+        self.stdout.write(self.style.NOTICE("Creating schools..."))
+        wards = Ward.objects.order_by('sub_county__county_id', 'sub_county_id', 'id').values_list(
+            'id', 'sub_county_id', 'sub_county__county_id', 'name'
+        )
+        if counties:
+            county_ids = list(County.objects.order_by('id').values_list('id', flat=True)[:counties])
+            wards = wards.filter(sub_county__county_id__in=county_ids)
+
+        levels = list(SCHOOL_LEVELS)
+        weights = [share for share, _ in SCHOOL_LEVELS.values()]
+        schools = []
+        for ward_id, sub_county_id, county_id, ward_name in wards:
+            for level in self.rng.choices(levels, weights, k=per_ward):
+                n = len(schools) + 1
+                schools.append(School(
+                    name=f"{ward_name} {level} School {n}",
+                    code=f"{self.prefix}{n:07d}",
+                    school_level=level,
+                    county_id=county_id,
+                    sub_county_id=sub_county_id,
+                    ward_id=ward_id,
+                    address=f"P.O. Box {self.rng.randint(1, 999)} {ward_name}",
+                ))
+        return self.bulk_create(School, schools)
+
+    def create_streams(self, schools, per_grade):
+        self.stdout.write(self.style.NOTICE("Creating streams..."))
+        names = [chr(ord('A') + i) for i in range(per_grade)]
+        streams = [
+            Stream(school=school, grade=grade, name=name)
+            for school in schools
+            for grade in SCHOOL_LEVELS[school.school_level][1]
+            for name in names
+        ]
+        return self.bulk_create(Stream, streams)
+
+    def create_teachers(self, schools, per_school):
+        """
+        Create per_school teachers per school; the first is the school admin.
+        The accounts get an unusable password: whatever database this runs
+        against, nobody can log in as a generated teacher.
+        """
+        self.stdout.write(self.style.NOTICE("Creating teachers..."))
+        User = get_user_model()
+        password = make_password(None)
+        roles = ['class_teacher', 'subject_teacher']
+
+        users, teachers = [], []
+        for school in schools:
+            for i in range(per_school):
+                n = len(users) + 1
+                gender = self.rng.choice('MF')
+                role = 'school_admin' if i == 0 else 'head_teacher' if i == 1 else roles[i % 2]
+                users.append(User(
+                    username=f"{self.prefix.lower()}-t{n}",
+                    first_name=self.rng.choice(FIRST_NAMES[gender]),
+                    last_name=self.rng.choice(LAST_NAMES),
+                    email=f"{self.prefix.lower()}-t{n}@example.com",
+                    password=password,
+                    role='school_admin' if role == 'school_admin' else 'teacher',
+                ))
+                teachers.append(Teacher(
+                    school=school,
+                    role=role,
+                    tsc_number=f"{self.prefix}T{n:08d}",
+                    phone=f"07{self.rng.randint(10000000, 99999999)}",
+                ))
+
+        users = self.bulk_create(User, users)
+        for user, teacher in zip(users, teachers):
+            teacher.user = user
+        return self.bulk_create(Teacher, teachers)
+
+    def create_assignments(self, streams, teachers, subjects):
+        """
+        Give every stream a class teacher and a teacher for each compulsory
+        subject, rotating through the school's staff. Returns {stream id: teacher id}.
+        """
+        self.stdout.write(self.style.NOTICE("Creating class and subject assignments..."))
+        staff = {}
+        for teacher in teachers:
+            staff.setdefault(teacher.school_id, []).append(teacher.pk)
+
+        class_teachers, classes, lessons = {}, [], []
+        for i, stream in enumerate(streams):
+            school_staff = staff[stream.school_id]
+            class_teachers[stream.pk] = school_staff[i % len(school_staff)]
+            classes.append(ClassAssignment(
+                teacher_id=class_teachers[stream.pk], stream=stream, year=self.year, is_class_teacher=True,
+            ))
+            for j, subject_id in enumerate(subjects[Subject.level_for_grade(stream.grade)]):
+                lessons.append(SubjectAssignment(
+                    teacher_id=school_staff[(i + j) % len(school_staff)],
+                    subject_id=subject_id, stream=stream, year=self.year,
+                ))
+
+        self.bulk_create(ClassAssignment, classes)
+        self.bulk_create(SubjectAssignment, lessons)
+        return class_teachers
+
+    def create_learners(self, schools, streams, class_teachers, per_stream):
+        """
+        Insert learners batch by batch so memory stays flat at any volume.
+        Gender is roughly balanced and ages follow the grade with some
+        early and late starters.
+        """
+        self.stdout.write(self.style.NOTICE("Creating learners..."))
+        rng = self.rng
+        by_id = {school.pk: school for school in schools}
+        low, high = int(per_stream * 0.75), int(per_stream * 1.25)
+        admitted = date(self.year, 1, 5)
+        # Cumulative weights, so choices() does not re-sum them for every learner.
+        genders, gender_weights = ['M', 'F', 'O'], [0.497, 0.999, 1.0]
+        age_offsets, age_weights = (-1, 0, 1, 2), (0.05, 0.8, 0.95, 1.0)
+        relationships, relationship_weights = ['Mother', 'Father', 'Guardian', 'Other'], [0.55, 0.85, 0.98, 1.0]
+
+        batch, total = [], 0
+        for stream in streams:
+            school = by_id[stream.school_id]
+            age = entry_age(stream.grade)
+            class_teacher_id = class_teachers[stream.pk]
+            for _ in range(rng.randint(low, high)):
+                total += 1
+                gender = rng.choices(genders, cum_weights=gender_weights)[0]
+                last_name = rng.choice(LAST_NAMES)
+                born = date(self.year - age - rng.choices(age_offsets, cum_weights=age_weights)[0], 1, 1)
+                # Same order as LEARNER_COLUMNS.
+                batch.append((
+                    f"{self.prefix}B{total:010d}",
+                    f"{self.prefix}A{total:010d}",
+                    rng.choice(FIRST_NAMES[gender]),
+                    last_name,
+                    born + timedelta(days=rng.randrange(365)),
+                    gender,
+                    school.pk,
+                    stream.grade,
+                    self.year,
+                    admitted,
+                    class_teacher_id,
+                    f"{rng.choice(FIRST_NAMES['O'])} {last_name}",
+                    f"07{rng.randint(10000000, 99999999)}",
+                    rng.choices(relationships, cum_weights=relationship_weights)[0],
+                    school.county_id,
+                    school.sub_county_id,
+                    school.ward_id,
+                    school.address,
+                    Learner.ACTIVE,
+                ))
+                if len(batch) >= self.batch_size:
+                    self.insert_learners(batch, total)
+                    batch = []
+        if batch:
+            self.insert_learners(batch, total)
+        return total
+
+    def insert_learners(self, rows, total):
+        """
+        Insert prepared learner rows with one executemany per batch. Building
+        millions of model instances for bulk_create costs far more than the
+        INSERTs themselves.
+        """
+        if not hasattr(self, '_learner_insert'):
+            meta = Learner._meta
+            columns = [meta.get_field(name).column for name in LEARNER_COLUMNS]
+            self._learner_insert = "INSERT INTO {} ({}) VALUES ({})".format(
+                connection.ops.quote_name(meta.db_table),
+                ", ".join(connection.ops.quote_name(column) for column in columns),
+                ", ".join(["%s"] * len(columns)),
+            )
+
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(self._learner_insert, rows)
+        if total % 100_000 < len(rows):
+            self.stdout.write(f"  {total} learners")
+
+    def create_dashboard_user(self, password):
+        """
+        A cabinet secretary account for the national dashboards, only when
+        a password was given: it sees every county.
+        """
+        User = get_user_model()
+        username = f"{self.prefix.lower()}-cs"
+        if password is None:
+            self.stdout.write(f"No --password given; not creating the {username} dashboard login.")
+        elif not User.objects.filter(username=username).exists():
+            User.objects.create_user(username=username, password=password, role='cabinet_secretary')
+
+    # --------------------------
+    # Helpers
+    # --------------------------
+
+    def bulk_create(self, model, objs):
+        """
+        bulk_create in batches, one transaction per batch; returns objs with pks set.
+        """
+        for start in range(0, len(objs), self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(objs[start:start + self.batch_size], batch_size=self.batch_size)
+        return objs
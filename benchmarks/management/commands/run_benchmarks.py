@@ -0,0 +1,171 @@
+import json
+import os
+import platform
+import subprocess
+import tempfile
+from datetime import datetime, timezone
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from benchmarks.suite import CASES, DATASETS, DATASET_PREFIX, compare, run_case
+from learners.models import Learner
+from schools.models import School
+from teachers.models import Teacher
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the hot views and commands against generated datasets of "
+        "several sizes, recording latency, query count and peak memory to JSON. "
+        "With --compare BASE NEW, report regressions between two result files."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="small",
+                            help=f"Comma-separated dataset sizes: {', '.join(DATASETS)}")
+        parser.add_argument("--case", action="append", choices=CASES, dest="cases",
+                            help="Only run this case (repeatable)")
+        parser.add_argument("--repeat", type=int, default=5, help="Timed runs per case")
+        parser.add_argument("--output", default="benchmark_results.json")
+        parser.add_argument("--keepdb", action="store_true",
+                            help="Keep the benchmark databases so later runs skip data generation")
+        parser.add_argument("--data-dir", default=tempfile.gettempdir(),
+                            help="Where SQLite benchmark databases are created")
+        parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"),
+                            help="Compare two result files instead of running")
+        parser.add_argument("--threshold", type=float, default=0.2,
+                            help="Relative slowdown / memory growth flagged as a regression (default 0.2)")
+
+    def handle(self, *args, **options):
+        if options["compare"]:
+            return self.compare(*options["compare"], options["threshold"])
+
+        sizes = [size.strip() for size in options["sizes"].split(",") if size.strip()]
+        unknown = set(sizes) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Unknown dataset size(s): {', '.join(sorted(unknown))}")
+
+        results = {
+            'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'environment': self.environment(),
+            'repeat': options["repeat"],
+            'sizes': {},
+        }
+        # Measure the views as production runs them: no DEBUG query log and
+        # none of our own instrumentation.
+        setup_test_environment(debug=False)
+        try:
+            with override_settings(QUERY_BUDGET={'ENABLED': False}, METRICS={'ENABLED': False}):
+                for size in sizes:
+                    results['sizes'][size] = self.run_size(size, options)
+        finally:
+            teardown_test_environment()
+
+        with open(options["output"], "w", encoding="utf-8") as fh:
+            json.dump(results, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Results written to {options['output']}"))
+
+    # --------------------------
+    # Running
+    # --------------------------
+
+    def run_size(self, size, options):
+        """
+        Build (or reuse) the dataset for one size in its own test database and run every case.
+        """
+        test_settings = connection.settings_dict.setdefault('TEST', {})
+        original_test_name = test_settings.get('NAME')
+        if connection.vendor == 'sqlite':
+            test_settings['NAME'] = os.path.join(options["data_dir"], f"benchmark_{size}.sqlite3")
+        else:
+            test_settings['NAME'] = f"benchmark_{size}"
+
+        self.stdout.write(self.style.NOTICE(f"Preparing '{size}' dataset..."))
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True, serialize=False, keepdb=options["keepdb"]
+        )
+        try:
+            if not School.objects.filter(code__startswith=DATASET_PREFIX).exists():
+                call_command("generate_synthetic", prefix=DATASET_PREFIX, stdout=self.stdout, **DATASETS[size])
+            cache.clear()
+
+            dataset = {
+                'schools': School.objects.count(),
+                'teachers': Teacher.objects.count(),
+                'learners': Learner.objects.count(),
+            }
+            self.stdout.write(f"{'case':<26}{'p50 ms':>10}{'p90 ms':>10}{'queries':>9}{'peak KiB':>11}")
+            cases = {}
+            for name in options["cases"] or CASES:
+                cases[name] = result = run_case(name, options["repeat"])
+                self.write_result(name, result)
+            return {'dataset': dataset, 'cases': cases}
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=options["keepdb"])
+            test_settings['NAME'] = original_test_name
+
+    def write_result(self, name, result):
+        if 'error' in result:
+            self.stdout.write(self.style.ERROR(f"{name:<26}{result['error']}"))
+        else:
+            self.stdout.write(
+                f"{name:<26}{result['p50_ms']:>10}{result['p90_ms']:>10}"
+                f"{result['queries']:>9}{result['peak_memory_kib']:>11}"
+            )
+
+    def environment(self):
+        try:
+            revision = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            revision = None
+        return {
+            'revision': revision,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'database': connection.vendor,
+            'platform': platform.platform(),
+        }
+
+    # --------------------------
+    # Comparing
+    # --------------------------
+
+    def compare(self, base_path, new_path, threshold):
+        try:
+            with open(base_path, encoding="utf-8") as fh:
+                base = json.load(fh)
+            with open(new_path, encoding="utf-8") as fh:
+                new = json.load(fh)
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read results: {exc}")
+
+        rows = compare(base, new, threshold)
+        self.stdout.write(
+            f"{'size':<8}{'case':<26}{'p50 before':>12}{'p50 after':>11}{'change':>9}{'queries':>12}  status"
+        )
+        for row in rows:
+            before, after = row['before'], row['after']
+            if 'error' in before or 'error' in after:
+                timing, change, queries = f"{'-':>12}{'-':>11}", f"{'-':>9}", f"{'-':>12}"
+            else:
+                pct = (after['p50_ms'] / before['p50_ms'] - 1) * 100 if before['p50_ms'] else 0.0
+                timing = f"{before['p50_ms']:>12}{after['p50_ms']:>11}"
+                change = f"{pct:>+8.0f}%"
+                queries = f"{before['queries']:>5} -> {after['queries']:<4}"
+            status = ", ".join(row['regressions']) if row['regressions'] else "ok"
+            line = f"{row['size']:<8}{row['case']:<26}{timing}{change}{queries}  {status}"
+            self.stdout.write(self.style.ERROR(line) if row['regressions'] else line)
+
+        regressions = [row for row in rows if row['regressions']]
+        if regressions:
+            raise CommandError(f"{len(regressions)} regression(s) found")
+        self.stdout.write(self.style.SUCCESS(f"No regressions across {len(rows)} cases"))
@@ -0,0 +1,160 @@
+# benchmarks/plans.py
+"""
+Query plan checks for `manage.py check_query_plans`.
+
+Each case builds a queryset the way its view does and runs it through
+SQLite's EXPLAIN QUERY PLAN. A plan fails when it reads a whole table
+("SCAN <table>" without an index) or sorts with a temporary B-tree; both
+grow with the size of the table instead of the size of the page.
+
+Walking an index in order ("SCAN ... USING INDEX") is fine: it is how an
+unfiltered, paginated list reads just the rows it returns.
+"""
+from django.db import connection
+
+from home.views import DASHBOARD_PAGE_SIZE, DASHBOARD_TABLES
+from learners.models import Learner
+from location.models import County, SubCounty
+from schools.models import School
+from teachers.models import SubjectAssignment, Teacher
+from teachers.views import TEACHER_LIST_FIELDS, TEACHER_PAGE_SIZE, TEACHER_SORTS
+from utils.pagination import KeysetPaginator
+
+
+TEMP_SORT = "USE TEMP B-TREE"
+
+
+def _first(model):
+    return model.objects.order_by('pk').values_list('pk', flat=True).first() or 0
+
+
+def _keyset_page(paginator, cursor_page=False):
+    """
+    The query a KeysetPaginator runs: the first page or, with cursor_page,
+    a page after the first row (None when there are no rows to page from:
+    a made-up cursor would need a value of each field's type).
+    """
+    ordering = paginator.ordering
+    queryset = paginator.queryset.order_by(*ordering)
+    if cursor_page:
+        row = queryset.first()
+        if row is None:
+            return None
+        queryset = queryset.filter(paginator._after([paginator._value(row, field) for field in ordering]))
+    return queryset[:paginator.per_page + 1]
+
+
+def _without_empty(cases):
+    """
+    Drop the next-page cases that have no row to page from.
+    """
+    return {name: case for name, case in cases.items() if case[0] is not None}
+
+
+def _dashboard_page(name, queryset, cursor_page=False):
+    """
+    The query _table_page() runs for a dashboard table.
+    """
+    _, ordering, related = DASHBOARD_TABLES[name]
+    paginator = KeysetPaginator(queryset.select_related(*related), ordering, per_page=DASHBOARD_PAGE_SIZE)
+    return _keyset_page(paginator, cursor_page)
+
+
+def _teacher_list_cases(school):
+    """
+    teachers.views.teacher_list, first and next page, for every sort option.
+    """
+    cases = {}
+    queryset = Teacher.objects.filter(school=school).select_related('user').only(*TEACHER_LIST_FIELDS)
+    for sort, ordering in TEACHER_SORTS.items():
+        # Names are in the user table, which no Teacher index can order; the
+        # sort is over one school's staff only.
+        allowed = (TEMP_SORT,) if sort == 'name' else ()
+        paginator = KeysetPaginator(queryset, ordering, per_page=TEACHER_PAGE_SIZE)
+        cases[f'teacher_list_{sort}'] = (_keyset_page(paginator), allowed)
+        cases[f'teacher_list_{sort}_next'] = (_keyset_page(paginator, cursor_page=True), allowed)
+    return _without_empty(cases)
+
+
+def _dashboard_cases(scope, schools=None):
+    """
+    The three dashboard tables, as home.views builds them for a set of
+    schools, or unfiltered for the national dashboard.
+    """
+    cases = {}
+    tables = {
+        'schools': School.objects.all(),
+        'teachers': Teacher.objects.all(),
+        'learners': Learner.objects.all(),
+    } if schools is None else {
+        'schools': schools,
+        'teachers': Teacher.objects.filter(school__in=schools),
+        'learners': Learner.objects.filter(school__in=schools),
+    }
+    for name, queryset in tables.items():
+        cases[f'{scope}_dashboard_{name}'] = (_dashboard_page(name, queryset), ())
+        cases[f'{scope}_dashboard_{name}_next'] = (_dashboard_page(name, queryset, cursor_page=True), ())
+    return _without_empty(cases)
+
+
+def plan_cases():
+    """
+    name -> (queryset, allowed plan details).
+
+    `allowed` lists substrings of plan lines that are expected for that
+    case, each with the reason it is bounded.
+    """
+    school = _first(School)
+    county = _first(County)
+    sub_county = _first(SubCounty)
+
+    cases = {
+        # learners.views.learner_list
+        'learner_list_school': (
+            Learner.objects.filter(school=school, status=Learner.ACTIVE).order_by('grade', 'last_name', 'first_name'), ()),
+        'learner_list_national': (
+            Learner.objects.filter(status=Learner.ACTIVE).order_by('school', 'grade', 'last_name', 'first_name'), ()),
+        # schools.views.school_list
+        'school_list_county': (School.objects.filter(county=county), ()),
+        'school_list_subcounty': (School.objects.filter(sub_county=sub_county), ()),
+        # teachers.views.subject_assignment_list
+        'subject_assignment_list': (
+            SubjectAssignment.objects.filter(teacher__school=school)
+            .select_related('teacher__user', 'subject').order_by('stream__grade', 'subject__name'),
+            # The sort keys live in two joined tables, which no single index can
+            # order; the sort is over one school's assignments only.
+            (TEMP_SORT,)),
+    }
+    cases.update(_teacher_list_cases(school))
+    cases.update(_dashboard_cases('national'))
+    cases.update(_dashboard_cases('county', School.objects.filter(county=county)))
+    cases.update(_dashboard_cases('subcounty', School.objects.filter(sub_county=sub_county)))
+    return cases
+
+
+def explain(queryset):
+    """
+    Return the EXPLAIN QUERY PLAN detail lines for a queryset.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        return [row[-1] for row in cursor.fetchall()]
+
+
+def is_full_scan(line):
+    # "SCAN t USING [COVERING] INDEX i" walks an index; "SCAN t" reads the table.
+    return line.startswith("SCAN ") and " USING " not in line and line != "SCAN CONSTANT ROW"
+
+
+def problems(plan, allowed=()):
+    """
+    Plan lines that scan a whole table or sort in a temp B-tree, minus the allowed ones.
+    """
+    found = []
+    for line in plan:
+        if any(allow in line for allow in allowed):
+            continue
+        if TEMP_SORT in line or is_full_scan(line):
+            found.append(line)
+    return found
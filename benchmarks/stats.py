@@ -0,0 +1,30 @@
+# benchmarks/stats.py
+import math
+
+
+def percentile(values, pct):
+    """
+    Nearest-rank percentile of a list of numbers (pct in 0-100).
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(latencies, elapsed=None):
+    """
+    Summarise request latencies (seconds) into milliseconds.
+    """
+    summary = {
+        'count': len(latencies),
+        'mean_ms': round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p90_ms': round(percentile(latencies, 90) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else 0.0,
+    }
+    if elapsed:
+        summary['throughput_rps'] = round(len(latencies) / elapsed, 1)
+    return summary
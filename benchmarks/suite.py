@@ -0,0 +1,176 @@
+# benchmarks/suite.py
+"""
+Benchmark cases and measurement helpers for `manage.py run_benchmarks`.
+
+Every case is measured the same way: warm-up runs, then timed runs for
+latency, one run with a query-counting execute wrapper and one under
+tracemalloc for peak Python memory. Counting queries and tracing
+allocations both slow the code down, so they never overlap the timed runs.
+"""
+import io
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
+
+from location.models import County, SubCounty
+
+from .stats import summarize
+
+
+# Datasets built with generate_synthetic, by size name.
+DATASETS = {
+    'small': {'counties': 1, 'schools_per_ward': 1},
+    'medium': {'counties': 10, 'schools_per_ward': 2},
+    'large': {'schools_per_ward': 2},
+}
+
+DATASET_PREFIX = 'BEN'
+
+# name -> (url name, role of the requesting user or None for anonymous, query string builder)
+VIEW_CASES = {
+    'learner_list': ('learners:learner_list', 'teacher', None),
+    'teacher_list': ('teachers:teacher_list', 'school_admin', None),
+    'school_list': ('schools:school_list', 'cabinet_secretary', None),
+    'home': ('home:home', None, None),
+    'cs_dashboard': ('home:cs_dashboard', 'cabinet_secretary', None),
+    'county_dashboard': ('home:county_dashboard', 'county_director', None),
+    'subcounty_dashboard': ('home:subcounty_dashboard', 'subcounty_director', None),
+    'school_admin_dashboard': ('home:school_admin_dashboard', 'school_admin', None),
+    'teacher_dashboard': ('home:teacher_dashboard', 'teacher', None),
+    'ajax_load_subcounties': ('schools:ajax_load_subcounties', 'cabinet_secretary',
+                              lambda: {'county_id': County.objects.order_by('pk').values_list('pk', flat=True).first()}),
+    'ajax_load_wards': ('schools:ajax_load_wards', 'cabinet_secretary',
+                        lambda: {'subcounty_id': SubCounty.objects.order_by('pk').values_list('pk', flat=True).first()}),
+}
+
+COMMAND_CASES = {
+    # Re-importing an already loaded file: the common case after the first deploy.
+    'import_location': ('import_location', {}),
+}
+
+CASES = [*VIEW_CASES, *COMMAND_CASES]
+
+
+def measure(func, repeat, warmup=1):
+    """
+    Run func warmup + repeat + 2 times and return latency, query and memory figures.
+    """
+    for _ in range(warmup):
+        func()
+
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        latencies.append(time.perf_counter() - start)
+
+    queries = []
+
+    def record(execute, sql, params, many, context):
+        queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        func()
+
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    result = summarize(latencies)
+    result.update({
+        'min_ms': round(min(latencies) * 1000, 2),
+        'queries': len(queries),
+        'peak_memory_kib': round(peak / 1024, 1),
+    })
+    return result
+
+
+def user_for(role):
+    """
+    First active user with the role, creating a benchmark account if none exists.
+    """
+    User = get_user_model()
+    users = User.objects.filter(role=role, is_active=True)
+    if role in ('teacher', 'school_admin'):
+        # The school-scoped views find the school through the teacher profile.
+        users = users.filter(teacher_profile__isnull=False)
+    user = users.order_by('pk').first()
+    if user is None:
+        user, _ = User.objects.get_or_create(username=f"bench-{role}", defaults={'role': role})
+    return user
+
+
+def view_case(name):
+    """
+    Return a zero-argument callable that requests the case's view once.
+    """
+    url_name, role, params = VIEW_CASES[name]
+    client = Client()
+    if role:
+        client.force_login(user_for(role))
+    url = reverse(url_name)
+    data = params() if params else None
+
+    def request():
+        response = client.get(url, data)
+        if response.status_code != 200:
+            raise RuntimeError(f"{url} returned HTTP {response.status_code}")
+    return request
+
+
+def command_case(name):
+    command, options = COMMAND_CASES[name]
+
+    def run():
+        call_command(command, stdout=io.StringIO(), **options)
+    return run
+
+
+def run_case(name, repeat):
+    """
+    Measure one case; failures are recorded instead of aborting the suite.
+    """
+    try:
+        func = view_case(name) if name in VIEW_CASES else command_case(name)
+        return measure(func, repeat)
+    except Exception as exc:
+        return {'error': f"{type(exc).__name__}: {exc}"}
+
+
+def compare(base, new, threshold=0.2, min_delta_ms=1.0):
+    """
+    Compare two result files; returns a list of rows, each with a
+    `regressions` list naming the metrics that got worse.
+
+    Latency and memory regress when they grow by more than `threshold`
+    (and, for latency, by at least min_delta_ms); any extra query regresses.
+    """
+    rows = []
+    for size, new_size in new.get('sizes', {}).items():
+        base_cases = base.get('sizes', {}).get(size, {}).get('cases', {})
+        for case, after in new_size.get('cases', {}).items():
+            before = base_cases.get(case)
+            if before is None:
+                continue
+            row = {'size': size, 'case': case, 'before': before, 'after': after, 'regressions': []}
+            if 'error' in after and 'error' not in before:
+                row['regressions'].append('error')
+            elif 'error' not in after and 'error' not in before:
+                delta = after['p50_ms'] - before['p50_ms']
+                if delta >= min_delta_ms and after['p50_ms'] > before['p50_ms'] * (1 + threshold):
+                    row['regressions'].append('latency')
+                if after['queries'] > before['queries']:
+                    row['regressions'].append('queries')
+                if after['peak_memory_kib'] > before['peak_memory_kib'] * (1 + threshold):
+                    row['regressions'].append('memory')
+            rows.append(row)
+    return rows
@@ -28,10 +28,13 @@ INSTALLED_APPS = [
     'teachers',
     'learners',
     'home',
+    'reports',  # Dashboard rollups
+    'benchmarks',  # Performance tooling (management commands only)
     'accounts',  # CustomUser and authentication
 ]
 
 MIDDLEWARE = [
+    'utils.metrics.MetricsMiddleware',  # First, so latency covers the whole stack
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -39,6 +42,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'utils.query_budget.QueryBudgetMiddleware',
 ]
 
 ROOT_URLCONF = 'cbc_nemis.urls'
@@ -70,6 +74,97 @@ DATABASES = {
 }
 
 
+# Cache
+# Local memory is per-process; point this at a shared cache (Redis/Memcached)
+# when running several workers so cached stats stay consistent between them.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Maximum age (seconds) of the cached landing-page totals before they are
+# reloaded from the rollup tables.
+HOME_STATS_TIMEOUT = 300
+
+# Maximum age (seconds) of a cached learner detail page (learners/detail_cache.py).
+# Saves through the ORM invalidate it sooner.
+LEARNER_CACHE_TIMEOUT = 900
+
+
+# Teacher workload and pupil-teacher ratio analytics (reports/analytics.py,
+# needs numpy). Cached per academic year for TIMEOUT seconds; TARGET_PTR is
+# the ratio "teachers needed" is counted against.
+ANALYTICS = {
+    'TARGET_PTR': 40,
+    'TIMEOUT': 3600,
+}
+
+
+# Query budget (utils/query_budget.py)
+# Logs requests that run too many queries or repeat one query shape (N+1),
+# naming the view and the template line responsible. Set RAISE to turn the
+# warnings into errors, e.g. while running tests.
+QUERY_BUDGET = {
+    'ENABLED': DEBUG,
+    'MAX_QUERIES': 50,
+    'MAX_DUPLICATES': 5,
+    'RAISE': False,
+}
+
+
+# Request metrics (utils/metrics.py), scraped from /metrics/
+# Add a 'DIR' shared by every worker process (default: <tmp>/cbc_nemis_metrics)
+# and clear it on restart.
+METRICS = {
+    'ENABLED': True,
+    'FLUSH_INTERVAL': 5,
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+
+# Profile image thumbnails (accounts/thumbnails.py): square WebP + JPEG per
+# size, generated in a background thread pool after upload. Backfill with
+# `manage.py generate_thumbnails`.
+THUMBNAILS = {
+    'SIZES': {'small': 96, 'medium': 192},
+    'QUALITY': 80,
+    'WORKERS': 2,
+    'ASYNC': True,
+}
+
+
+# School week for generated timetables (teachers/timetable.py). Lessons per
+# week are set per subject (Subject.lessons_per_week).
+TIMETABLE = {
+    'DAYS': 5,
+    'PERIODS_PER_DAY': 8,
+}
+
+
+# Outgoing mail. Local development writes each message to a file in
+# sent_mail/ (use 'django.core.mail.backends.locmem.EmailBackend' in tests);
+# production sets the SMTP backend and EMAIL_HOST, EMAIL_PORT, etc.
+EMAIL_BACKEND = (
+    'django.core.mail.backends.filebased.EmailBackend' if DEBUG
+    else 'django.core.mail.backends.smtp.EmailBackend'
+)
+EMAIL_FILE_PATH = BASE_DIR / 'sent_mail'
+DEFAULT_FROM_EMAIL = 'no-reply@myschool.com'
+
+# Email outbox (accounts/outbox.py): mail is queued in the request's
+# transaction and sent after commit by a background thread, BATCH_SIZE
+# messages per connection. Failed sends are retried after RETRY_DELAY
+# seconds, doubling up to MAX_RETRY_DELAY, by `manage.py send_outbox_mail`.
+OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 6,
+    'RETRY_DELAY': 60,
+    'MAX_RETRY_DELAY': 3600,
+    'ASYNC': True,
+}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
@@ -1,8 +1,13 @@
 from django.contrib import admin
 from django.urls import path, include
 
+from utils.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
+
+    # Prometheus scrape endpoint (internal)
+    path('metrics/', metrics_view, name='metrics'),
     
     # Authentication URLs
     path('accounts/', include('accounts.urls', namespace='accounts')),
@@ -13,4 +18,5 @@ urlpatterns = [
     path('learners/', include('learners.urls', namespace='learners')),
     path('schools/', include('schools.urls', namespace='schools')),
     path('subjects/', include('subjects.urls', namespace='subjects')),
+    path('reports/', include('reports.urls', namespace='reports')),
 ]
@@ -0,0 +1,206 @@
+"""
+Read-only JSON dashboard API.
+
+One endpoint per dashboard scope (national, county, subcounty, school,
+teacher) returning the same aggregates as the HTML dashboards. Responses
+carry an ETag and Last-Modified derived from the scope's DataVersion
+counters, so a poll whose If-None-Match / If-Modified-Since still matches
+gets a 304 after reading only the version rows, never the learner tables.
+"""
+from functools import wraps
+
+from django.db.models import Count
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_GET
+
+from learners.models import Learner
+from location.models import SubCounty
+from reports.rollups import get_summary, scope_key
+from reports.versions import get_versions
+from schools.models import School
+from teachers.models import Teacher, ClassAssignment, SubjectAssignment
+
+
+SCOPE_ROLES = {
+    'national': ['cabinet_secretary'],
+    'county': ['county_director', 'cabinet_secretary'],
+    'subcounty': ['subcounty_director', 'county_director', 'cabinet_secretary'],
+    'school': ['school_admin', 'subcounty_director', 'county_director', 'cabinet_secretary'],
+    'teacher': ['teacher', 'school_admin', 'subcounty_director', 'county_director', 'cabinet_secretary'],
+}
+
+
+def _user_school(user):
+    profile = getattr(user, 'teacher_profile', None) or getattr(user, 'school_admin_profile', None)
+    return getattr(user, 'school', None) or getattr(profile, 'school', None)
+
+
+def owns_scope(user, scope, pk):
+    """
+    Whether `user` may see the dashboard of scope `pk`: like the HTML
+    dashboards, directors see only their own county or subcounty and what
+    lies in it, school admins their school and its teachers, teachers
+    themselves. Fails closed when the user's own county, subcounty or
+    school is not set.
+    """
+    role = user.role
+    if user.is_superuser or role == 'cabinet_secretary':
+        return True
+    if role == 'teacher':
+        return getattr(getattr(user, 'teacher_profile', None), 'pk', None) == pk
+
+    if role == 'county_director':
+        own, field = getattr(getattr(user, 'county', None), 'pk', None), 'county_id'
+    elif role == 'subcounty_director':
+        own, field = getattr(getattr(user, 'subcounty', None), 'pk', None), 'sub_county_id'
+    else:
+        own, field = getattr(_user_school(user), 'pk', None), 'id'
+    if own is None:
+        return False
+
+    if scope == 'county':
+        return role == 'county_director' and pk == own
+    if scope == 'subcounty':
+        if role == 'subcounty_director':
+            return pk == own
+        return role == 'county_director' and SubCounty.objects.filter(pk=pk, county_id=own).exists()
+    if scope == 'school':
+        return School.objects.filter(pk=pk, **{field: own}).exists()
+    if scope == 'teacher':
+        return Teacher.objects.filter(pk=pk, **{f'school__{field}': own}).exists()
+    return False
+
+
+def api_role_required(view_func):
+    """
+    JSON counterpart of utils.decorators.role_required: answers 401/403
+    instead of redirecting, since the callers are polling scripts. Also
+    checks that the requested county, subcounty, school or teacher is
+    within the user's own scope (owns_scope).
+    """
+    @wraps(view_func)
+    def wrapper(request, scope, pk=None):
+        user = request.user
+        if not user.is_authenticated:
+            return JsonResponse({'error': "Authentication required."}, status=401)
+
+        role = getattr(user, 'role', None)
+        allowed = user.is_superuser or role in SCOPE_ROLES[scope]
+        if allowed:
+            allowed = owns_scope(user, scope, pk)
+        if not allowed:
+            return JsonResponse({'error': "You do not have permission to access this dashboard."}, status=403)
+
+        return view_func(request, scope, pk)
+    return wrapper
+
+
+# --------------------------
+# Versions (ETag / Last-Modified)
+# --------------------------
+
+def _version_keys(scope, pk):
+    if scope == 'teacher':
+        # The teacher dashboard also shows school-wide learner totals.
+        school_id = Teacher.objects.filter(pk=pk).values_list('school_id', flat=True).first()
+        return [scope_key('teacher', pk), scope_key('school', school_id)]
+    return [scope_key(scope, pk)]
+
+
+def _scope_version(request, scope, pk=None):
+    """
+    Return (etag, last_modified) for a scope, computed once per request.
+    """
+    if not hasattr(request, '_dashboard_version'):
+        keys = _version_keys(scope, pk)
+        found = get_versions(*keys)
+        etag = ";".join(f"{key}.{found[key][0] if key in found else 0}" for key in keys)
+        modified = [updated_at for _, updated_at in found.values()]
+        request._dashboard_version = (etag, max(modified) if modified else None)
+    return request._dashboard_version
+
+
+def _etag(request, scope, pk=None):
+    return _scope_version(request, scope, pk)[0]
+
+
+def _last_modified(request, scope, pk=None):
+    return _scope_version(request, scope, pk)[1]
+
+
+# --------------------------
+# Aggregates
+# --------------------------
+
+def _geo_data(scope, pk):
+    summary = get_summary(scope, pk)
+    return {
+        'total_schools': summary['schools'],
+        'total_teachers': summary['teachers'],
+        'total_learners': summary['learners'],
+        'learners_by_grade': summary['by_grade'],
+    }
+
+
+def _school_data(pk):
+    school = get_object_or_404(School, pk=pk)
+
+    by_grade = {}
+    learners = Learner.objects.filter(status=Learner.ACTIVE, school=school)
+    for row in learners.order_by().values('grade', 'gender').annotate(n=Count('pk')):
+        by_grade.setdefault(row['grade'], {})[row['gender']] = row['n']
+
+    return {
+        'school': {'id': school.pk, 'name': school.name, 'code': school.code},
+        'total_teachers': Teacher.objects.filter(school=school).count(),
+        'total_learners': sum(sum(genders.values()) for genders in by_grade.values()),
+        'learners_by_grade': [
+            {
+                'grade': label,
+                'male': by_grade[grade].get('M', 0),
+                'female': by_grade[grade].get('F', 0),
+                'other': by_grade[grade].get('O', 0),
+                'total': sum(by_grade[grade].values()),
+            }
+            for grade, label in Learner.GRADE_CHOICES if grade in by_grade
+        ],
+    }
+
+
+def _teacher_data(pk):
+    teacher = get_object_or_404(Teacher.objects.select_related('school', 'user'), pk=pk)
+    return {
+        'teacher': {'id': teacher.pk, 'name': teacher.user.get_full_name() or teacher.user.username},
+        'school': {'id': teacher.school.pk, 'name': teacher.school.name},
+        'total_classes': ClassAssignment.objects.filter(teacher=teacher).count(),
+        'total_subjects': SubjectAssignment.objects.filter(teacher=teacher).count(),
+        'total_learners': Learner.objects.filter(status=Learner.ACTIVE, school=teacher.school).count(),
+    }
+
+
+# --------------------------
+# Endpoint
+# --------------------------
+
+@require_GET
+@api_role_required
+@cache_control(private=True, no_cache=True)
+@condition(etag_func=_etag, last_modified_func=_last_modified)
+def dashboard_api(request, scope, pk=None):
+    if scope == 'school':
+        data = _school_data(pk)
+    elif scope == 'teacher':
+        data = _teacher_data(pk)
+    else:
+        data = _geo_data(scope, pk)
+
+    etag, last_modified = _scope_version(request, scope, pk)
+    return JsonResponse({
+        'scope': scope,
+        'id': pk,
+        'version': etag,
+        'updated_at': last_modified,
+        'data': data,
+    })
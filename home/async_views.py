@@ -0,0 +1,203 @@
+"""
+Async versions of the dashboard views, for the ASGI entry point.
+
+The sync views in home/views.py run their aggregate queries one after
+another. Here independent queries are started together with gather():
+each runs in its own worker thread on its own database connection, so a
+dashboard costs roughly its slowest query instead of the sum of all of
+them. `manage.py bench_async_dashboards` compares the two paths.
+"""
+import asyncio
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.db import close_old_connections
+from django.shortcuts import render
+from django.urls import reverse
+
+from teachers.models import Teacher, ClassAssignment, SubjectAssignment
+from learners.models import Learner
+from schools.models import School
+from reports.rollups import get_summary
+
+from users.utils import (
+    is_cabinet_secretary,
+    is_county_director,
+    is_subcounty_director,
+    is_school_admin,
+    is_teacher,
+)
+from . import views
+
+
+def _isolated(func):
+    """
+    Run func on a worker thread's own connection, honouring CONN_MAX_AGE
+    the same way request_started/request_finished do.
+    """
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+async def gather(**calls):
+    """
+    Run independent zero-argument callables concurrently; returns {name: result}.
+    """
+    results = await asyncio.gather(*(
+        sync_to_async(_isolated, thread_sensitive=False)(call)
+        for call in calls.values()
+    ))
+    return dict(zip(calls, results))
+
+
+async def _render(request, template_name, context):
+    # Template rendering touches request.user and lazy querysets, so it stays sync.
+    return await sync_to_async(render)(request, template_name, context)
+
+
+async def _render_dashboard(request, template_name, context, tables, summary):
+    """
+    Async counterpart of views._render_dashboard: the rollup summary and the
+    first page of every table are fetched concurrently.
+    """
+    if request.GET.get('table') in tables:
+        return await sync_to_async(views._render_dashboard)(request, template_name, context, tables)
+
+    calls = {f'{name}_page': partial(views._table_page, name, queryset) for name, queryset in tables.items()}
+    calls['summary'] = partial(get_summary, *summary)
+    context.update(await gather(**calls))
+    return await _render(request, template_name, context)
+
+
+# --------------------------
+# Individual Dashboard Views
+# --------------------------
+
+@login_required
+@user_passes_test(is_cabinet_secretary)
+async def cs_dashboard(request):
+    context = {
+        'dashboard_title': "Cabinet Secretary Dashboard",
+        'breadcrumb': [
+            {"name": "Home", "url": reverse('home:home')},
+            {"name": "Cabinet Secretary Dashboard", "url": reverse('home:async_cs_dashboard')}
+        ]
+    }
+    tables = {
+        'schools': School.objects.all(),
+        'teachers': Teacher.objects.all(),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE),
+    }
+    return await _render_dashboard(request, 'home/cs_dashboard.html', context, tables, ('national',))
+
+
+@login_required
+@user_passes_test(is_county_director)
+async def county_dashboard(request):
+    user = await request.auser()
+    county = getattr(user, 'county', None)
+    context = {
+        'dashboard_title': "County Director Dashboard",
+        'breadcrumb': [
+            {"name": "Home", "url": reverse('home:home')},
+            {"name": "County Director Dashboard", "url": reverse('home:async_county_dashboard')}
+        ]
+    }
+    schools = School.objects.filter(county=county) if county else School.objects.none()
+    tables = {
+        'schools': schools,
+        'teachers': Teacher.objects.filter(school__in=schools),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE, school__in=schools),
+    }
+    summary = ('county', getattr(county, 'pk', None))
+    return await _render_dashboard(request, 'home/county_dashboard.html', context, tables, summary)
+
+
+@login_required
+@user_passes_test(is_subcounty_director)
+async def subcounty_dashboard(request):
+    user = await request.auser()
+    subcounty = getattr(user, 'subcounty', None)
+    context = {
+        'dashboard_title': "Subcounty Director Dashboard",
+        'breadcrumb': [
+            {"name": "Home", "url": reverse('home:home')},
+            {"name": "Subcounty Director Dashboard", "url": reverse('home:async_subcounty_dashboard')}
+        ]
+    }
+    schools = School.objects.filter(sub_county=subcounty) if subcounty else School.objects.none()
+    tables = {
+        'schools': schools,
+        'teachers': Teacher.objects.filter(school__in=schools),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE, school__in=schools),
+    }
+    summary = ('subcounty', getattr(subcounty, 'pk', None))
+    return await _render_dashboard(request, 'home/subcounty_dashboard.html', context, tables, summary)
+
+
+@login_required
+@user_passes_test(is_school_admin)
+async def school_admin_dashboard(request):
+    user = await request.auser()
+    school = getattr(user, 'school', None)
+    teachers = Teacher.objects.filter(school=school).select_related('user') if school else Teacher.objects.none()
+    learners = Learner.objects.filter(status=Learner.ACTIVE, school=school) if school else Learner.objects.none()
+
+    results = await gather(
+        total_teachers=teachers.count,
+        total_learners=learners.count,
+        teachers=partial(list, teachers),
+        learners=partial(list, learners),
+    )
+
+    context = {
+        'dashboard_title': "School Admin Dashboard",
+        'school': school,
+        **results,
+        'breadcrumb': [
+            {"name": "Home", "url": reverse('home:home')},
+            {"name": "School Admin Dashboard", "url": reverse('home:async_school_admin_dashboard')}
+        ]
+    }
+    return await _render(request, 'home/school_admin_dashboard.html', context)
+
+
+@login_required
+@user_passes_test(is_teacher)
+async def teacher_dashboard(request):
+    user = await request.auser()
+    teacher_profile = await Teacher.objects.select_related('school').filter(user=user).afirst()
+
+    context = {
+        'dashboard_title': "Teacher Dashboard",
+        'classes': [],
+        'subjects': [],
+        'learners': [],
+        'total_classes': 0,
+        'total_subjects': 0,
+        'total_learners': 0,
+        'breadcrumb': [
+            {"name": "Home", "url": reverse('home:home')},
+            {"name": "Teacher Dashboard", "url": reverse('home:async_teacher_dashboard')}
+        ]
+    }
+
+    if teacher_profile:
+        classes = ClassAssignment.objects.filter(teacher=teacher_profile).select_related('stream')
+        subjects = SubjectAssignment.objects.filter(teacher=teacher_profile).select_related('subject')
+        learners = Learner.objects.filter(status=Learner.ACTIVE, school=teacher_profile.school)
+        context['school'] = teacher_profile.school
+        context.update(await gather(
+            total_classes=classes.count,
+            total_subjects=subjects.count,
+            total_learners=learners.count,
+            classes=partial(list, classes),
+            subjects=partial(list, subjects),
+            learners=partial(list, learners),
+        ))
+
+    return await _render(request, 'home/teacher_dashboard.html', context)
@@ -0,0 +1,29 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from learners.models import Learner
+from schools.models import School
+from teachers.models import Teacher
+
+from .stats import adjust_headline_stat
+
+
+def _counted(sender, instance):
+    # The learner total only counts active learners, like the rollups.
+    return sender is not Learner or instance.status == Learner.ACTIVE
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Learner)
+def count_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and _counted(sender, instance):
+        adjust_headline_stat(sender, 1)
+
+
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Learner)
+def count_deleted(sender, instance, **kwargs):
+    if _counted(sender, instance):
+        adjust_headline_stat(sender, -1)
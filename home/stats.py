@@ -0,0 +1,69 @@
+"""
+Cached headline statistics for the public landing page.
+
+The three totals live in the cache under separate keys so signal handlers
+(see home/signals.py) can incr/decr them in place as rows are created and
+deleted. Entries expire after settings.HOME_STATS_TIMEOUT seconds, which
+bounds how stale the numbers can get when rows are written in bulk
+without signals.
+"""
+from django.conf import settings
+from django.core.cache import cache
+
+from learners.models import Learner
+from reports.models import GeoRollup
+from reports.rollups import NATIONAL_KEY
+from schools.models import School
+from teachers.models import Teacher
+
+
+STATS_KEYS = {
+    School: 'home:stats:total_schools',
+    Teacher: 'home:stats:total_teachers',
+    Learner: 'home:stats:total_learners',
+}
+
+
+def _stats_timeout():
+    return getattr(settings, 'HOME_STATS_TIMEOUT', 300)
+
+
+def _load_stats():
+    """
+    Read the totals from the national rollup row, falling back to COUNT(*)
+    when the rollups have not been built yet.
+    """
+    totals = GeoRollup.objects.filter(scope_key=NATIONAL_KEY).values_list(
+        'schools', 'teachers', 'learners'
+    ).first()
+    if totals is None:
+        totals = (
+            School.objects.count(), Teacher.objects.count(),
+            Learner.objects.filter(status=Learner.ACTIVE).count(),
+        )
+    return dict(zip(STATS_KEYS.values(), totals))
+
+
+def get_headline_stats():
+    """
+    Return {'total_schools', 'total_teachers', 'total_learners'}.
+    """
+    stats = cache.get_many(STATS_KEYS.values())
+    if len(stats) != len(STATS_KEYS):
+        stats = _load_stats()
+        cache.set_many(stats, timeout=_stats_timeout())
+    return {key.rsplit(':', 1)[1]: stats[key] for key in STATS_KEYS.values()}
+
+
+def adjust_headline_stat(model, delta):
+    """
+    Increment or decrement one cached total; a missing entry is left to reload.
+    """
+    try:
+        cache.incr(STATS_KEYS[model], delta)
+    except ValueError:
+        pass
+
+
+def invalidate_headline_stats():
+    cache.delete_many(STATS_KEYS.values())
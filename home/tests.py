@@ -1,3 +1,232 @@
-from django.test import TestCase
+import tempfile
+from unittest import mock
 
-# Create your tests here.
+from django.core.exceptions import MiddlewareNotUsed
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+
+from learners.models import Learner
+from schools.models import School
+from teachers.models import Teacher
+from utils.metrics import MetricsStore, render_prometheus
+from utils.pagination import InvalidCursor, KeysetPaginator, encode_cursor
+from utils.query_budget import QueryBudgetExceeded, QueryBudgetMiddleware, query_budget, sql_shape
+from utils.testing import make_learner, make_school, make_teacher, make_user, make_ward
+
+
+# --------------------------
+# Keyset pagination
+# --------------------------
+
+class KeysetPaginatorTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ward = make_ward()
+        # Repeated names, so pages have to break ties on id.
+        for n in range(7):
+            make_school(ward, f"S{n}")
+        School.objects.filter(code__in=['S1', 'S4', 'S5']).update(name='Bondeni Primary')
+
+    def walk(self, paginator):
+        seen, cursor = [], None
+        while True:
+            page = paginator.page(cursor)
+            self.assertLessEqual(len(page), paginator.per_page)
+            seen += [school.pk for school in page]
+            if not page.has_next:
+                return seen
+            cursor = page.next_cursor
+
+    def test_pages_cover_every_row_in_order(self):
+        ordered = list(School.objects.order_by('name', 'id').values_list('pk', flat=True))
+        self.assertEqual(self.walk(KeysetPaginator(School.objects.all(), ('name', 'id'), per_page=2)), ordered)
+        self.assertEqual(self.walk(KeysetPaginator(School.objects.all(), per_page=7)), sorted(ordered))
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(School.objects.all(), ('name', 'id'), per_page=2)
+        for cursor in ['not a cursor', paginator.encode(School.objects.first())[:-2]]:
+            with self.assertRaises(InvalidCursor):
+                paginator.page(cursor)
+        # A cursor from a different ordering.
+        with self.assertRaises(InvalidCursor):
+            paginator.page(KeysetPaginator(School.objects.all()).encode(School.objects.first()))
+
+    def test_tampered_cursor_values(self):
+        paginator = KeysetPaginator(School.objects.all(), ('name', 'id'), per_page=2)
+        for values in [['Bondeni Primary', 'x'], ['Bondeni Primary', None], ['Bondeni Primary', [1]]]:
+            with self.assertRaises(InvalidCursor):
+                paginator.page(encode_cursor(values))
+        self.assertEqual(len(paginator.page(encode_cursor(['Bondeni Primary', '0']))), 2)
+
+        # Same length, different field types: a role cursor on the joined sort.
+        teacher = make_teacher(School.objects.first(), 'wanjiru')
+        role_cursor = KeysetPaginator(Teacher.objects.all(), ('role', 'pk')).encode(teacher)
+        for ordering in [('date_joined', 'pk'), ('user__date_joined', 'pk')]:
+            with self.assertRaises(InvalidCursor):
+                KeysetPaginator(Teacher.objects.all(), ordering).page(role_cursor)
+
+    def test_dashboard_rejects_invalid_cursor(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        response = self.client.get(reverse('home:cs_dashboard'), {'table': 'schools', 'cursor': 'x'})
+        self.assertEqual(response.status_code, 400)
+
+
+# --------------------------
+# Dashboard API
+# --------------------------
+
+class DashboardApiTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school(make_ward('Nakuru'), 'S1')
+        cls.other_school = make_school(make_ward('Kisumu'), 'S2')
+        cls.teacher = make_teacher(cls.school, 'wanjiru')
+        cls.other_teacher = make_teacher(cls.other_school, 'ochieng')
+        cls.admin = make_teacher(cls.school, 'kamau', role='school_admin', user_role='school_admin')
+        make_learner(cls.school, 'BC1', grade='Grade 1', gender='F')
+        make_learner(cls.school, 'BC2', grade='Grade 1', gender='M')
+        make_learner(cls.school, 'BC3', grade='Grade 9', status=Learner.GRADUATED)
+
+    def get(self, scope, pk=None, **headers):
+        name = f'home:api_{scope}_dashboard'
+        return self.client.get(reverse(name, args=[pk] if pk else []), **headers)
+
+    def test_scope_ownership(self):
+        self.assertEqual(self.get('school', self.school.pk).status_code, 401)
+
+        self.client.force_login(self.teacher.user)
+        self.assertEqual(self.get('teacher', self.teacher.pk).status_code, 200)
+        self.assertEqual(self.get('teacher', self.other_teacher.pk).status_code, 403)
+        self.assertEqual(self.get('school', self.school.pk).status_code, 403)
+
+        self.client.force_login(self.admin.user)
+        self.assertEqual(self.get('school', self.school.pk).status_code, 200)
+        self.assertEqual(self.get('teacher', self.teacher.pk).status_code, 200)
+        self.assertEqual(self.get('school', self.other_school.pk).status_code, 403)
+        self.assertEqual(self.get('teacher', self.other_teacher.pk).status_code, 403)
+        self.assertEqual(self.get('county', self.school.county_id).status_code, 403)
+
+        # No county of their own: fails closed.
+        self.client.force_login(make_user('director', role='county_director'))
+        self.assertEqual(self.get('county', self.school.county_id).status_code, 403)
+
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        self.assertEqual(self.get('county', self.other_school.county_id).status_code, 200)
+
+    def test_totals_count_active_learners(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        self.assertEqual(self.get('national').json()['data']['total_learners'], 2)
+
+        data = self.get('school', self.school.pk).json()['data']
+        self.assertEqual(data['total_learners'], 2)
+        self.assertEqual([row['grade'] for row in data['learners_by_grade']], ['Grade 1'])
+        self.assertEqual(self.get('teacher', self.teacher.pk).json()['data']['total_learners'], 2)
+
+    def test_etag(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        etag = self.get('school', self.school.pk)['ETag']
+        self.assertEqual(self.get('school', self.school.pk, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        make_learner(self.school, 'BC4')
+        response = self.get('school', self.school.pk, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['data']['total_learners'], 3)
+
+
+# --------------------------
+# Query budget
+# --------------------------
+
+def school_names(request):
+    # One query per school: an N+1.
+    pks = School.objects.values_list('pk', flat=True)
+    return HttpResponse(", ".join(School.objects.get(pk=pk).name for pk in pks))
+
+
+@override_settings(QUERY_BUDGET={'ENABLED': True, 'MAX_QUERIES': 10, 'MAX_DUPLICATES': 2})
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        ward = make_ward()
+        for n in range(3):
+            make_school(ward, f"S{n}")
+
+    def run_view(self, view):
+        middleware = QueryBudgetMiddleware(view)
+        request = RequestFactory().get('/schools/')
+        middleware.process_view(request, view, (), {})
+        return middleware(request)
+
+    def test_reports_repeated_queries_with_their_origin(self):
+        with self.assertLogs('utils.query_budget', 'WARNING') as logs:
+            self.run_view(school_names)
+        self.assertIn("Query budget exceeded in /schools/ (GET /schools/)", logs.output[0])
+        self.assertIn("3x from home/tests.py:", logs.output[0])
+
+        with override_settings(QUERY_BUDGET={'ENABLED': True, 'MAX_DUPLICATES': 2, 'RAISE': True}):
+            with self.assertRaises(QueryBudgetExceeded):
+                self.run_view(school_names)
+
+    def test_views_can_raise_their_budget(self):
+        with self.assertNoLogs('utils.query_budget', 'WARNING'):
+            self.run_view(query_budget(max_duplicates=3)(school_names))
+
+    def test_disabled(self):
+        with override_settings(QUERY_BUDGET={'ENABLED': False}):
+            with self.assertRaises(MiddlewareNotUsed):
+                QueryBudgetMiddleware(school_names)
+
+    def test_sql_shape(self):
+        self.assertEqual(
+            sql_shape('SELECT 1 FROM t WHERE id IN (%s, %s, %s)'), sql_shape('SELECT 1 FROM t WHERE id IN (%s,%s)'),
+        )
+        self.assertEqual(
+            sql_shape('INSERT INTO t VALUES (%s, %s), (%s, %s)'), sql_shape('INSERT INTO t VALUES (%s,%s), (%s,%s), (%s,%s)'),
+        )
+
+
+# --------------------------
+# Request metrics
+# --------------------------
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+
+    def make_store(self, buckets=(0.1, 1)):
+        return MetricsStore(self.directory, buckets, flush_interval=3600)
+
+    def test_workers_are_merged(self):
+        first, second = self.make_store(), self.make_store()
+        first.record('home:home', 0.05, 3, 0.01, 0.02)
+        first.record('home:home', 0.5, 1, 0.01, 0.0)
+        second.record('home:home', 2.0, 2, 0.1, 0.0)
+        self.make_store(buckets=(1,)).record('home:home', 0.05, 1, 0.0, 0.0)  # other BUCKETS: skipped
+        second.flush()
+
+        merged = first.collect()
+
+        self.assertEqual(merged['home:home']['requests'], 3)
+        self.assertEqual(merged['home:home']['buckets'], [1, 1])
+        self.assertEqual(merged['home:home']['db_queries'], 6)
+        output = render_prometheus(merged, first.buckets)
+        self.assertIn('cbc_http_request_duration_seconds_bucket{view="home:home",le="1"} 2', output)
+        self.assertIn('cbc_http_request_duration_seconds_bucket{view="home:home",le="+Inf"} 3', output)
+        self.assertIn('cbc_db_queries_total{view="home:home"} 6', output)
+
+    def test_requests_are_recorded_and_served(self):
+        with mock.patch('utils.metrics._store', self.make_store()):
+            self.client.get(reverse('metrics'))
+            # The first scrape was recorded after it was served.
+            response = self.client.get(reverse('metrics'))
+            self.assertIn('cbc_http_requests_total{view="metrics"} 1', response.content.decode())
+
+            response = self.client.get(reverse('metrics'), REMOTE_ADDR='10.0.0.1')
+            self.assertEqual(response.status_code, 403)
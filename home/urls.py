@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import views, api, async_views
 
 app_name = 'home'
 
@@ -10,4 +10,18 @@ urlpatterns = [
     path('subcounty/', views.subcounty_dashboard, name='subcounty_dashboard'),
     path('school-admin/', views.school_admin_dashboard, name='school_admin_dashboard'),
     path('teacher/', views.teacher_dashboard, name='teacher_dashboard'),
+
+    # Async dashboards (serve through cbc_nemis.asgi)
+    path('async/cs/', async_views.cs_dashboard, name='async_cs_dashboard'),
+    path('async/county/', async_views.county_dashboard, name='async_county_dashboard'),
+    path('async/subcounty/', async_views.subcounty_dashboard, name='async_subcounty_dashboard'),
+    path('async/school-admin/', async_views.school_admin_dashboard, name='async_school_admin_dashboard'),
+    path('async/teacher/', async_views.teacher_dashboard, name='async_teacher_dashboard'),
+
+    # Read-only JSON dashboards (ETag / Last-Modified aware)
+    path('api/dashboard/national/', api.dashboard_api, {'scope': 'national'}, name='api_national_dashboard'),
+    path('api/dashboard/county/<int:pk>/', api.dashboard_api, {'scope': 'county'}, name='api_county_dashboard'),
+    path('api/dashboard/subcounty/<int:pk>/', api.dashboard_api, {'scope': 'subcounty'}, name='api_subcounty_dashboard'),
+    path('api/dashboard/school/<int:pk>/', api.dashboard_api, {'scope': 'school'}, name='api_school_dashboard'),
+    path('api/dashboard/teacher/<int:pk>/', api.dashboard_api, {'scope': 'teacher'}, name='api_teacher_dashboard'),
 ]
@@ -1,3 +1,6 @@
+from functools import lru_cache
+
+from django.http import HttpResponseBadRequest
 from django.shortcuts import render, redirect
 from django.urls import reverse, reverse_lazy
 from django.contrib.auth.decorators import login_required, user_passes_test
@@ -5,6 +8,9 @@ from django.contrib.auth.decorators import login_required, user_passes_test
 from teachers.models import Teacher, ClassAssignment, SubjectAssignment
 from learners.models import Learner
 from schools.models import School
+from reports.rollups import get_summary
+from .stats import get_headline_stats
+from utils.pagination import KeysetPaginator, InvalidCursor
 
 # Import role-checking helpers (you’ll create these in users/utils.py)
 from users.utils import (
@@ -19,6 +25,45 @@ from users.utils import (
 # Home / Main Dashboard View
 # --------------------------
 
+# (title, color, icon, description, dashboard url name, role allowed to open it)
+ROLE_CARDS = [
+    ("Cabinet Secretary", "blue", "fa-university",
+     "Access national reports, analytics, and manage all education levels.",
+     'home:cs_dashboard', 'cabinet_secretary'),
+    ("County Director", "green", "fa-map-marked-alt",
+     "Manage and review county-level school performance and teacher distribution.",
+     'home:county_dashboard', 'county_director'),
+    ("Subcounty Director", "yellow", "fa-city",
+     "Oversee schools within sub-counties and coordinate reports from school heads.",
+     'home:subcounty_dashboard', 'subcounty_director'),
+    ("School Admin", "indigo", "fa-school",
+     "Manage teachers, learners, and school operations efficiently.",
+     'home:school_admin_dashboard', 'school_admin'),
+    ("Teacher", "purple", "fa-chalkboard-teacher",
+     "View class lists, enter assessments, and collaborate with other teachers.",
+     'home:teacher_dashboard', 'teacher'),
+    ("Learner", "pink", "fa-user-graduate",
+     "Track progress, performance, and upcoming assessments.",
+     None, None),  # Learner dashboard not ready yet
+]
+
+
+@lru_cache(maxsize=None)
+def _role_cards_for(role):
+    """
+    Build the role cards once per role; only the user's own card links to a dashboard.
+    """
+    return {
+        title: {
+            "color": color,
+            "icon": icon,
+            "description": description,
+            "url": reverse(url_name) if url_name and role == card_role else "#",
+        }
+        for title, color, icon, description, url_name, card_role in ROLE_CARDS
+    }
+
+
 def home(request):
     """
     Home page showing quick stats and role cards.
@@ -27,54 +72,15 @@ def home(request):
     user = request.user
     context = {}
 
-    # Default statistics (visible to all roles)
-    context['total_schools'] = School.objects.count()
-    context['total_teachers'] = Teacher.objects.count()
-    context['total_learners'] = Learner.objects.count()
+    # Default statistics (visible to all roles), served from the stats cache
+    context.update(get_headline_stats())
 
     # Get user role
-    role = getattr(user, 'role', None)
+    role = getattr(user, 'role', None) if user.is_authenticated else None
     context['role'] = role
 
     # Role cards (each role gets specific dashboard access)
-    role_cards = {
-        "Cabinet Secretary": {
-            "color": "blue",
-            "icon": "fa-university",
-            "description": "Access national reports, analytics, and manage all education levels.",
-            "url": reverse_lazy('home:cs_dashboard') if is_cabinet_secretary(user) else "#"
-        },
-        "County Director": {
-            "color": "green",
-            "icon": "fa-map-marked-alt",
-            "description": "Manage and review county-level school performance and teacher distribution.",
-            "url": reverse_lazy('home:county_dashboard') if is_county_director(user) else "#"
-        },
-        "Subcounty Director": {
-            "color": "yellow",
-            "icon": "fa-city",
-            "description": "Oversee schools within sub-counties and coordinate reports from school heads.",
-            "url": reverse_lazy('home:subcounty_dashboard') if is_subcounty_director(user) else "#"
-        },
-        "School Admin": {
-            "color": "indigo",
-            "icon": "fa-school",
-            "description": "Manage teachers, learners, and school operations efficiently.",
-            "url": reverse_lazy('home:school_admin_dashboard') if is_school_admin(user) else "#"
-        },
-        "Teacher": {
-            "color": "purple",
-            "icon": "fa-chalkboard-teacher",
-            "description": "View class lists, enter assessments, and collaborate with other teachers.",
-            "url": reverse_lazy('home:teacher_dashboard') if is_teacher(user) else "#"
-        },
-        "Learner": {
-            "color": "pink",
-            "icon": "fa-user-graduate",
-            "description": "Track progress, performance, and upcoming assessments.",
-            "url": "#"  # Learner dashboard not ready yet
-        },
-    }
+    role_cards = _role_cards_for(role)
 
     context['role_cards'] = role_cards
     context['roles'] = list(role_cards.keys())
@@ -85,6 +91,50 @@ def home(request):
     return render(request, 'home/home.html', context)
 
 
+# --------------------------
+# Dashboard Tables
+# --------------------------
+
+DASHBOARD_PAGE_SIZE = 25
+
+# table name -> (row template, keyset ordering, relations shown per row)
+# Teachers and learners are filtered with school__in=<schools subquery> and
+# ordered by school first, so the (school, id) indexes return each page
+# without sorting the whole county.
+DASHBOARD_TABLES = {
+    'schools': ('home/partials/school_rows.html', ('name', 'id'), ('sub_county',)),
+    'teachers': ('home/partials/teacher_rows.html', ('school_id', 'id'), ('user', 'school')),
+    'learners': ('home/partials/learner_rows.html', ('school_id', 'pk'), ('school',)),
+}
+
+
+def _table_page(name, queryset, cursor=None):
+    _, ordering, related = DASHBOARD_TABLES[name]
+    paginator = KeysetPaginator(queryset.select_related(*related), ordering, per_page=DASHBOARD_PAGE_SIZE)
+    return paginator.page(cursor)
+
+
+def _render_dashboard(request, template_name, context, tables):
+    """
+    Render a dashboard whose tables are keyset paginated.
+
+    The full page only renders the first page of each table. Further pages
+    are requested with ?table=<name>&cursor=<cursor> and come back as bare
+    table rows, so page cost is bounded by DASHBOARD_PAGE_SIZE.
+    """
+    table = request.GET.get('table')
+    if table in tables:
+        try:
+            page = _table_page(table, tables[table], request.GET.get('cursor'))
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+        return render(request, DASHBOARD_TABLES[table][0], {'page': page})
+
+    for name, queryset in tables.items():
+        context[f'{name}_page'] = _table_page(name, queryset)
+    return render(request, template_name, context)
+
+
 # --------------------------
 # Individual Dashboard Views
 # --------------------------
@@ -94,15 +144,18 @@ def home(request):
 def cs_dashboard(request):
     context = {
         'dashboard_title': "Cabinet Secretary Dashboard",
-        'schools': School.objects.all(),
-        'teachers': Teacher.objects.all(),
-        'learners': Learner.objects.all(),
+        'summary': get_summary('national'),
         'breadcrumb': [
             {"name": "Home", "url": reverse('home:home')},
             {"name": "Cabinet Secretary Dashboard", "url": reverse('home:cs_dashboard')}
         ]
     }
-    return render(request, 'home/cs_dashboard.html', context)
+    tables = {
+        'schools': School.objects.all(),
+        'teachers': Teacher.objects.all(),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE),
+    }
+    return _render_dashboard(request, 'home/cs_dashboard.html', context, tables)
 
 
 @login_required
@@ -112,15 +165,19 @@ def county_dashboard(request):
     county = getattr(user, 'county', None)
     context = {
         'dashboard_title': "County Director Dashboard",
-        'schools': School.objects.filter(county=county) if county else School.objects.none(),
-        'teachers': Teacher.objects.filter(school__county=county) if county else Teacher.objects.none(),
-        'learners': Learner.objects.filter(school__county=county) if county else Learner.objects.none(),
+        'summary': get_summary('county', getattr(county, 'pk', None)),
         'breadcrumb': [
             {"name": "Home", "url": reverse('home:home')},
             {"name": "County Director Dashboard", "url": reverse('home:county_dashboard')}
         ]
     }
-    return render(request, 'home/county_dashboard.html', context)
+    schools = School.objects.filter(county=county) if county else School.objects.none()
+    tables = {
+        'schools': schools,
+        'teachers': Teacher.objects.filter(school__in=schools),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE, school__in=schools),
+    }
+    return _render_dashboard(request, 'home/county_dashboard.html', context, tables)
 
 
 @login_required
@@ -130,15 +187,19 @@ def subcounty_dashboard(request):
     subcounty = getattr(user, 'subcounty', None)
     context = {
         'dashboard_title': "Subcounty Director Dashboard",
-        'schools': School.objects.filter(subcounty=subcounty) if subcounty else School.objects.none(),
-        'teachers': Teacher.objects.filter(school__subcounty=subcounty) if subcounty else Teacher.objects.none(),
-        'learners': Learner.objects.filter(school__subcounty=subcounty) if subcounty else Learner.objects.none(),
+        'summary': get_summary('subcounty', getattr(subcounty, 'pk', None)),
         'breadcrumb': [
             {"name": "Home", "url": reverse('home:home')},
             {"name": "Subcounty Director Dashboard", "url": reverse('home:subcounty_dashboard')}
         ]
     }
-    return render(request, 'home/subcounty_dashboard.html', context)
+    schools = School.objects.filter(sub_county=subcounty) if subcounty else School.objects.none()
+    tables = {
+        'schools': schools,
+        'teachers': Teacher.objects.filter(school__in=schools),
+        'learners': Learner.objects.filter(status=Learner.ACTIVE, school__in=schools),
+    }
+    return _render_dashboard(request, 'home/subcounty_dashboard.html', context, tables)
 
 
 @login_required
@@ -146,8 +207,8 @@ def subcounty_dashboard(request):
 def school_admin_dashboard(request):
     user = request.user
     school = getattr(user, 'school', None)
-    teachers = Teacher.objects.filter(school=school) if school else Teacher.objects.none()
-    learners = Learner.objects.filter(school=school) if school else Learner.objects.none()
+    teachers = Teacher.objects.filter(school=school).select_related('user') if school else Teacher.objects.none()
+    learners = Learner.objects.filter(status=Learner.ACTIVE, school=school) if school else Learner.objects.none()
 
     context = {
         'dashboard_title': "School Admin Dashboard",
@@ -171,9 +232,9 @@ def teacher_dashboard(request):
     teacher_profile = getattr(user, 'teacher_profile', None)
 
     if teacher_profile:
-        classes = ClassAssignment.objects.filter(teacher=teacher_profile)
-        subjects = SubjectAssignment.objects.filter(teacher=teacher_profile)
-        learners = Learner.objects.filter(school=teacher_profile.school)
+        classes = ClassAssignment.objects.filter(teacher=teacher_profile).select_related('stream')
+        subjects = SubjectAssignment.objects.filter(teacher=teacher_profile).select_related('subject')
+        learners = Learner.objects.filter(status=Learner.ACTIVE, school=teacher_profile.school)
         context = {
             'dashboard_title': "Teacher Dashboard",
             'school': teacher_profile.school,
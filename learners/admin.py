@@ -1,3 +1,46 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import DuplicateCandidate
+
+
+# --------------------------
+# Duplicate Review Queue
+# --------------------------
+@admin.register(DuplicateCandidate)
+class DuplicateCandidateAdmin(admin.ModelAdmin):
+    list_display = ('learner', 'learner_school', 'duplicate', 'duplicate_school', 'score', 'reasons', 'status')
+    list_filter = ('status',)
+    list_select_related = ('learner__school', 'duplicate__school')
+    search_fields = (
+        'learner__birth_certificate_number', 'learner__last_name',
+        'duplicate__birth_certificate_number', 'duplicate__last_name',
+    )
+    raw_id_fields = ('learner', 'duplicate')
+    readonly_fields = ('score', 'reasons', 'found_at', 'reviewed_by', 'reviewed_at')
+    actions = ['mark_confirmed', 'mark_rejected']
+
+    def learner_school(self, obj):
+        return obj.learner.school.name
+    learner_school.short_description = "School"
+
+    def duplicate_school(self, obj):
+        return obj.duplicate.school.name
+    duplicate_school.short_description = "Duplicate's School"
+
+    def _review(self, request, queryset, status):
+        updated = queryset.update(status=status, reviewed_by=request.user, reviewed_at=timezone.now())
+        self.message_user(request, f"{updated} candidates marked {dict(DuplicateCandidate.STATUS_CHOICES)[status].lower()}.")
+
+    @admin.action(description="Mark selected as confirmed duplicates")
+    def mark_confirmed(self, request, queryset):
+        self._review(request, queryset, DuplicateCandidate.CONFIRMED)
+
+    @admin.action(description="Mark selected as not duplicates")
+    def mark_rejected(self, request, queryset):
+        self._review(request, queryset, DuplicateCandidate.REJECTED)
+
+    def save_model(self, request, obj, form, change):
+        if 'status' in form.changed_data:
+            obj.reviewed_by, obj.reviewed_at = request.user, timezone.now()
+        super().save_model(request, obj, form, change)
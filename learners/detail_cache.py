@@ -0,0 +1,90 @@
+"""
+Cached learner detail pages.
+
+get_learner_detail() loads a learner with everything the detail page shows
+(school, location, class teacher and their user, subjects) in two queries
+and keeps the result in the cache under a versioned key:
+
+    learners:detail:<pk>:<generation>:<learner version>
+
+Invalidating deletes the version; the next read starts a new one from the
+current time, so an entry cached under an old version is never read again
+and simply expires. Saving or deleting a learner, or changing its subjects,
+invalidates that learner once the transaction commits (learners/signals.py);
+bulk writes to many learners or to the related tables drop the generation.
+Entries expire after settings.LEARNER_CACHE_TIMEOUT seconds, which bounds
+staleness from writes that skip both.
+
+Usage:
+    learner = get_learner_detail(pk)   # None if there is no such learner
+    invalidate_learners([pk, ...])     # after bulk writes to some learners
+    invalidate_all_learners()          # after bulk writes to many
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Learner
+
+
+GENERATION_KEY = 'learners:detail:generation'
+VERSION_KEY = 'learners:detail:version:{}'
+DETAIL_KEY = 'learners:detail:{}:{}:{}'
+
+
+def _timeout():
+    return getattr(settings, 'LEARNER_CACHE_TIMEOUT', 900)
+
+
+def _new_version():
+    return time.time_ns()
+
+
+def _detail_key(pk):
+    """
+    The current cache key for a learner, creating missing version entries.
+    """
+    version_key = VERSION_KEY.format(pk)
+    versions = cache.get_many([GENERATION_KEY, version_key])
+    missing = {key: _new_version() for key in (GENERATION_KEY, version_key) if key not in versions}
+    if missing:
+        # add() keeps a version another process started in the meantime. A
+        # learner's version can expire with its entry; the generation can't.
+        for key, version in missing.items():
+            if not cache.add(key, version, timeout=None if key == GENERATION_KEY else _timeout()):
+                missing[key] = cache.get(key, version)
+        versions.update(missing)
+    return DETAIL_KEY.format(pk, versions[GENERATION_KEY], versions[version_key])
+
+
+def load_learner_detail(pk):
+    """
+    The learner with everything the detail page shows, or None.
+    """
+    return (
+        Learner.objects.select_related(
+            'school', 'county', 'sub_county', 'ward', 'class_teacher__user',
+        )
+        .prefetch_related('subjects')
+        .filter(pk=pk)
+        .first()
+    )
+
+
+def get_learner_detail(pk):
+    key = _detail_key(pk)
+    learner = cache.get(key)
+    if learner is None:
+        learner = load_learner_detail(pk)
+        if learner is not None:
+            cache.set(key, learner, timeout=_timeout())
+    return learner
+
+
+def invalidate_learners(pks):
+    cache.delete_many([VERSION_KEY.format(pk) for pk in pks])
+
+
+def invalidate_all_learners():
+    cache.delete(GENERATION_KEY)
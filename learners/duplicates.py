@@ -0,0 +1,321 @@
+"""
+Duplicate learner detection.
+
+Learners transferring between schools get registered again, often with
+the birth certificate number typed differently ("BC 001234/5" for
+"bc0012345"). find_duplicates() looks for such pairs without comparing
+every learner with every other:
+
+1. Identifier blocks: learners whose birth certificate numbers are equal
+   once spaces, dashes, slashes, dots and leading zeros are dropped and
+   letters upper-cased. Found with one GROUP BY over the whole table, so
+   they cross county borders.
+2. Name blocks, one county at a time: learners of the same county sharing
+   a date of birth and a normalised surname, or a date of birth and a
+   normalised first name (for surname typos and changes). Counties are
+   scanned in parallel worker processes.
+
+Only learners sharing a block are compared. Each pair is scored from the
+identifier, names, date of birth and parent contact (see score_pair);
+pairs scoring at least MIN_SCORE go to the DuplicateCandidate review
+queue. A new run replaces the pending candidates it covers and keeps the
+reviewed ones.
+
+Usage:
+    report = find_duplicates(workers=4)
+    report.candidates, report.comparisons
+"""
+import os
+import re
+import time
+import unicodedata
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from difflib import SequenceMatcher
+from itertools import combinations
+
+import django
+from django.db import connection, connections, transaction
+from django.db.models import Q
+
+from .models import DuplicateCandidate, Learner
+
+
+MIN_SCORE = 0.5
+# Larger blocks are common names, not duplicates; comparing them is quadratic.
+MAX_BLOCK = 200
+BATCH_SIZE = 2000
+
+WEIGHTS = {
+    'identifier': 0.45,
+    'name': 0.35,
+    'date of birth': 0.1,
+    'parent contact': 0.1,
+}
+
+FIELDS = ('pk', 'school_id', 'county_id', 'birth_certificate_number',
+          'first_name', 'middle_name', 'last_name', 'date_of_birth', 'parent_contact')
+
+# Characters dropped from birth certificate numbers, here and in SQL.
+IDENTIFIER_NOISE = (' ', '-', '/', '.')
+_IDENTIFIER_TABLE = str.maketrans('', '', ''.join(IDENTIFIER_NOISE))
+_NON_LETTERS = re.compile(r"[^a-z]+")
+_NON_DIGITS = re.compile(r"\D+")
+
+
+# --------------------------
+# Normalising
+# --------------------------
+
+def normalize_identifier(value):
+    return (value or '').translate(_IDENTIFIER_TABLE).upper().lstrip('0')
+
+
+def normalize_name(value):
+    """
+    Lower-case letters only, accents removed: "N'gang'a" -> "nganga".
+    """
+    value = unicodedata.normalize('NFKD', value or '').encode('ascii', 'ignore').decode()
+    return _NON_LETTERS.sub('', value.lower())
+
+
+def normalize_contact(value):
+    # Last nine digits: 0712..., +254712... and 254712... are the same number.
+    return _NON_DIGITS.sub('', value or '')[-9:]
+
+
+def _identifier_sql(column):
+    expression = column
+    for noise in IDENTIFIER_NOISE:
+        expression = f"REPLACE({expression}, '{noise}', '')"
+    return f"LTRIM(UPPER({expression}), '0')"
+
+
+class Record:
+    """
+    One learner with its fields normalised for comparison.
+    """
+    __slots__ = ('pk', 'school_id', 'county_id', 'identifier', 'first', 'last', 'names', 'born', 'contact')
+
+    def __init__(self, pk, school_id, county_id, identifier, first, middle, last, born, contact):
+        self.pk = pk
+        self.school_id = school_id
+        self.county_id = county_id
+        self.identifier = normalize_identifier(identifier)
+        self.first = normalize_name(first)
+        self.last = normalize_name(last)
+        # Sorted so swapped first and last names still match.
+        self.names = " ".join(sorted(filter(None, (self.first, normalize_name(middle), self.last))))
+        self.born = born
+        self.contact = normalize_contact(contact)
+
+
+# --------------------------
+# Scoring
+# --------------------------
+
+def score_pair(a, b):
+    """
+    Return (score 0-1, matched field names) for two Records.
+    """
+    matched, score = [], 0.0
+    # No credit for nearly equal identifiers: certificates issued the same
+    # day (siblings, sequential registrations) differ by a digit or two.
+    if a.identifier and a.identifier == b.identifier:
+        matched.append('identifier')
+        score += WEIGHTS['identifier']
+
+    similarity = SequenceMatcher(None, a.names, b.names).ratio()
+    if similarity >= 0.9:
+        matched.append('name')
+    score += WEIGHTS['name'] * similarity
+    if a.born and a.born == b.born:
+        matched.append('date of birth')
+        score += WEIGHTS['date of birth']
+    if a.contact and a.contact == b.contact:
+        matched.append('parent contact')
+        score += WEIGHTS['parent contact']
+    return round(score, 3), matched
+
+
+def compare_block(records, min_score, seen):
+    """
+    Score every pair in one block; returns [(low pk, high pk, score, reasons)].
+    `seen` holds pairs already scored in another block.
+    """
+    found = []
+    for a, b in combinations(records, 2):
+        pair = (a.pk, b.pk) if a.pk < b.pk else (b.pk, a.pk)
+        if pair in seen:
+            continue
+        seen.add(pair)
+        score, matched = score_pair(a, b)
+        if score >= min_score:
+            found.append(pair + (score, ", ".join(matched)))
+    return found
+
+
+class DuplicateReport:
+    def __init__(self):
+        self.learners = 0
+        self.blocks = 0
+        self.oversized_blocks = 0  # skipped, larger than MAX_BLOCK
+        self.comparisons = 0
+        self.candidates = 0
+        self.counties = 0
+        self.seconds = 0.0
+
+    def add(self, stats):
+        for name, value in stats.items():
+            setattr(self, name, getattr(self, name) + value)
+
+
+def _compare_blocks(blocks, min_score, seen):
+    stats = {'blocks': 0, 'oversized_blocks': 0, 'comparisons': 0}
+    found = []
+    for records in blocks:
+        if len(records) < 2:
+            continue
+        if len(records) > MAX_BLOCK:
+            stats['oversized_blocks'] += 1
+            continue
+        stats['blocks'] += 1
+        stats['comparisons'] += len(records) * (len(records) - 1) // 2
+        found += compare_block(records, min_score, seen)
+    return found, stats
+
+
+# --------------------------
+# Blocks
+# --------------------------
+
+def identifier_blocks(county_ids=None):
+    """
+    Lists of Records whose normalised identifiers are equal. With
+    `county_ids`, only identifiers held by a learner of those counties.
+    """
+    meta = Learner._meta
+    qn = connection.ops.quote_name
+    table, pk = qn(meta.db_table), qn(meta.pk.column)
+    key = _identifier_sql(qn(meta.get_field('birth_certificate_number').column))
+    having, params = "", []
+    if county_ids is not None:
+        county = qn(meta.get_field('county').column)
+        having = f"AND SUM(CASE WHEN {county} IN ({', '.join(['%s'] * len(county_ids))}) THEN 1 ELSE 0 END) > 0"
+        params = list(county_ids)
+    with connection.cursor() as cursor:
+        # One pass over the table: the subquery is materialised once.
+        cursor.execute(
+            f"SELECT {pk} FROM {table} WHERE {key} IN ("
+            f"SELECT {key} FROM {table} WHERE {key} <> '' GROUP BY {key} HAVING COUNT(*) > 1 {having})",
+            params,
+        )
+        pks = [row[0] for row in cursor.fetchall()]
+
+    blocks = defaultdict(list)
+    for start in range(0, len(pks), BATCH_SIZE):
+        for row in Learner.objects.filter(pk__in=pks[start:start + BATCH_SIZE]).values_list(*FIELDS):
+            record = Record(*row)
+            blocks[record.identifier].append(record)
+    return blocks.values()
+
+
+def name_blocks(records):
+    """
+    Group one county's Records by (date of birth, surname) and
+    (date of birth, first name).
+    """
+    blocks = defaultdict(list)
+    for record in records:
+        if record.born is None:
+            continue
+        if record.last:
+            blocks[('last', record.born, record.last)].append(record)
+        if record.first:
+            blocks[('first', record.born, record.first)].append(record)
+    return blocks.values()
+
+
+def scan_county(county_id, min_score=MIN_SCORE):
+    """
+    Compare the learners of one county within their name blocks.
+    Runs in a worker process; returns (pairs, stats).
+    """
+    records = [
+        Record(*row) for row in
+        Learner.objects.filter(county_id=county_id).order_by().values_list(*FIELDS).iterator(chunk_size=BATCH_SIZE)
+    ]
+    found, stats = _compare_blocks(name_blocks(records), min_score, set())
+    stats['learners'] = len(records)
+    stats['counties'] = 1
+    return found, stats
+
+
+# --------------------------
+# Review queue
+# --------------------------
+
+def _save(found, county_ids):
+    """
+    Replace the pending candidates of the scanned counties (all if
+    county_ids is None) with `found`.
+    Reviewed pairs keep their status.
+    """
+    pending = DuplicateCandidate.objects.filter(status=DuplicateCandidate.PENDING)
+    if county_ids is not None:
+        pending = pending.filter(Q(learner__county_id__in=county_ids) | Q(duplicate__county_id__in=county_ids))
+    with transaction.atomic():
+        pending.delete()
+        for start in range(0, len(found), BATCH_SIZE):
+            DuplicateCandidate.objects.bulk_create(
+                [
+                    DuplicateCandidate(learner_id=low, duplicate_id=high, score=score, reasons=reasons)
+                    for low, high, score, reasons in found[start:start + BATCH_SIZE]
+                ],
+                ignore_conflicts=True,
+            )
+
+
+def find_duplicates(counties=None, workers=None, min_score=MIN_SCORE, dry_run=False):
+    """
+    Scan for duplicate learners and fill the review queue.
+
+    `counties` limits the scan to learners of those counties (objects or
+    ids); their identifier matches may be in any county.
+    With dry_run=True nothing is written.
+    """
+    start = time.perf_counter()
+    report = DuplicateReport()
+    county_ids = list(
+        Learner.objects.order_by().values_list('county_id', flat=True).distinct()
+        if counties is None else [getattr(county, 'pk', county) for county in counties]
+    )
+
+    # Identifier blocks in this process: one GROUP BY, few blocks.
+    seen = set()
+    found, stats = _compare_blocks(identifier_blocks(None if counties is None else county_ids), min_score, seen)
+    report.add(stats)
+
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(county_ids) > 1:
+        # Workers open their own connections; a forked copy of this one
+        # must not be shared. django.setup is a no-op after a fork and sets
+        # up spawned workers.
+        connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=django.setup) as pool:
+            results = list(pool.map(scan_county, county_ids, [min_score] * len(county_ids)))
+    else:
+        results = [scan_county(county_id, min_score) for county_id in county_ids]
+
+    for pairs, stats in results:
+        report.add(stats)
+        for pair in pairs:
+            if pair[:2] not in seen:
+                seen.add(pair[:2])
+                found.append(pair)
+
+    report.candidates = len(found)
+    if not dry_run:
+        _save(found, None if counties is None else county_ids)
+    report.seconds = time.perf_counter() - start
+    return report
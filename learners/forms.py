@@ -64,3 +64,78 @@ class LearnerForm(forms.ModelForm):
             if image.size > 5 * 1024 * 1024:  # 5MB limit
                 raise forms.ValidationError("Image file too large ( > 5MB ).")
         return image
+
+
+class LearnerImportForm(forms.ModelForm):
+    """
+    Validates one row of a bulk import (see learners/importers.py).
+
+    School, location and subjects are resolved by the importer from
+    preloaded lookup maps, and uniqueness is checked once per batch, so
+    validating a row never touches the database.
+    """
+
+    date_of_birth = forms.DateField(required=False, input_formats=['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'])
+    admission_date = forms.DateField(required=False, input_formats=['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'])
+
+    class Meta:
+        model = Learner
+        fields = [
+            'birth_certificate_number',
+            'admission_number',
+            'first_name',
+            'middle_name',
+            'last_name',
+            'date_of_birth',
+            'gender',
+            'grade',
+            'year',
+            'admission_date',
+            'parent_full_name',
+            'parent_contact',
+            'relationship_to_learner',
+            'postal_address',
+        ]
+
+    GENDER_LABELS = {label.lower(): code for code, label in Learner.GENDER_CHOICES}
+
+    def __init__(self, data=None, *args, **kwargs):
+        if data and data.get('gender'):
+            # Accept "Male"/"Female"/"Other" as well as the stored codes.
+            gender = str(data['gender']).strip()
+            data = {**data, 'gender': self.GENDER_LABELS.get(gender.lower(), gender.upper())}
+        super().__init__(data, *args, **kwargs)
+        # Blank year / admission date fall back to the model defaults.
+        self.fields['year'].required = False
+
+    def clean_year(self):
+        return self.cleaned_data.get('year') or Learner._meta.get_field('year').get_default()
+
+    def clean_admission_date(self):
+        return self.cleaned_data.get('admission_date') or Learner._meta.get_field('admission_date').get_default()
+
+    def validate_unique(self):
+        # Checked for the whole batch by the importer instead of per row.
+        pass
+
+
+class LearnerUploadForm(forms.Form):
+    file = forms.FileField(
+        label="Learner file (.csv or .xlsx)",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv,.xlsx'})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Check only (do not save)",
+    )
+
+
+class LearnerSearchForm(forms.Form):
+    query = forms.CharField(
+        required=False,
+        label='Search Learner',
+        widget=forms.TextInput(attrs={
+            'placeholder': 'Search by name, birth certificate, admission no. or parent phone...',
+            'class': 'border rounded px-3 py-2 w-full'
+        })
+    )
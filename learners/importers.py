@@ -0,0 +1,294 @@
+"""
+Bulk learner import from CSV or XLSX uploads.
+
+Rows are streamed from the file and handled in batches: each batch is
+validated with LearnerImportForm (no database access), its schools and
+locations are resolved from lookup maps, and its birth certificate and
+admission numbers are checked for duplicates with one query each. Valid
+rows are inserted with bulk_create and enrolled in their compulsory
+subjects. Rows with errors are skipped and reported.
+
+Usage:
+    report = import_learners(request.FILES['file'], school=teacher.school)
+    report.created, report.errors
+"""
+import csv
+import io
+import os
+from collections import Counter
+from datetime import datetime
+
+from django.db import transaction
+
+from home.stats import adjust_headline_stat
+from location.models import County, SubCounty, Ward
+from reports.rollups import apply_deltas
+from reports import versions
+from schools.models import School
+from subjects.enrollment import enroll_compulsory
+
+from .forms import LearnerImportForm
+from .models import Learner
+
+
+BATCH_SIZE = 1000
+
+# Columns read from the file, besides the LearnerImportForm fields.
+LOCATION_COLUMNS = ['school_code', 'county', 'sub_county', 'ward']
+COLUMNS = LearnerImportForm.Meta.fields + LOCATION_COLUMNS
+REQUIRED_COLUMNS = ['birth_certificate_number', 'admission_number', 'first_name', 'last_name']
+
+
+class LearnerImportError(ValueError):
+    """
+    The file as a whole cannot be imported (unknown format, bad header).
+    """
+
+
+class ImportReport:
+    def __init__(self):
+        self.rows = 0
+        self.created = 0
+        self.errors = []  # (row number, column, message)
+
+    def add_error(self, row_number, column, message):
+        self.errors.append((row_number, column, message))
+
+    @property
+    def failed_rows(self):
+        return len({row for row, _, _ in self.errors})
+
+
+# --------------------------
+# Reading
+# --------------------------
+
+def _normalise_header(header):
+    return [str(name or '').strip().lower().replace(' ', '_') for name in header]
+
+
+def _read_csv(uploaded):
+    text = io.TextIOWrapper(uploaded, encoding='utf-8-sig', newline='')
+    try:
+        reader = csv.reader(text)
+        header = next(reader, None)
+        if header is None:
+            return
+        yield _normalise_header(header)
+        yield from reader
+    finally:
+        text.detach()
+
+
+def _read_xlsx(uploaded):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise LearnerImportError("Importing .xlsx files requires openpyxl (pip install openpyxl).")
+
+    workbook = load_workbook(uploaded, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        yield _normalise_header(header)
+        for values in rows:
+            yield ['' if value is None else value for value in values]
+    finally:
+        workbook.close()
+
+
+def read_rows(uploaded, columns=COLUMNS, required=REQUIRED_COLUMNS):
+    """
+    Yield (row number, {column: value}) for every non-empty data row,
+    keeping only `columns`. Other importers pass their own columns.
+    """
+    extension = os.path.splitext(uploaded.name)[1].lower()
+    if extension == '.csv':
+        lines = _read_csv(uploaded)
+    elif extension == '.xlsx':
+        lines = _read_xlsx(uploaded)
+    else:
+        raise LearnerImportError("Upload a .csv or .xlsx file.")
+
+    header = next(lines, None)
+    if header is None:
+        raise LearnerImportError("The file is empty.")
+    missing = [name for name in required if name not in header]
+    if missing:
+        raise LearnerImportError(f"Missing column(s): {', '.join(missing)}.")
+
+    for number, values in enumerate(lines, start=2):
+        if not any(str(value).strip() for value in values):
+            continue
+        row = {}
+        for name, value in zip(header, values):
+            if name in columns:
+                if isinstance(value, datetime):
+                    value = value.date()
+                elif isinstance(value, float) and value.is_integer():
+                    value = int(value)  # Excel stores numeric IDs as floats
+                row[name] = value.strip() if isinstance(value, str) else value
+        yield number, row
+
+
+# --------------------------
+# Lookups
+# --------------------------
+
+class Lookups:
+    """
+    Name/code -> id maps, so a batch never queries per row.
+
+    The location tree is small and loaded once; schools are loaded per
+    batch for the codes that batch uses.
+    """
+
+    def __init__(self):
+        self.counties = {name.lower(): pk for pk, name in County.objects.values_list('pk', 'name')}
+        self.sub_counties = {
+            (county_id, name.lower()): pk
+            for pk, county_id, name in SubCounty.objects.values_list('pk', 'county_id', 'name')
+        }
+        self.wards = {
+            (sub_county_id, name.lower()): pk
+            for pk, sub_county_id, name in Ward.objects.values_list('pk', 'sub_county_id', 'name')
+        }
+        self.schools = {}
+
+    def load_schools(self, codes):
+        codes = [code for code in codes if code not in self.schools]
+        for school in School.objects.filter(code__in=codes).only('pk', 'code', 'county_id', 'sub_county_id', 'ward_id'):
+            self.schools[school.code] = school
+
+
+# --------------------------
+# Import
+# --------------------------
+
+def _resolve_location(row, school, lookups):
+    """
+    Return (county_id, sub_county_id, ward_id, column, error). Missing
+    location columns fall back to the school's own location.
+    """
+    county_id, sub_county_id, ward_id = school.county_id, school.sub_county_id, school.ward_id
+    county, sub_county, ward = (str(row.get(name) or '').lower() for name in ('county', 'sub_county', 'ward'))
+
+    if county:
+        county_id = lookups.counties.get(county)
+        if county_id is None:
+            return None, None, None, 'county', f"Unknown county '{row['county']}'."
+    if sub_county or county:
+        sub_county_id = lookups.sub_counties.get((county_id, sub_county))
+        if sub_county_id is None:
+            return None, None, None, 'sub_county', f"Unknown sub county '{row.get('sub_county', '')}' in this county."
+    if ward or sub_county or county:
+        ward_id = lookups.wards.get((sub_county_id, ward))
+        if ward_id is None:
+            return None, None, None, 'ward', f"Unknown ward '{row.get('ward', '')}' in this sub county."
+    return county_id, sub_county_id, ward_id, None, None
+
+
+def _process_batch(batch, school, lookups, seen, report, dry_run):
+    """
+    Validate one batch of (row number, row) pairs and insert the valid rows.
+    """
+    if school is None:
+        lookups.load_schools({str(row['school_code']) for _, row in batch if row.get('school_code')})
+
+    bcns = [str(row.get('birth_certificate_number', '')) for _, row in batch]
+    admissions = [str(row.get('admission_number', '')) for _, row in batch]
+    taken_bcns = set(
+        Learner.objects.filter(birth_certificate_number__in=bcns).values_list('birth_certificate_number', flat=True)
+    )
+    taken_admissions = set(
+        Learner.objects.filter(admission_number__in=admissions).values_list('admission_number', flat=True)
+    )
+
+    learners = []
+    for number, row in batch:
+        form = LearnerImportForm(row)
+        if not form.is_valid():
+            for field, errors in form.errors.items():
+                report.add_error(number, field, " ".join(errors))
+            continue
+        data = form.cleaned_data
+        bcn, admission = data['birth_certificate_number'], data['admission_number']
+
+        if bcn in taken_bcns:
+            report.add_error(number, 'birth_certificate_number', f"Learner with birth certificate {bcn} already exists.")
+            continue
+        if bcn in seen['bcn']:
+            report.add_error(number, 'birth_certificate_number', f"Birth certificate {bcn} appears more than once in the file.")
+            continue
+        if admission in taken_admissions:
+            report.add_error(number, 'admission_number', f"Admission number {admission} is already in use.")
+            continue
+        if admission in seen['admission']:
+            report.add_error(number, 'admission_number', f"Admission number {admission} appears more than once in the file.")
+            continue
+
+        row_school = school or lookups.schools.get(str(row.get('school_code', '')))
+        if row_school is None:
+            message = f"Unknown school code '{row['school_code']}'." if row.get('school_code') else "School code is required."
+            report.add_error(number, 'school_code', message)
+            continue
+
+        county_id, sub_county_id, ward_id, column, error = _resolve_location(row, row_school, lookups)
+        if error:
+            report.add_error(number, column, error)
+            continue
+
+        seen['bcn'].add(bcn)
+        seen['admission'].add(admission)
+        learner = form.save(commit=False)
+        learner.school_id = row_school.pk
+        learner.county_id, learner.sub_county_id, learner.ward_id = county_id, sub_county_id, ward_id
+        learner._import_school = row_school
+        learners.append(learner)
+
+    if dry_run or not learners:
+        report.created += len(learners)
+        return
+
+    rollup = Counter()
+    with transaction.atomic():
+        Learner.objects.bulk_create(learners, batch_size=BATCH_SIZE)
+        enroll_compulsory(learner_ids=[learner.pk for learner in learners])
+
+        # bulk_create skips the rollup signal handlers.
+        for learner in learners:
+            s = learner._import_school
+            rollup[((s.county_id, s.sub_county_id, s.ward_id), learner.grade, learner.gender)] += 1
+        apply_deltas(learners=rollup)
+        versions.bump(*{f"school:{learner.school_id}" for learner in learners})
+
+    adjust_headline_stat(Learner, len(learners))
+    report.created += len(learners)
+
+
+def import_learners(uploaded, school=None, dry_run=False, batch_size=BATCH_SIZE):
+    """
+    Import learners from an uploaded .csv or .xlsx file.
+
+    When `school` is given every row goes to that school and the
+    school_code column is ignored; otherwise each row needs a school_code.
+    With dry_run=True rows are validated but nothing is saved. Raises
+    LearnerImportError when the file cannot be read at all.
+    """
+    report = ImportReport()
+    lookups = Lookups()
+    seen = {'bcn': set(), 'admission': set()}
+
+    batch = []
+    for number, row in read_rows(uploaded):
+        report.rows += 1
+        batch.append((number, row))
+        if len(batch) >= batch_size:
+            _process_batch(batch, school, lookups, seen, report, dry_run)
+            batch = []
+    if batch:
+        _process_batch(batch, school, lookups, seen, report, dry_run)
+
+    return report
@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from learners.duplicates import MIN_SCORE, find_duplicates
+from location.models import County
+
+
+class Command(BaseCommand):
+    help = (
+        "Find probable duplicate learners (e.g. re-registered after a transfer) by comparing "
+        "learners only within blocks of matching identifiers or names, and queue them for review"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--county", action="append", dest="counties", help="Only this county (name; repeatable)")
+        parser.add_argument("--workers", type=int, help="Worker processes for the county scans (default: CPU count)")
+        parser.add_argument("--min-score", type=float, default=MIN_SCORE, help="Lowest score (0-1) to queue")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would be queued; save nothing")
+
+    def handle(self, *args, **options):
+        if not 0 < options["min_score"] <= 1:
+            raise CommandError("--min-score must be between 0 and 1")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        counties = None
+        if options["counties"]:
+            counties = []
+            for name in options["counties"]:
+                county = County.objects.filter(name__iexact=name).first()
+                if county is None:
+                    raise CommandError(f"No county named {name}")
+                counties.append(county)
+
+        self.stdout.write(self.style.NOTICE("Looking for duplicate learners..."))
+        report = find_duplicates(
+            counties=counties, workers=options["workers"], min_score=options["min_score"], dry_run=options["dry_run"]
+        )
+        self.stdout.write(
+            f"  {report.learners} learners in {report.counties} counties, {report.blocks} blocks, "
+            f"{report.comparisons} comparisons"
+        )
+        if report.oversized_blocks:
+            self.stdout.write(self.style.WARNING(
+                f"  {report.oversized_blocks} blocks skipped: too many learners share that name and date of birth"
+            ))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"Dry run: {report.candidates} candidates found, nothing was saved"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Queued {report.candidates} duplicate candidates for review in {report.seconds:.1f}s"
+        ))
@@ -0,0 +1,43 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from learners.importers import LearnerImportError, import_learners
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = "Import learners from a CSV or XLSX file, reporting rows that fail validation"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to a .csv or .xlsx file")
+        parser.add_argument("--school", help="School code to import every row into (ignores the school_code column)")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; save nothing")
+
+    def handle(self, *args, **options):
+        file_path = options["file"]
+        if not os.path.exists(file_path):
+            raise CommandError(f"File not found at: {file_path}")
+
+        school = None
+        if options["school"]:
+            school = School.objects.filter(code=options["school"]).first()
+            if school is None:
+                raise CommandError(f"No school with code {options['school']}")
+
+        self.stdout.write(self.style.NOTICE(f"Importing learners from {file_path}..."))
+
+        with open(file_path, "rb") as fh:
+            try:
+                report = import_learners(File(fh, name=file_path), school=school, dry_run=options["dry_run"])
+            except LearnerImportError as e:
+                raise CommandError(str(e))
+
+        for row, column, message in report.errors:
+            self.stdout.write(self.style.WARNING(f"Row {row} [{column}]: {message}"))
+
+        verb = "validated" if options["dry_run"] else "imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully {verb} {report.created} of {report.rows} learners ({report.failed_rows} rows with errors)"
+        ))
@@ -0,0 +1,73 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from learners.promotion import CHUNK_SIZE, GRADES, NEXT_GRADE, promote_learners
+from location.models import County, SubCounty
+from schools.models import School
+
+
+class Command(BaseCommand):
+    help = (
+        "Year-end promotion: move the year's active learners up one grade, graduate "
+        "the final grade and roll class/subject assignments into the new year. "
+        "Safe to re-run if interrupted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, default=date.today().year, help="School year being closed (default: this year)")
+        parser.add_argument("--to-year", type=int, help="New school year (default: --year + 1)")
+        parser.add_argument("--school", help="Only this school (school code)")
+        parser.add_argument("--county", help="Only this county (name)")
+        parser.add_argument("--sub-county", help="Only this sub county (name; use with --county if the name is not unique)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Learners per transaction")
+        parser.add_argument("--dry-run", action="store_true", help="Report what would change; save nothing")
+
+    def handle(self, *args, **options):
+        scope = self.scope(options)
+        to_year = options["to_year"] or options["year"] + 1
+        if to_year <= options["year"]:
+            raise CommandError("--to-year must be after --year")
+
+        self.stdout.write(self.style.NOTICE(f"Promoting learners from {options['year']} to {to_year}..."))
+        report = promote_learners(
+            options["year"], to_year, chunk_size=options["chunk_size"], dry_run=options["dry_run"], **scope
+        )
+
+        for grade in GRADES:
+            if report.promoted[grade]:
+                self.stdout.write(f"  {grade:<9} -> {NEXT_GRADE[grade]:<9}{report.promoted[grade]:>8}")
+        self.stdout.write(f"  Graduated{report.graduated:>19}")
+        if report.skipped:
+            self.stdout.write(self.style.WARNING(f"  {report.skipped} learners skipped: grade is not one of the CBC grades"))
+
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS("Dry run: nothing was saved"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Promoted {sum(report.promoted.values())} and graduated {report.graduated} learners "
+            f"in {report.chunks} chunks; rolled {report.class_assignments} class and "
+            f"{report.subject_assignments} subject assignments into {to_year}"
+        ))
+
+    def scope(self, options):
+        scope = {}
+        if options["school"]:
+            scope['school'] = School.objects.filter(code=options["school"]).first()
+            if scope['school'] is None:
+                raise CommandError(f"No school with code {options['school']}")
+        if options["county"]:
+            scope['county'] = County.objects.filter(name__iexact=options["county"]).first()
+            if scope['county'] is None:
+                raise CommandError(f"No county named {options['county']}")
+        if options["sub_county"]:
+            sub_counties = SubCounty.objects.filter(name__iexact=options["sub_county"])
+            if 'county' in scope:
+                sub_counties = sub_counties.filter(county=scope['county'])
+            sub_counties = list(sub_counties[:2])
+            if not sub_counties:
+                raise CommandError(f"No sub county named {options['sub_county']}")
+            if len(sub_counties) > 1:
+                raise CommandError(f"Several sub counties are named {options['sub_county']}; add --county")
+            scope['sub_county'] = sub_counties[0]
+        return scope
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from learners.search import SEARCH_TABLE, create_search_index
+
+
+class Command(BaseCommand):
+    help = "Recreate the learner search index and its triggers, re-indexing every learner (SQLite only)"
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError("The learner search index is only used on SQLite; other databases search the tables directly.")
+
+        self.stdout.write(self.style.NOTICE("Rebuilding learner search index..."))
+        with transaction.atomic():
+            create_search_index()
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {SEARCH_TABLE}")
+            indexed = cursor.fetchone()[0]
+        self.stdout.write(self.style.SUCCESS(f"Indexed {indexed} learners"))
@@ -0,0 +1,16 @@
+from django.db import migrations
+
+from ._search_index import create_search_index, drop_search_index
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0001_initial'),
+        ('schools', '0001_initial'),
+    ]
+
+    operations = [
+        # SQLite only: FTS5 table + sync triggers (see _search_index.py).
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
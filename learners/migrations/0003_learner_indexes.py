@@ -0,0 +1,20 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0002_learner_search'),
+        ('schools', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='learner',
+            index=models.Index(fields=['school', 'grade', 'last_name', 'first_name'], name='learner_school_grade_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='learner',
+            index=models.Index(fields=['school', 'birth_certificate_number'], name='learner_school_pk_idx'),
+        ),
+    ]
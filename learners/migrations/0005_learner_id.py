@@ -0,0 +1,111 @@
+"""
+Replace the varchar primary key (birth_certificate_number) with an integer
+id. birth_certificate_number stays as a unique natural key.
+
+1. Add a nullable id column and number the existing learners.
+2. Point the learners_learner_subjects rows at the new ids.
+3. Make id the primary key, demote birth_certificate_number to a unique
+   field, then turn id into an auto field; the last step rebuilds the
+   subjects table with an integer learner_id column.
+
+Each step rebuilds the SQLite learner table, so the search triggers are
+dropped first and recreated at the end. Not reversible.
+"""
+from django.db import migrations, models
+
+from . import _search_index
+
+
+def drop_search_index(apps, schema_editor):
+    _search_index.drop_search_index(apps, schema_editor)
+
+
+def create_search_index(apps, schema_editor):
+    _search_index.create_search_index(apps, schema_editor)
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+        if cursor.fetchone():
+            cursor.execute('ANALYZE "learners_learner"')
+            cursor.execute('ANALYZE "learners_learner_subjects"')
+
+
+def number_learners(apps, schema_editor):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            # Keep the insertion order the table already has.
+            cursor.execute("UPDATE learners_learner SET id = rowid")
+        else:
+            cursor.execute("""
+                UPDATE learners_learner SET id = numbered.n
+                FROM (
+                    SELECT birth_certificate_number AS bcn,
+                           ROW_NUMBER() OVER (ORDER BY admission_date, birth_certificate_number) AS n
+                    FROM learners_learner
+                ) numbered
+                WHERE numbered.bcn = learners_learner.birth_certificate_number
+            """)
+
+        # Rewrite rather than UPDATE in place: a numeric birth certificate
+        # could equal another learner's new id and trip the unique
+        # (learner_id, subject_id) constraint half way through.
+        cursor.execute("""
+            CREATE TEMPORARY TABLE learners_subjects_remap AS
+            SELECT t.id AS id, l.id AS learner_id, t.subject_id AS subject_id
+            FROM learners_learner_subjects t
+            INNER JOIN learners_learner l ON l.birth_certificate_number = t.learner_id
+        """)
+        cursor.execute("DELETE FROM learners_learner_subjects")
+        cursor.execute("""
+            INSERT INTO learners_learner_subjects (id, learner_id, subject_id)
+            SELECT id, learner_id, subject_id FROM learners_subjects_remap
+        """)
+        cursor.execute("DROP TABLE learners_subjects_remap")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0004_learner_status'),
+        ('subjects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_search_index),
+        # Rebuilt for the new key at the end.
+        migrations.RemoveIndex(
+            model_name='learner',
+            name='learner_school_pk_idx',
+        ),
+        migrations.AddField(
+            model_name='learner',
+            name='id',
+            field=models.BigIntegerField(null=True),
+        ),
+        migrations.RunPython(number_learners),
+        migrations.AlterField(
+            model_name='learner',
+            name='id',
+            field=models.BigIntegerField(primary_key=True, serialize=False),
+        ),
+        migrations.AlterField(
+            model_name='learner',
+            name='birth_certificate_number',
+            field=models.CharField(max_length=50, unique=True),
+        ),
+        # A type change on the primary key rebuilds the M2M table, which
+        # gives learner_id its integer type.
+        migrations.AlterField(
+            model_name='learner',
+            name='id',
+            field=models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID'),
+        ),
+        migrations.AddIndex(
+            model_name='learner',
+            index=models.Index(fields=['school', 'id'], name='learner_school_pk_idx'),
+        ),
+        migrations.RunPython(create_search_index),
+    ]
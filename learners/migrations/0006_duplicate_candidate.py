@@ -0,0 +1,35 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('learners', '0005_learner_id'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DuplicateCandidate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.FloatField(help_text='0-1; how closely the two records match.')),
+                ('reasons', models.CharField(help_text='The fields that matched.', max_length=100)),
+                ('status', models.CharField(choices=[('pending', 'Pending review'), ('confirmed', 'Confirmed duplicate'), ('rejected', 'Not a duplicate')], default='pending', max_length=10)),
+                ('found_at', models.DateTimeField(auto_now_add=True)),
+                ('reviewed_at', models.DateTimeField(blank=True, null=True)),
+                ('duplicate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='learners.learner')),
+                ('learner', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='duplicate_candidates', to='learners.learner')),
+                ('reviewed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Duplicate Candidate',
+                'verbose_name_plural': 'Duplicate Candidates',
+                'ordering': ['-score'],
+                'indexes': [models.Index(fields=['status', '-score'], name='duplicate_status_score_idx')],
+                'unique_together': {('learner', 'duplicate')},
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+"""
+The learner search index as the learners migrations create it: a frozen
+copy of learners/search.py's SQL, so changing that module never changes
+what these migrations do. The migration loader skips this module (its name
+starts with an underscore).
+
+Do not edit. The pre_migrate/post_migrate handlers in learners/signals.py
+drop the index before any migration runs and rebuild it from the current
+learners/search.py afterwards, so later versions of the index need no
+migration.
+"""
+SEARCH_TABLE = 'learners_learner_search'
+
+_INDEX_ROW = """
+    INSERT INTO learners_learner_search (rowid, name, identifiers, scope)
+    SELECT {0}.rowid,
+        {0}.first_name || ' ' || coalesce({0}.middle_name, '') || ' ' || {0}.last_name,
+        {0}.birth_certificate_number || ' ' || {0}.admission_number || ' ' || {0}.parent_contact,
+        (SELECT 's' || s.id || ' c' || s.county_id || ' sc' || s.sub_county_id
+         FROM schools_school s WHERE s.id = {0}.school_id)
+"""
+
+CREATE_SQL = [
+    """
+    CREATE VIRTUAL TABLE learners_learner_search USING fts5(
+        name, identifiers, scope,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER learners_learner_search_insert AFTER INSERT ON learners_learner BEGIN
+        {_INDEX_ROW.format('new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER learners_learner_search_update AFTER UPDATE OF
+        first_name, middle_name, last_name, birth_certificate_number,
+        admission_number, parent_contact, school_id
+    ON learners_learner BEGIN
+        DELETE FROM learners_learner_search WHERE rowid = old.rowid;
+        {_INDEX_ROW.format('new')};
+    END
+    """,
+    """
+    CREATE TRIGGER learners_learner_search_delete AFTER DELETE ON learners_learner BEGIN
+        DELETE FROM learners_learner_search WHERE rowid = old.rowid;
+    END
+    """,
+    f"{_INDEX_ROW.format('learners_learner')} FROM learners_learner",
+]
+
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS learners_learner_search_insert",
+    "DROP TRIGGER IF EXISTS learners_learner_search_update",
+    "DROP TRIGGER IF EXISTS learners_learner_search_delete",
+    # Created by earlier versions on schools_school.
+    "DROP TRIGGER IF EXISTS learners_learner_search_school_moved",
+    "DROP TABLE IF EXISTS learners_learner_search",
+]
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL + CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.db import models
 from datetime import date
 
@@ -20,6 +21,13 @@ class Learner(models.Model):
         ('O', 'Other'),
     ]
 
+    ACTIVE = 'active'
+    GRADUATED = 'graduated'
+    STATUS_CHOICES = [
+        (ACTIVE, 'Active'),
+        (GRADUATED, 'Graduated'),
+    ]
+
     RELATIONSHIP_CHOICES = [
         ('Mother', 'Mother'),
         ('Father', 'Father'),
@@ -27,10 +35,8 @@ class Learner(models.Model):
         ('Other', 'Other'),
     ]
 
-    # Core identification
-    birth_certificate_number = models.CharField(
-        max_length=50, primary_key=True, unique=True
-    )
+    # Core identification (natural key; the primary key is the integer id)
+    birth_certificate_number = models.CharField(max_length=50, unique=True)
     admission_number = models.CharField(max_length=20, unique=True)
 
     # Basic info
@@ -45,6 +51,12 @@ class Learner(models.Model):
     grade = models.CharField(max_length=20, choices=GRADE_CHOICES)
     year = models.IntegerField(default=date.today().year)
     admission_date = models.DateField(default=date.today)
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default=ACTIVE,
+        help_text="Set to Graduated by the year-end promotion after the final grade."
+    )
 
     class_teacher = models.ForeignKey(
         'teachers.Teacher',
@@ -88,3 +100,51 @@ class Learner(models.Model):
         ordering = ['school', 'grade', 'last_name', 'first_name']
         verbose_name = "Learner"
         verbose_name_plural = "Learners"
+        indexes = [
+            # Learner lists: filter by school, sort by grade and name.
+            models.Index(fields=['school', 'grade', 'last_name', 'first_name'], name='learner_school_grade_name_idx'),
+            # Dashboard tables: learners of a set of schools, keyset paginated by (school, pk).
+            models.Index(fields=['school', 'id'], name='learner_school_pk_idx'),
+        ]
+
+
+class DuplicateCandidate(models.Model):
+    """
+    Two learners that are probably the same child, found by
+    `manage.py find_duplicate_learners` (learners/duplicates.py) and waiting
+    for review. `learner` is the pair's lower id.
+    """
+
+    PENDING = 'pending'
+    CONFIRMED = 'confirmed'
+    REJECTED = 'rejected'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending review'),
+        (CONFIRMED, 'Confirmed duplicate'),
+        (REJECTED, 'Not a duplicate'),
+    ]
+
+    learner = models.ForeignKey(Learner, on_delete=models.CASCADE, related_name='duplicate_candidates')
+    duplicate = models.ForeignKey(Learner, on_delete=models.CASCADE, related_name='+')
+    score = models.FloatField(help_text="0-1; how closely the two records match.")
+    reasons = models.CharField(max_length=100, help_text="The fields that matched.")
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+
+    found_at = models.DateTimeField(auto_now_add=True)
+    reviewed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, related_name='+'
+    )
+    reviewed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.learner_id} ~ {self.duplicate_id} ({self.score:.2f})"
+
+    class Meta:
+        ordering = ['-score']
+        verbose_name = "Duplicate Candidate"
+        verbose_name_plural = "Duplicate Candidates"
+        unique_together = ('learner', 'duplicate')
+        indexes = [
+            # Review queue: pending pairs, best matches first.
+            models.Index(fields=['status', '-score'], name='duplicate_status_score_idx'),
+        ]
@@ -0,0 +1,202 @@
+"""
+Year-end promotion.
+
+Moves every active learner of a school year up one grade along
+Learner.GRADE_CHOICES, graduates the final grade, swaps compulsory
+subjects for learners entering a new grade level and rolls class and
+subject assignments into the new year.
+
+Learners are processed in chunks ordered by (school, pk), each chunk in
+its own transaction and written with a few set-based UPDATE / INSERT
+statements rather than per-learner saves. Promoted learners move to the
+new year and graduates stop being active, so neither matches the job
+again: a run that stops part way can simply be started again.
+
+Usage:
+    report = promote_learners(2025, county=county)
+    report.promoted, report.graduated
+"""
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Case, Count, F, Q, Value, When
+
+from home.stats import adjust_headline_stat
+from reports.rollups import apply_deltas, scope_key
+from reports import versions
+from schools.models import School
+from subjects.enrollment import enroll_compulsory, remove_other_levels
+from subjects.models import Subject
+from teachers.models import ClassAssignment, SubjectAssignment
+
+from .detail_cache import invalidate_learners
+from .models import Learner
+
+
+CHUNK_SIZE = 2000
+
+GRADES = [grade for grade, _ in Learner.GRADE_CHOICES]
+NEXT_GRADE = dict(zip(GRADES, GRADES[1:]))
+FINAL_GRADE = GRADES[-1]
+
+
+class PromotionReport:
+    def __init__(self, from_year, to_year):
+        self.from_year = from_year
+        self.to_year = to_year
+        self.promoted = Counter()  # grade left -> learners
+        self.graduated = 0
+        self.skipped = 0  # learners with a grade outside GRADE_CHOICES
+        self.chunks = 0
+        self.class_assignments = 0
+        self.subject_assignments = 0
+
+
+def schools_in_scope(school=None, sub_county=None, county=None):
+    """
+    The schools a promotion covers: one school, a sub county, a county or all.
+    """
+    schools = School.objects.all()
+    if school is not None:
+        schools = schools.filter(pk=getattr(school, 'pk', school))
+    if sub_county is not None:
+        schools = schools.filter(sub_county=sub_county)
+    if county is not None:
+        schools = schools.filter(county=county)
+    return schools
+
+
+def _enroll_for_new_level(moved):
+    """
+    Re-enrol learners who entered a new grade level: drop subjects of
+    other levels and add the compulsory subjects of the new one.
+    `moved` maps the new level to learner pks.
+    """
+    for level, pks in moved.items():
+        remove_other_levels(pks, level)
+        enroll_compulsory(learner_ids=pks)
+
+
+def _promote_chunk(learners, to_year, locations, report):
+    """
+    Promote one chunk of (pk, school_id, grade, gender) rows.
+    """
+    promoted = [row for row in learners if row[2] in NEXT_GRADE]
+    graduating = [row for row in learners if row[2] == FINAL_GRADE]
+    report.skipped += len(learners) - len(promoted) - len(graduating)
+
+    with transaction.atomic():
+        if promoted:
+            # One UPDATE for the chunk; every SET expression sees the old grade.
+            Learner.objects.filter(pk__in=[row[0] for row in promoted]).update(
+                grade=Case(
+                    *[When(grade=grade, then=Value(after)) for grade, after in NEXT_GRADE.items()],
+                    default=F('grade'),
+                ),
+                year=to_year,
+                # Class teachers belong to last year's stream.
+                class_teacher=None,
+            )
+        if graduating:
+            Learner.objects.filter(pk__in=[row[0] for row in graduating]).update(status=Learner.GRADUATED)
+
+        moved = {}
+        for pk, _, grade, _ in promoted:
+            level = Subject.level_for_grade(NEXT_GRADE[grade])
+            if level != Subject.level_for_grade(grade):
+                moved.setdefault(level, []).append(pk)
+        _enroll_for_new_level(moved)
+
+        # The UPDATEs skip the rollup signal handlers.
+        deltas = Counter()
+        for _, school_id, grade, gender in promoted:
+            deltas[(locations[school_id], grade, gender)] -= 1
+            deltas[(locations[school_id], NEXT_GRADE[grade], gender)] += 1
+        for _, school_id, grade, gender in graduating:
+            deltas[(locations[school_id], grade, gender)] -= 1
+        apply_deltas(learners=deltas)
+        versions.bump(*{scope_key('school', row[1]) for row in promoted + graduating})
+        transaction.on_commit(partial(invalidate_learners, [row[0] for row in promoted + graduating]))
+
+    if graduating:
+        adjust_headline_stat(Learner, -len(graduating))
+    report.promoted.update(row[2] for row in promoted)
+    report.graduated += len(graduating)
+    report.chunks += 1
+
+
+def _roll_assignments(schools, from_year, to_year):
+    """
+    Copy the year's class and subject assignments into the new year,
+    skipping ones that already exist there. Returns (class, subject) rows added.
+    """
+    added, teachers = [], set()
+    for model, fields in (
+        (ClassAssignment, ('teacher_id', 'stream_id', 'is_class_teacher')),
+        (SubjectAssignment, ('teacher_id', 'stream_id', 'subject_id')),
+    ):
+        existing = model.objects.filter(year=to_year, teacher__school__in=schools).count()
+        rows = model.objects.filter(year=from_year, teacher__school__in=schools)
+
+        # ignore_conflicts also skips class teachers of streams that already
+        # have one in the new year (one_class_teacher_per_stream_year).
+        batch = []
+        for values in rows.order_by('pk').values_list(*fields).iterator(chunk_size=CHUNK_SIZE):
+            batch.append(model(year=to_year, **dict(zip(fields, values))))
+            teachers.add(values[0])
+            if len(batch) >= CHUNK_SIZE:
+                model.objects.bulk_create(batch, ignore_conflicts=True)
+                batch = []
+        if batch:
+            model.objects.bulk_create(batch, ignore_conflicts=True)
+        added.append(model.objects.filter(year=to_year, teacher__school__in=schools).count() - existing)
+    # bulk_create skips the teacher version signal handlers.
+    versions.bump(*(scope_key('teacher', pk) for pk in teachers))
+    return added
+
+
+def promote_learners(from_year, to_year=None, school=None, sub_county=None, county=None,
+                     chunk_size=CHUNK_SIZE, dry_run=False):
+    """
+    Promote the active learners of `from_year` in the given scope.
+
+    With dry_run=True nothing is written; the report shows what would move.
+    """
+    to_year = to_year or from_year + 1
+    report = PromotionReport(from_year, to_year)
+    schools = schools_in_scope(school, sub_county, county)
+    learners = Learner.objects.filter(school__in=schools, year=from_year, status=Learner.ACTIVE)
+
+    if dry_run:
+        for grade, n in learners.order_by().values_list('grade').annotate(n=Count('pk')):
+            if grade == FINAL_GRADE:
+                report.graduated += n
+            elif grade in NEXT_GRADE:
+                report.promoted[grade] += n
+            else:
+                report.skipped += n
+        return report
+
+    locations = {
+        pk: (county_id, sub_county_id, ward_id)
+        for pk, county_id, sub_county_id, ward_id in schools.values_list('pk', 'county_id', 'sub_county_id', 'ward_id')
+    }
+
+    # Keyset over (school, pk) so skipped rows are never read twice.
+    after = Q()
+    while True:
+        chunk = list(
+            learners.filter(after).order_by('school_id', 'pk')
+            .values_list('pk', 'school_id', 'grade', 'gender')[:chunk_size]
+        )
+        if not chunk:
+            break
+        _promote_chunk(chunk, to_year, locations, report)
+        last_pk, last_school = chunk[-1][0], chunk[-1][1]
+        after = Q(school_id__gte=last_school) & (
+            Q(school_id__gt=last_school) | Q(school_id=last_school, pk__gt=last_pk)
+        )
+
+    report.class_assignments, report.subject_assignments = _roll_assignments(schools, from_year, to_year)
+    return report
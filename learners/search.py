@@ -0,0 +1,203 @@
+"""
+Indexed learner search.
+
+On SQLite, learners are indexed in an FTS5 table kept in sync by triggers,
+so rows written with bulk_create or raw SQL (imports, generate_synthetic)
+are indexed too. Each learner's names, identifiers (birth certificate,
+admission number, parent contact) and scope tokens are indexed:
+"s<school id> c<county id> sc<sub county id>", taken from the learner's
+school. Scoping a search therefore intersects posting lists inside the
+index instead of filtering matches afterwards, and results come back in
+rowid order with keyset pagination, so a page costs the same at 10M rows
+as at 10k. Index rows share the learner's rowid, which is its id.
+
+Every search term is a prefix match: "kip 0712" finds Kiplagat with a
+parent contact starting 0712.
+
+Other databases fall back to istartswith lookups.
+
+The triggers are on learners_learner only. When a school moves county or
+sub county, the School post_save handler in learners/signals.py rewrites
+its learners' scope tokens (update_school_scope); queryset.update() on
+schools skips it, so run rebuild_learner_search after one.
+
+Django rebuilds SQLite tables for some schema changes (adding or altering
+a column) by dropping and renaming them, which fails while the triggers
+exist. So `migrate` drops the index before applying migrations and
+rebuilds it from this module afterwards (pre_migrate/post_migrate in
+learners/signals.py); migrations need not know about it. The migrations
+that first created it use a frozen copy of this SQL
+(learners/migrations/_search_index.py).
+"""
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from utils.pagination import KeysetPage, KeysetPaginator, decode_cursor, encode_cursor
+
+from .models import Learner
+
+
+SEARCH_TABLE = 'learners_learner_search'
+
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+_NAME = "{0}.first_name || ' ' || coalesce({0}.middle_name, '') || ' ' || {0}.last_name"
+_IDENTIFIERS = "{0}.birth_certificate_number || ' ' || {0}.admission_number || ' ' || {0}.parent_contact"
+_SCOPE = (
+    "(SELECT 's' || s.id || ' c' || s.county_id || ' sc' || s.sub_county_id "
+    "FROM schools_school s WHERE s.id = {0}.school_id)"
+)
+
+_INDEX_ROW = f"""
+    INSERT INTO {SEARCH_TABLE} (rowid, name, identifiers, scope)
+    SELECT {{0}}.rowid, {_NAME}, {_IDENTIFIERS}, {_SCOPE}
+"""
+
+CREATE_SQL = [
+    f"""
+    CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        name, identifiers, scope,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON learners_learner BEGIN
+        {_INDEX_ROW.format('new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_update AFTER UPDATE OF
+        first_name, middle_name, last_name, birth_certificate_number,
+        admission_number, parent_contact, school_id
+    ON learners_learner BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.rowid;
+        {_INDEX_ROW.format('new')};
+    END
+    """,
+    f"""
+    CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON learners_learner BEGIN
+        DELETE FROM {SEARCH_TABLE} WHERE rowid = old.rowid;
+    END
+    """,
+    f"{_INDEX_ROW.format('learners_learner')} FROM learners_learner",
+]
+
+DROP_SQL = [
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_insert",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_update",
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_delete",
+    # Created on schools_school by earlier versions.
+    f"DROP TRIGGER IF EXISTS {SEARCH_TABLE}_school_moved",
+    f"DROP TABLE IF EXISTS {SEARCH_TABLE}",
+]
+
+
+# --------------------------
+# Index maintenance
+# --------------------------
+
+def create_search_index(conn=connection):
+    """
+    (Re)create the FTS5 table and triggers and index every learner. No-op off SQLite.
+    """
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for sql in DROP_SQL + CREATE_SQL:
+            cursor.execute(sql)
+
+
+def drop_search_index(conn=connection):
+    if conn.vendor != 'sqlite':
+        return
+    with conn.cursor() as cursor:
+        for sql in DROP_SQL:
+            cursor.execute(sql)
+
+
+def has_search_index(conn=connection):
+    return conn.vendor == 'sqlite' and SEARCH_TABLE in conn.introspection.table_names()
+
+
+def update_school_scope(school, conn=connection):
+    """
+    Rewrite the scope tokens of a school's learners, after the school
+    changed county or sub county.
+    """
+    if not has_search_index(conn):
+        return
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"UPDATE {SEARCH_TABLE} SET scope = %s "
+            f"WHERE rowid IN (SELECT id FROM learners_learner WHERE school_id = %s)",
+            [f"s{school.pk} c{school.county_id} sc{school.sub_county_id}", school.pk],
+        )
+
+
+# --------------------------
+# Searching
+# --------------------------
+
+def _terms(query):
+    return _TERM.findall(query or '')
+
+
+def _match_expression(terms, school=None, county=None, sub_county=None):
+    """
+    Build an FTS5 MATCH expression: every term as a quoted prefix in the
+    name/identifier columns, ANDed with the scope tokens.
+    """
+    text = " AND ".join(f'"{term}"*' for term in terms)
+    expression = f"{{name identifiers}} : ({text})"
+    for token, obj in (('s', school), ('c', county), ('sc', sub_county)):
+        if obj is not None:
+            expression += f' AND scope : "{token}{getattr(obj, "pk", obj)}"'
+    return expression
+
+
+def _fallback(terms, school, county, sub_county, cursor, per_page):
+    queryset = Learner.objects.select_related('school')
+    if school is not None:
+        queryset = queryset.filter(school=school)
+    if county is not None:
+        queryset = queryset.filter(school__county=county)
+    if sub_county is not None:
+        queryset = queryset.filter(school__sub_county=sub_county)
+    for term in terms:
+        queryset = queryset.filter(
+            Q(first_name__istartswith=term) | Q(middle_name__istartswith=term) |
+            Q(last_name__istartswith=term) | Q(birth_certificate_number__istartswith=term) |
+            Q(admission_number__istartswith=term) | Q(parent_contact__istartswith=term)
+        )
+    return KeysetPaginator(queryset, ordering=('pk',), per_page=per_page).page(cursor)
+
+
+def search_learners(query, school=None, county=None, sub_county=None, cursor=None, per_page=25):
+    """
+    Return a KeysetPage of learners matching every term of `query`,
+    optionally limited to a school, county or sub county (objects or ids).
+
+    Raises utils.pagination.InvalidCursor for a bad cursor.
+    """
+    terms = _terms(query)
+    if not terms:
+        return KeysetPage([], None)
+    if not has_search_index():
+        return _fallback(terms, school, county, sub_county, cursor, per_page)
+
+    after = decode_cursor(cursor, [Learner._meta.pk])[0] if cursor else 0
+    with connection.cursor() as c:
+        c.execute(
+            f"SELECT rowid FROM {SEARCH_TABLE} "
+            f"WHERE {SEARCH_TABLE} MATCH %s AND rowid > %s ORDER BY rowid LIMIT %s",
+            [_match_expression(terms, school, county, sub_county), after, per_page + 1],
+        )
+        rows = c.fetchall()
+
+    next_cursor = encode_cursor([rows[per_page - 1][0]]) if len(rows) > per_page else None
+    ids = [rowid for rowid, in rows[:per_page]]
+    learners = Learner.objects.select_related('school').in_bulk(ids)
+    return KeysetPage([learners[pk] for pk in ids if pk in learners], next_cursor)
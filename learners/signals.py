@@ -0,0 +1,99 @@
+"""
+Invalidate cached learner detail pages (learners/detail_cache.py) once the
+writing transaction commits, so a concurrent read cannot cache the old row
+under the new version.
+
+A learner's own saves, deletes and subject changes invalidate that learner;
+changes to schools, teachers and subjects, which appear on many learners'
+pages, invalidate them all.
+
+Also keeps the learner search index (learners/search.py) in step with
+school moves, and drops it around `migrate` so migrations can rebuild the
+learner and school tables.
+"""
+from functools import partial
+
+from django.apps import apps
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save, pre_migrate, pre_save
+from django.dispatch import receiver
+
+from schools.models import School
+from subjects.models import Subject
+from teachers.models import Teacher
+
+from .detail_cache import invalidate_all_learners, invalidate_learners
+from .models import Learner
+from .search import create_search_index, drop_search_index, update_school_scope
+
+
+@receiver(post_save, sender=Learner)
+@receiver(post_delete, sender=Learner)
+def invalidate_learner(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(invalidate_learners, [instance.pk]))
+
+
+@receiver(m2m_changed, sender=Learner.subjects.through)
+def invalidate_learner_subjects(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+    if not reverse:
+        transaction.on_commit(partial(invalidate_learners, [instance.pk]))
+    elif pk_set:
+        transaction.on_commit(partial(invalidate_learners, list(pk_set)))
+    else:
+        # subject.learners.clear() does not say which learners it removed.
+        transaction.on_commit(invalidate_all_learners)
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Subject)
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Subject)
+def invalidate_related(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(invalidate_all_learners)
+
+
+# --------------------------
+# Search index
+# --------------------------
+
+SCOPE_FIELDS = ('county_id', 'sub_county_id')
+
+
+@receiver(pre_save, sender=School)
+def stash_previous_scope(sender, instance, raw=False, **kwargs):
+    instance._search_previous = None
+    if not raw and instance.pk is not None:
+        instance._search_previous = School.objects.filter(pk=instance.pk).values(*SCOPE_FIELDS).first()
+
+
+@receiver(post_save, sender=School)
+def update_search_scope(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    previous = getattr(instance, '_search_previous', None)
+    if previous == {field: getattr(instance, field) for field in SCOPE_FIELDS}:
+        return
+    update_school_scope(instance)
+
+
+# Sent once per migrate run (sender=this app), with the migration plan;
+# `flush` sends post_migrate without one.
+
+@receiver(pre_migrate, sender=apps.get_app_config('learners'))
+def drop_index_before_migrating(sender, using, plan=None, **kwargs):
+    if plan:
+        drop_search_index(connections[using])
+
+
+@receiver(post_migrate, sender=apps.get_app_config('learners'))
+def rebuild_index_after_migrating(sender, using, plan=None, **kwargs):
+    connection = connections[using]
+    if plan == [] or Learner._meta.db_table not in connection.introspection.table_names():
+        return
+    create_search_index(connection)
@@ -1,3 +1,409 @@
-from django.test import TestCase
+import unittest
+from datetime import date
 
-# Create your tests here.
+from django.apps import apps
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connection, models
+from django.db.migrations import Migration
+from django.db.models.signals import post_migrate, pre_migrate
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from reports.rollups import get_summary, rebuild_rollups
+from reports.tests import snapshot
+from subjects.models import Subject
+from teachers.models import ClassAssignment, Stream
+from utils.pagination import InvalidCursor, encode_cursor
+from utils.testing import make_learner, make_school, make_teacher, make_user, make_ward
+
+from .detail_cache import get_learner_detail, invalidate_learners
+from .duplicates import Record, find_duplicates, normalize_identifier, score_pair
+from .importers import LearnerImportError, import_learners
+from .models import DuplicateCandidate, Learner
+from .promotion import promote_learners
+from .search import SEARCH_TABLE, has_search_index, search_learners
+
+sqlite_only = unittest.skipUnless(connection.vendor == 'sqlite', "The search index is SQLite only.")
+
+
+def found(query, **scope):
+    return [learner.pk for learner in search_learners(query, per_page=100, **scope)]
+
+
+# --------------------------
+# Search index
+# --------------------------
+
+@sqlite_only
+class SearchIndexTests(TestCase):
+
+    def setUp(self):
+        self.ward = make_ward('Nakuru', 'Naivasha')
+        self.school = make_school(self.ward, 'S1')
+        self.other_school = make_school(make_ward('Kisumu', 'Kisumu East'), 'S2')
+        self.learner = make_learner(self.school, 'BC 0042/7', first_name='Kiplagat', last_name='Rono')
+
+    def test_triggers_only_on_learner_table(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT DISTINCT tbl_name FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                [f"{SEARCH_TABLE}%"],
+            )
+            self.assertEqual(cursor.fetchall(), [('learners_learner',)])
+
+    def test_prefix_terms_and_scope(self):
+        self.assertEqual(found('kip 0712'), [self.learner.pk])
+        self.assertEqual(found('ron', school=self.school), [self.learner.pk])
+        self.assertEqual(found('ron', county=self.other_school.county_id), [])
+        self.assertEqual(found('BC'), [self.learner.pk])
+
+    def test_updates_and_deletes_follow(self):
+        self.learner.last_name = 'Chebet'
+        self.learner.save()
+        self.assertEqual(found('rono'), [])
+        self.assertEqual(found('chebet'), [self.learner.pk])
+
+        self.learner.school = self.other_school
+        self.learner.save()
+        self.assertEqual(found('chebet', school=self.other_school), [self.learner.pk])
+
+        self.learner.delete()
+        self.assertEqual(found('chebet'), [])
+
+    def test_school_move_updates_scope(self):
+        self.school.county_id = self.other_school.county_id
+        self.school.sub_county_id = self.other_school.sub_county_id
+        self.school.ward_id = self.other_school.ward_id
+        self.school.save()
+        self.assertEqual(found('kip', sub_county=self.other_school.sub_county_id), [self.learner.pk])
+        self.assertEqual(found('kip', county=self.ward.sub_county.county_id), [])
+
+    def test_other_school_saves_do_not_reindex(self):
+        self.school.name = 'Naivasha Primary'
+        with CaptureQueriesContext(connection) as queries:
+            self.school.save()
+        self.assertFalse([query for query in queries if SEARCH_TABLE in query['sql']])
+
+    def test_keyset_pages(self):
+        pks = [self.learner.pk] + [
+            make_learner(self.school, f"BC{n}", first_name='Kiprono').pk for n in range(6)
+        ]
+        seen, cursor = [], None
+        while True:
+            page = search_learners('kip', school=self.school, cursor=cursor, per_page=3)
+            seen += [learner.pk for learner in page]
+            if not page.has_next:
+                break
+            cursor = page.next_cursor
+        self.assertEqual(seen, sorted(pks))
+
+        with self.assertRaises(InvalidCursor):
+            search_learners('kip', cursor=encode_cursor(['1 OR 1=1']))
+
+
+@sqlite_only
+class SearchIndexMigrateTests(TransactionTestCase):
+    """
+    `migrate` drops the index first and rebuilds it afterwards, so
+    migrations can rebuild the learner table (SQLite drops its triggers
+    with it) and rows written meanwhile are indexed.
+    """
+
+    def migrate_signal(self, signal):
+        config = apps.get_app_config('learners')
+        signal.send(
+            sender=config, app_config=config, verbosity=0, interactive=False, using=DEFAULT_DB_ALIAS,
+            plan=[(Migration('9999_test', 'learners'), False)], apps=apps,
+        )
+
+    def alter_postal_address(self, max_length):
+        old = Learner._meta.get_field('postal_address')
+        new = models.CharField(max_length=max_length)
+        new.set_attributes_from_name('postal_address')
+        self.migrate_signal(pre_migrate)
+        with connection.schema_editor() as editor:
+            editor.alter_field(Learner, old, new)
+        return new
+
+    def test_table_rebuild(self):
+        school = make_school(make_ward(), 'S1')
+        before = make_learner(school, 'BC1', first_name='Akinyi')
+
+        self.alter_postal_address(120)
+        try:
+            self.assertFalse(has_search_index())
+            during = make_learner(school, 'BC2', first_name='Akoth')
+            self.migrate_signal(post_migrate)
+
+            after = make_learner(school, 'BC3', first_name='Akello')
+            self.assertEqual(found('ak'), [before.pk, during.pk, after.pk])
+        finally:
+            field = Learner._meta.get_field('postal_address')
+            old = models.CharField(max_length=120)
+            old.set_attributes_from_name('postal_address')
+            self.migrate_signal(pre_migrate)
+            with connection.schema_editor() as editor:
+                editor.alter_field(Learner, old, field)
+            self.migrate_signal(post_migrate)
+
+
+# --------------------------
+# Promotion
+# --------------------------
+
+class PromotionTests(TestCase):
+
+    def setUp(self):
+        self.school = make_school(make_ward(), 'S1')
+        self.lower = Subject.objects.create(name='Literacy', grade_level='LowerPrimary', is_compulsory=True)
+        self.upper = Subject.objects.create(name='Science', grade_level='UpperPrimary', is_compulsory=True)
+
+    def test_promotes_graduates_and_reenrols(self):
+        first = make_learner(self.school, 'BC1', grade='Grade 1', year=2025)
+        third = make_learner(self.school, 'BC2', grade='Grade 3', year=2025)
+        third.subjects.add(self.lower)
+        final = make_learner(self.school, 'BC3', grade='Grade 12', year=2025)
+
+        report = promote_learners(2025, chunk_size=2)
+
+        self.assertEqual((dict(report.promoted), report.graduated), ({'Grade 1': 1, 'Grade 3': 1}, 1))
+        first.refresh_from_db()
+        third.refresh_from_db()
+        final.refresh_from_db()
+        self.assertEqual((first.grade, first.year), ('Grade 2', 2026))
+        self.assertEqual(third.grade, 'Grade 4')
+        self.assertEqual(list(third.subjects.all()), [self.upper])
+        self.assertEqual(final.status, Learner.GRADUATED)
+
+        # The bulk updates applied their own rollup deltas.
+        self.assertEqual(get_summary('national')['learners'], 2)
+        kept = snapshot()
+        rebuild_rollups()
+        self.assertEqual(kept, snapshot())
+
+        # Nothing matches a second run.
+        self.assertEqual(promote_learners(2025).chunks, 0)
+
+    def test_rolls_assignments_without_second_class_teacher(self):
+        stream = Stream.objects.create(school=self.school, grade='Grade 1', name='A')
+        last_year = make_teacher(self.school, 'otieno')
+        this_year = make_teacher(self.school, 'achieng')
+        ClassAssignment.objects.create(teacher=last_year, stream=stream, year=2025, is_class_teacher=True)
+        ClassAssignment.objects.create(teacher=this_year, stream=stream, year=2026, is_class_teacher=True)
+
+        report = promote_learners(2025)
+
+        self.assertEqual(report.class_assignments, 0)
+        self.assertEqual(
+            list(ClassAssignment.objects.filter(year=2026).values_list('teacher_id', flat=True)), [this_year.pk],
+        )
+
+
+# --------------------------
+# Duplicate detection
+# --------------------------
+
+class DuplicateTests(TestCase):
+
+    def setUp(self):
+        self.school = make_school(make_ward('Nakuru'), 'S1')
+        self.other_school = make_school(make_ward('Kisumu'), 'S2')
+
+    def record(self, pk, identifier, first, last, born=None, contact=''):
+        return Record(pk, 1, 1, identifier, first, None, last, born, contact)
+
+    def test_scoring(self):
+        self.assertEqual(normalize_identifier('BC 001234/5'), normalize_identifier('bc0012345'))
+
+        same = score_pair(
+            self.record(1, 'BC 001234/5', 'Brian', 'Kamau', date(2015, 3, 1), '0712345678'),
+            self.record(2, 'bc0012345', 'Kamau', 'Brian', date(2015, 3, 1), '+254712345678'),
+        )
+        self.assertEqual(same, (1.0, ['identifier', 'name', 'date of birth', 'parent contact']))
+
+        # Siblings: certificates a digit apart, different names.
+        siblings = score_pair(
+            self.record(1, 'BC0012345', 'Brian', 'Kamau', date(2015, 3, 1)),
+            self.record(2, 'BC0012346', 'Faith', 'Kamau', date(2017, 6, 9)),
+        )
+        self.assertLess(siblings[0], 0.5)
+
+    def test_find_duplicates(self):
+        born = date(2015, 3, 1)
+        a = make_learner(self.school, 'BC 001234/5', first_name='Brian', last_name='Kamau', date_of_birth=born)
+        b = make_learner(self.other_school, 'bc0012345', first_name='Brian', last_name='Kamau', date_of_birth=born)
+        c = make_learner(self.school, 'X1', first_name='Bryan', last_name='Wekesa', date_of_birth=born)
+        d = make_learner(self.school, 'X2', first_name='Brian', last_name='Wekesa', date_of_birth=born)
+        make_learner(self.school, 'X3', first_name='Faith', last_name='Wekesa', date_of_birth=date(2016, 1, 1))
+
+        report = find_duplicates(workers=1)
+
+        pairs = set(DuplicateCandidate.objects.values_list('learner_id', 'duplicate_id'))
+        self.assertEqual(pairs, {(a.pk, b.pk), (c.pk, d.pk)})
+        self.assertEqual(report.candidates, 2)
+
+        # A new run keeps reviewed pairs as they are.
+        DuplicateCandidate.objects.filter(learner=a).update(status=DuplicateCandidate.REJECTED)
+        find_duplicates(workers=1)
+        self.assertEqual(DuplicateCandidate.objects.get(learner=a).status, DuplicateCandidate.REJECTED)
+        self.assertEqual(DuplicateCandidate.objects.count(), 2)
+
+
+# --------------------------
+# Learner URLs
+# --------------------------
+
+class LearnerUrlTests(TestCase):
+
+    def setUp(self):
+        school = make_school(make_ward(), 'S1')
+        self.first = make_learner(school, 'A-100')
+        self.numeric = make_learner(school, str(self.first.pk))
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+
+    def test_id_pages(self):
+        response = self.client.get(reverse('learners:learner_detail', args=[self.first.pk]))
+        self.assertEqual(response.context['learner'].pk, self.first.pk)
+        self.assertEqual(self.client.get(reverse('learners:learner_detail', args=[999999])).status_code, 404)
+
+    def test_birth_certificate_links_keep_their_meaning(self):
+        # An all-digit number equal to another learner's id still means the
+        # learner with that birth certificate.
+        number = self.numeric.birth_certificate_number
+        for url in [f'/learners/{number}/', reverse('learners:legacy_learner_detail', args=[number])]:
+            response = self.client.get(url)
+            self.assertRedirects(response, reverse('learners:learner_detail', args=[self.numeric.pk]), status_code=301)
+
+        response = self.client.get(f'/learners/{number}/edit/')
+        self.assertRedirects(response, reverse('learners:edit_learner', args=[self.numeric.pk]), status_code=301)
+        response = self.client.get('/learners/A-100/edit/')
+        self.assertRedirects(response, reverse('learners:edit_learner', args=[self.first.pk]), status_code=301)
+        self.assertEqual(self.client.get('/learners/NO-SUCH/').status_code, 404)
+
+
+# --------------------------
+# Bulk import
+# --------------------------
+
+IMPORT_HEADER = (
+    'Birth Certificate Number,admission_number,first_name,last_name,gender,grade,year,date_of_birth,'
+    'parent_full_name,parent_contact,relationship_to_learner,postal_address,school_code,county,sub_county,ward'
+)
+
+
+def learner_file(*rows, header=IMPORT_HEADER, name='learners.csv'):
+    return SimpleUploadedFile(name, '\n'.join([header, *rows]).encode())
+
+
+def learner_row(bcn, admission, school_code='', location=',,', date_of_birth='2016-02-01'):
+    return (
+        f"{bcn},{admission},Amani,Otieno,F,Grade 3,2025,{date_of_birth},"
+        f"Grace Otieno,0712000000,Mother,P.O. Box 1,{school_code},{location}"
+    )
+
+
+class ImportTests(TestCase):
+
+    def setUp(self):
+        self.ward = make_ward('Nakuru', 'Naivasha')
+        self.other_ward = make_ward('Nakuru', 'Gilgil')
+        self.school = make_school(self.ward, 'S1')
+        self.literacy = Subject.objects.create(name='Literacy', grade_level='LowerPrimary', is_compulsory=True)
+        make_learner(self.school, 'TAKEN', admission_number='ADM-TAKEN')
+
+    def test_imports_valid_rows_and_reports_the_rest(self):
+        uploaded = learner_file(
+            learner_row('BC1', 'A1', 'S1'),
+            learner_row('BC2', 'A2', 'S1', f'Nakuru,Gilgil,{self.other_ward.name}', date_of_birth='01/03/2016'),
+            '',
+            learner_row('TAKEN', 'A3', 'S1'),
+            learner_row('BC1', 'A4', 'S1'),
+            learner_row('BC5', 'ADM-TAKEN', 'S1'),
+            learner_row('BC6', 'A6', 'NOPE'),
+            learner_row('BC7', 'A7', 'S1', 'Nakuru,Naivasha,Nowhere'),
+            learner_row('BC8', 'A8', 'S1', date_of_birth='yesterday'),
+        )
+
+        report = import_learners(uploaded, batch_size=3)
+
+        self.assertEqual((report.rows, report.created, report.failed_rows), (8, 2, 6))
+        self.assertEqual(
+            [(row, column) for row, column, _ in report.errors],
+            [(5, 'birth_certificate_number'), (6, 'birth_certificate_number'), (7, 'admission_number'),
+             (8, 'school_code'), (9, 'ward'), (10, 'date_of_birth')],
+        )
+        second = Learner.objects.get(birth_certificate_number='BC2')
+        self.assertEqual((second.ward_id, second.date_of_birth), (self.other_ward.pk, date(2016, 3, 1)))
+        self.assertEqual(list(second.subjects.all()), [self.literacy])
+        # bulk_create skips the signals; the importer applies the deltas.
+        self.assertEqual(get_summary('county', self.school.county_id)['learners'], 3)
+
+    def test_dry_run_and_fixed_school(self):
+        uploaded = learner_file(learner_row('BC1', 'A1', 'NOPE'))
+        self.assertEqual(import_learners(uploaded, school=self.school, dry_run=True).created, 1)
+        self.assertFalse(Learner.objects.filter(birth_certificate_number='BC1').exists())
+
+        uploaded.seek(0)
+        import_learners(uploaded, school=self.school)
+        self.assertEqual(Learner.objects.get(birth_certificate_number='BC1').school, self.school)
+
+    def test_unreadable_files(self):
+        for uploaded, message in [
+            (learner_file(name='learners.txt'), "Upload a .csv or .xlsx file."),
+            (SimpleUploadedFile('learners.csv', b''), "The file is empty."),
+            (learner_file(header='first_name,last_name'), "Missing column(s): birth_certificate_number"),
+        ]:
+            with self.assertRaisesMessage(LearnerImportError, message):
+                import_learners(uploaded)
+
+    def test_view(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        url = reverse('learners:import_learners')
+
+        response = self.client.post(url, {'file': learner_file(learner_row('BC1', 'A1', 'S1'))})
+        self.assertEqual(response.context['report'].created, 1)
+        response = self.client.post(url, {'file': learner_file(name='learners.txt')})
+        self.assertFormError(response.context['form'], 'file', "Upload a .csv or .xlsx file.")
+
+
+# --------------------------
+# Detail cache
+# --------------------------
+
+class DetailCacheTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.school = make_school(make_ward(), 'S1')
+        self.learner = make_learner(self.school, 'BC1', first_name='Akinyi')
+
+    def test_cached_until_the_learner_changes(self):
+        self.assertEqual(get_learner_detail(self.learner.pk).school.name, 'School S1')
+        with self.assertNumQueries(0):
+            self.assertEqual(get_learner_detail(self.learner.pk).first_name, 'Akinyi')
+
+        self.learner.first_name = 'Atieno'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.learner.save()
+        self.assertEqual(get_learner_detail(self.learner.pk).first_name, 'Atieno')
+
+        subject = Subject.objects.create(name='Art', grade_level='LowerPrimary')
+        with self.captureOnCommitCallbacks(execute=True):
+            subject.learners.add(self.learner)
+        self.assertEqual(list(get_learner_detail(self.learner.pk).subjects.all()), [subject])
+
+        # Writes that skip the signals invalidate explicitly.
+        Learner.objects.filter(pk=self.learner.pk).update(first_name='Awino')
+        self.assertEqual(get_learner_detail(self.learner.pk).first_name, 'Atieno')
+        invalidate_learners([self.learner.pk])
+        self.assertEqual(get_learner_detail(self.learner.pk).first_name, 'Awino')
+
+    def test_related_changes_invalidate_every_learner(self):
+        get_learner_detail(self.learner.pk)
+        self.school.name = 'Naivasha Primary'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.school.save()
+        self.assertEqual(get_learner_detail(self.learner.pk).school.name, 'Naivasha Primary')
+        self.assertIsNone(get_learner_detail(999999))
@@ -6,6 +6,19 @@ app_name = 'learners'
 urlpatterns = [
     path('', views.learner_list, name='learner_list'),
     path('add/', views.add_learner, name='add_learner'),
-    path('<int:pk>/', views.learner_detail, name='learner_detail'),
-    path('<int:pk>/edit/', views.edit_learner, name='edit_learner'),
+    path('import/', views.import_learners_view, name='import_learners'),
+    path('id/<int:pk>/', views.learner_detail, name='learner_detail'),
+    path('id/<int:pk>/edit/', views.edit_learner, name='edit_learner'),
+    # Links by birth certificate number redirect to the id pages. Ids have
+    # their own prefix: most birth certificate numbers are all digits, so
+    # an unprefixed id would take over the old link of another learner.
+    path('bcn/<str:birth_certificate_number>/', views.legacy_learner_redirect,
+         {'view_name': 'learners:learner_detail'}, name='legacy_learner_detail'),
+    path('bcn/<str:birth_certificate_number>/edit/', views.legacy_learner_redirect,
+         {'view_name': 'learners:edit_learner'}, name='legacy_edit_learner'),
+    # Old unprefixed links.
+    path('<str:birth_certificate_number>/', views.legacy_learner_redirect,
+         {'view_name': 'learners:learner_detail'}),
+    path('<str:birth_certificate_number>/edit/', views.legacy_learner_redirect,
+         {'view_name': 'learners:edit_learner'}),
 ]
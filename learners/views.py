@@ -1,9 +1,37 @@
+from django.http import Http404, HttpResponseBadRequest
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse_lazy
+from .detail_cache import get_learner_detail
 from .models import Learner
-from .forms import LearnerForm
+from .forms import LearnerForm, LearnerSearchForm, LearnerUploadForm
+from .importers import COLUMNS, LearnerImportError, import_learners
+from .search import search_learners
+from subjects.enrollment import enroll_compulsory
 from utils.decorators import role_required
+from utils.exports import export_csv
+from utils.pagination import InvalidCursor
+
+
+LEARNER_EXPORT_COLUMNS = [
+    ('Birth Certificate No.', 'birth_certificate_number'),
+    ('Admission No.', 'admission_number'),
+    ('First Name', 'first_name'),
+    ('Middle Name', 'middle_name'),
+    ('Last Name', 'last_name'),
+    ('Gender', 'gender'),
+    ('Date of Birth', 'date_of_birth'),
+    ('Grade', 'grade'),
+    ('Year', 'year'),
+    ('School Code', 'school__code'),
+    ('School', 'school__name'),
+    ('County', 'county__name'),
+    ('Sub County', 'sub_county__name'),
+    ('Ward', 'ward__name'),
+    ('Parent/Guardian', 'parent_full_name'),
+    ('Parent Contact', 'parent_contact'),
+    ('Relationship', 'relationship_to_learner'),
+]
 
 
 # --------------------------
@@ -13,25 +41,49 @@ from utils.decorators import role_required
 @role_required(['teacher', 'school_admin', 'subcounty_director', 'county_director', 'cabinet_secretary'])
 def learner_list(request):
     """
-    List all learners.
+    List all active (not graduated) learners.
     School-level users see learners in their school only.
     Higher-level users see all learners.
+    ?export=csv streams the same learners as a CSV download.
+    ?query= searches the learner index (see learners/search.py), limited to
+    the user's school, or county / sub county for directors, a page at a time.
     """
     user_profile = getattr(request.user, 'teacher_profile', None)
     school_admin_profile = getattr(request.user, 'school_admin_profile', None)
+    school = None
 
     if user_profile:
         school = user_profile.school
-        learners = Learner.objects.filter(school=school).order_by('grade', 'last_name', 'first_name')
+        learners = Learner.objects.filter(school=school, status=Learner.ACTIVE).order_by('grade', 'last_name', 'first_name')
     elif school_admin_profile:
         school = school_admin_profile.school
-        learners = Learner.objects.filter(school=school).order_by('grade', 'last_name', 'first_name')
+        learners = Learner.objects.filter(school=school, status=Learner.ACTIVE).order_by('grade', 'last_name', 'first_name')
     else:
-        learners = Learner.objects.all().order_by('school', 'grade', 'last_name', 'first_name')
+        learners = Learner.objects.filter(status=Learner.ACTIVE).order_by('school', 'grade', 'last_name', 'first_name')
+
+    if request.GET.get('export') == 'csv':
+        return export_csv(learners, LEARNER_EXPORT_COLUMNS, 'learners.csv')
+
+    search_form = LearnerSearchForm(request.GET)
+    page = None
+    if search_form.is_valid() and search_form.cleaned_data.get('query'):
+        try:
+            page = search_learners(
+                search_form.cleaned_data['query'],
+                school=school,
+                county=getattr(request.user, 'county', None) if school is None else None,
+                sub_county=getattr(request.user, 'subcounty', None) if school is None else None,
+                cursor=request.GET.get('cursor'),
+            )
+        except InvalidCursor:
+            return HttpResponseBadRequest("Invalid cursor.")
+        learners = page.object_list
 
     context = {
         'dashboard_title': "Learners",
         'learners': learners,
+        'search_form': search_form,
+        'page': page,
         'breadcrumb': [
             {"name": "Home", "url": reverse_lazy('home:home')},
             {"name": "Learners", "url": '#'}
@@ -49,14 +101,17 @@ def learner_detail(request, pk):
     """
     Show detailed info for a single learner.
     Restrict access for school-level users.
+    The learner and everything shown with it come from the detail cache.
     """
-    learner = get_object_or_404(Learner, pk=pk)
+    learner = get_learner_detail(pk)
+    if learner is None:
+        raise Http404("No learner with that id.")
 
     # School-level access check
     user_profile = getattr(request.user, 'teacher_profile', None)
     school_admin_profile = getattr(request.user, 'school_admin_profile', None)
     user_school = getattr(user_profile or school_admin_profile, 'school', None)
-    if user_school and learner.school != user_school:
+    if user_school and learner.school_id != user_school.pk:
         return redirect('learners:learner_list')
 
     context = {
@@ -80,6 +135,7 @@ def add_learner(request):
     """
     Add a new learner.
     School-level users auto-assign learners to their school.
+    The learner is enrolled in the compulsory subjects of their grade.
     """
     user_profile = getattr(request.user, 'teacher_profile', None)
     school_admin_profile = getattr(request.user, 'school_admin_profile', None)
@@ -93,6 +149,8 @@ def add_learner(request):
             elif school_admin_profile:
                 learner.school = school_admin_profile.school
             learner.save()
+            form.save_m2m()
+            enroll_compulsory(learner_ids=[learner.pk])
             return redirect('learners:learner_list')
     else:
         form = LearnerForm()
@@ -109,6 +167,49 @@ def add_learner(request):
     return render(request, 'learners/add_learner.html', context)
 
 
+# --------------------------
+# Bulk Import Learners
+# --------------------------
+@login_required
+@role_required(['teacher', 'school_admin', 'subcounty_director', 'county_director', 'cabinet_secretary'])
+def import_learners_view(request):
+    """
+    Import learners from a CSV/XLSX file and show a per-row error report.
+    School-level users import into their own school; other users must
+    give a school_code for every row.
+    """
+    user_profile = getattr(request.user, 'teacher_profile', None)
+    school_admin_profile = getattr(request.user, 'school_admin_profile', None)
+    school = getattr(user_profile or school_admin_profile, 'school', None)
+
+    report = None
+    if request.method == 'POST':
+        form = LearnerUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = import_learners(
+                    form.cleaned_data['file'], school=school, dry_run=form.cleaned_data['dry_run']
+                )
+            except LearnerImportError as e:
+                form.add_error('file', str(e))
+    else:
+        form = LearnerUploadForm()
+
+    context = {
+        'dashboard_title': "Import Learners",
+        'form': form,
+        'report': report,
+        'school': school,
+        'columns': COLUMNS,
+        'breadcrumb': [
+            {"name": "Home", "url": reverse_lazy('home:home')},
+            {"name": "Learners", "url": reverse_lazy('learners:learner_list')},
+            {"name": "Import Learners", "url": '#'}
+        ]
+    }
+    return render(request, 'learners/import_learners.html', context)
+
+
 # --------------------------
 # Edit Learner
 # --------------------------
@@ -130,7 +231,8 @@ def edit_learner(request, pk):
     if request.method == 'POST':
         form = LearnerForm(request.POST, request.FILES, instance=learner)
         if form.is_valid():
-            form.save()
+            learner = form.save()
+            enroll_compulsory(learner_ids=[learner.pk])
             return redirect('learners:learner_list')
     else:
         form = LearnerForm(instance=learner)
@@ -145,3 +247,17 @@ def edit_learner(request, pk):
         ]
     }
     return render(request, 'learners/add_learner.html', context)
+
+
+# --------------------------
+# Legacy Learner Links
+# --------------------------
+@login_required
+@role_required(['teacher', 'school_admin', 'subcounty_director', 'county_director', 'cabinet_secretary'])
+def legacy_learner_redirect(request, birth_certificate_number, view_name):
+    """
+    Learner links used to carry the birth certificate number; send them to
+    the page for the learner's id.
+    """
+    learner = get_object_or_404(Learner.objects.only('pk'), birth_certificate_number=birth_certificate_number)
+    return redirect(view_name, pk=learner.pk, permanent=True)
@@ -0,0 +1,275 @@
+"""
+Teacher workload and pupil-teacher ratios for an academic year.
+
+compute_analytics() reads what it needs in seven queries (schools,
+teachers, the year's subject assignments, streams, active learners
+counted per school and grade, counties, subcounties) and does the rest
+with NumPy over whole columns, never per teacher or per school:
+
+- lessons per teacher: the weekly lessons of every subject they teach
+  (Subject.lessons_per_week), summed over their assignments;
+- streams per teacher: distinct streams among their assignments;
+- learners per teacher: learners in those streams. Learners are not
+  linked to streams, so a stream's learners are its school's active
+  learners of that grade shared evenly between the grade's streams;
+- pupil-teacher ratio, and teachers needed to bring it down to
+  settings.ANALYTICS['TARGET_PTR'], per school, subcounty, county and
+  nationally.
+
+get_analytics() caches the result per year for ANALYTICS['TIMEOUT']
+seconds, which bounds how stale it can be; learner and staff changes are
+too frequent to invalidate it on every write.
+
+Usage:
+    analytics = get_analytics(2025)
+    analytics.scope_rows('county')              # ratios per county
+    analytics.teacher_rows(county_id=county.pk)  # workload per teacher
+"""
+from datetime import date
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Count
+
+from learners.models import Learner
+from location.models import County, SubCounty
+from schools.models import School
+from teachers.models import Stream, SubjectAssignment, Teacher
+
+
+DEFAULTS = {
+    'TARGET_PTR': 40,
+    'TIMEOUT': 3600,
+}
+
+CACHE_KEY = 'reports:analytics:v2:{}'
+
+LEVELS = ('school', 'subcounty', 'county', 'national')
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'ANALYTICS', {})}
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImproperlyConfigured("Teacher analytics require numpy (pip install numpy).")
+    return numpy
+
+
+def _index(np, ids, values):
+    """
+    Positions of `values` in the sorted id array `ids`; -1 where missing.
+    """
+    values = np.asarray(values, dtype=np.int64)
+    if not len(ids):
+        return np.full(len(values), -1, dtype=np.int64)
+    positions = np.searchsorted(ids, values).clip(max=len(ids) - 1)
+    return np.where(ids[positions] == values, positions, -1)
+
+
+def _matches(np, positions, ids, pk):
+    """
+    Which `positions` (into the sorted id array `ids`) are the position of
+    `pk`; none when `pk` is not in `ids`.
+    """
+    position = _index(np, ids, [pk])[0]
+    return (positions == position) & (position >= 0)
+
+
+def _bincount(np, index, weights, size):
+    keep = index >= 0
+    return np.bincount(index[keep], weights=None if weights is None else weights[keep], minlength=size)
+
+
+class Analytics:
+    """
+    Workload and staffing figures for one year, as NumPy columns aligned
+    with the id arrays (teacher_ids, school_ids, ...).
+    """
+
+    def __init__(self, year, target_ptr):
+        self.year = year
+        self.target_ptr = target_ptr
+
+    # --------------------------
+    # Rows for templates and exports
+    # --------------------------
+
+    def scope_rows(self, level, county_id=None, sub_county_id=None):
+        """
+        [{'id', 'code', 'name', 'teachers', 'learners', 'ptr', 'teachers_needed'}]
+        for every school, subcounty or county (or the national row), in
+        name order. `county_id` or `sub_county_id` keeps only the rows
+        within that county or subcounty.
+        """
+        np = _numpy()
+        scope = self.scopes[level]
+        keep = np.ones(len(scope['ids']), dtype=bool)
+        if county_id is not None and level != 'national':
+            keep &= _matches(np, scope['county'], self.county_ids, county_id)
+        if sub_county_id is not None:
+            if level not in ('school', 'subcounty'):
+                raise ValueError(f"No {level} rows lie within one subcounty.")
+            keep &= _matches(np, scope['subcounty'], self.subcounty_ids, sub_county_id)
+        rows = [
+            {
+                'id': int(scope['ids'][i]),
+                'code': scope['codes'][i],
+                'name': scope['names'][i],
+                'teachers': int(scope['teachers'][i]),
+                'learners': int(scope['learners'][i]),
+                'ptr': None if np.isnan(scope['ptr'][i]) else round(float(scope['ptr'][i]), 1),
+                'teachers_needed': int(scope['needed'][i]),
+            }
+            for i in np.flatnonzero(keep)
+        ]
+        return sorted(rows, key=lambda row: row['name'])
+
+    def scope_row(self, level, pk=None):
+        rows = self.scope_rows(level)
+        return next((row for row in rows if level == 'national' or row['id'] == pk), None)
+
+    def teacher_rows(self, county_id=None, sub_county_id=None, school_id=None):
+        """
+        (tsc number, name, school code, school name, lessons, streams, learners)
+        per teacher, optionally for one county, subcounty or school.
+        """
+        np = _numpy()
+        keep = self.teacher_school >= 0
+        if county_id is not None:
+            keep &= _matches(np, self.school_county[self.teacher_school], self.county_ids, county_id)
+        if sub_county_id is not None:
+            keep &= _matches(np, self.school_subcounty[self.teacher_school], self.subcounty_ids, sub_county_id)
+        if school_id is not None:
+            keep &= self.teacher_school == _index(np, self.school_ids, [school_id])[0]
+        schools = self.scopes['school']
+        for i in np.flatnonzero(keep):
+            school = self.teacher_school[i]
+            yield (
+                self.teacher_tsc[i], self.teacher_names[i], schools['codes'][school], schools['names'][school],
+                int(self.lessons[i]), int(self.streams[i]), int(round(self.learners[i])),
+            )
+
+
+# --------------------------
+# Computing
+# --------------------------
+
+def _scope(np, ids, codes, names, teachers, learners, target_ptr, county=None, subcounty=None):
+    ptr = np.divide(learners, teachers, out=np.full(len(ids), np.nan), where=teachers > 0)
+    needed = np.maximum(np.ceil(learners / target_ptr) - teachers, 0)
+    return {
+        'ids': ids, 'codes': codes, 'names': names, 'county': county, 'subcounty': subcounty,
+        'teachers': teachers, 'learners': learners, 'ptr': ptr, 'needed': needed,
+    }
+
+
+def compute_analytics(year=None):
+    np = _numpy()
+    year = year or date.today().year
+    target_ptr = _config()['TARGET_PTR']
+    result = Analytics(year, target_ptr)
+
+    # Schools and the location tree, in id order.
+    schools = list(School.objects.order_by('pk').values_list('pk', 'code', 'name', 'county_id', 'sub_county_id'))
+    counties = list(County.objects.order_by('pk').values_list('pk', 'name'))
+    subcounties = list(SubCounty.objects.order_by('pk').values_list('pk', 'name', 'county_id'))
+    school_ids = np.array([row[0] for row in schools], dtype=np.int64)
+    result.school_ids = school_ids
+    result.county_ids = county_ids = np.array([row[0] for row in counties], dtype=np.int64)
+    result.subcounty_ids = subcounty_ids = np.array([row[0] for row in subcounties], dtype=np.int64)
+    result.school_county = _index(np, county_ids, [row[3] for row in schools])
+    result.school_subcounty = school_subcounty = _index(np, subcounty_ids, [row[4] for row in schools])
+    subcounty_county = _index(np, county_ids, [row[2] for row in subcounties])
+
+    # Teachers.
+    teachers = list(Teacher.objects.order_by('pk').values_list(
+        'pk', 'school_id', 'tsc_number', 'user__first_name', 'user__last_name',
+    ))
+    result.teacher_ids = teacher_ids = np.array([row[0] for row in teachers], dtype=np.int64)
+    result.teacher_school = _index(np, school_ids, [row[1] for row in teachers])
+    result.teacher_tsc = [row[2] for row in teachers]
+    result.teacher_names = [f"{row[3]} {row[4]}".strip() for row in teachers]
+
+    # Learners per stream: (school, grade) learners shared between its streams.
+    grades = {grade: code for code, (grade, _) in enumerate(Learner.GRADE_CHOICES)}
+    size = len(school_ids) * len(grades)
+
+    def school_grade_key(school_values, grade_values):
+        school = _index(np, school_ids, school_values)
+        grade = np.array([grades.get(value, -1) for value in grade_values], dtype=np.int64)
+        return np.where((school >= 0) & (grade >= 0), school * len(grades) + grade, -1)
+
+    streams = list(Stream.objects.order_by('pk').values_list('pk', 'school_id', 'grade'))
+    stream_ids = np.array([row[0] for row in streams], dtype=np.int64)
+    stream_key = school_grade_key([row[1] for row in streams], [row[2].strip() for row in streams])
+    groups = list(
+        Learner.objects.filter(status=Learner.ACTIVE).order_by()
+        .values_list('school_id', 'grade').annotate(n=Count('pk'))
+    )
+    group_school = _index(np, school_ids, [row[0] for row in groups])
+    group_n = np.array([row[2] for row in groups], dtype=np.float64)
+    key_learners = _bincount(np, school_grade_key([row[0] for row in groups], [row[1] for row in groups]), group_n, size)
+    key_streams = _bincount(np, stream_key, None, size)
+    stream_learners = np.zeros(len(stream_ids))
+    known = stream_key >= 0
+    stream_learners[known] = key_learners[stream_key[known]] / key_streams[stream_key[known]]
+
+    # Per-teacher workload from the year's assignments.
+    assignments = list(SubjectAssignment.objects.filter(year=year).order_by().values_list(
+        'teacher_id', 'stream_id', 'subject__lessons_per_week',
+    ))
+    a_teacher = _index(np, teacher_ids, [row[0] for row in assignments])
+    a_stream = _index(np, stream_ids, [row[1] for row in assignments])
+    a_lessons = np.array([row[2] for row in assignments], dtype=np.float64)
+    result.lessons = _bincount(np, a_teacher, a_lessons, len(teacher_ids))
+    n_streams = max(len(stream_ids), 1)
+    pairs = np.unique((a_teacher * n_streams + a_stream)[(a_teacher >= 0) & (a_stream >= 0)])
+    pair_teacher, pair_stream = pairs // n_streams, pairs % n_streams
+    result.streams = np.bincount(pair_teacher, minlength=len(teacher_ids))
+    result.learners = np.bincount(pair_teacher, weights=stream_learners[pair_stream], minlength=len(teacher_ids))
+
+    # Pupil-teacher ratios, rolled up school -> subcounty -> county -> national.
+    school_teachers = _bincount(np, result.teacher_school, None, len(school_ids)).astype(np.float64)
+    school_learners = _bincount(np, group_school, group_n, len(school_ids))
+    sub_teachers = _bincount(np, school_subcounty, school_teachers, len(subcounty_ids))
+    sub_learners = _bincount(np, school_subcounty, school_learners, len(subcounty_ids))
+    county_teachers = _bincount(np, result.school_county, school_teachers, len(county_ids))
+    county_learners = _bincount(np, result.school_county, school_learners, len(county_ids))
+    result.scopes = {
+        'school': _scope(
+            np, school_ids, [row[1] for row in schools], [row[2] for row in schools],
+            school_teachers, school_learners, target_ptr, county=result.school_county, subcounty=school_subcounty,
+        ),
+        'subcounty': _scope(
+            np, subcounty_ids, [''] * len(subcounties), [row[1] for row in subcounties],
+            sub_teachers, sub_learners, target_ptr, county=subcounty_county,
+            subcounty=np.arange(len(subcounty_ids)),
+        ),
+        'county': _scope(
+            np, county_ids, [''] * len(counties), [row[1] for row in counties],
+            county_teachers, county_learners, target_ptr, county=np.arange(len(county_ids)),
+        ),
+        'national': _scope(
+            np, np.zeros(1, dtype=np.int64), [''], ['National'],
+            np.array([school_teachers.sum()]), np.array([school_learners.sum()]), target_ptr,
+        ),
+    }
+    return result
+
+
+def get_analytics(year=None):
+    """
+    The year's Analytics, from the cache when it was computed recently.
+    """
+    year = year or date.today().year
+    key = CACHE_KEY.format(year)
+    result = cache.get(key)
+    if result is None:
+        result = compute_analytics(year)
+        cache.set(key, result, timeout=_config()['TIMEOUT'])
+    return result
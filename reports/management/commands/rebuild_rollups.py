@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reports.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Rebuild the national, county, subcounty and ward rollup tables from scratch"
+
+    def handle(self, *args, **options):
+        self.stdout.write(self.style.NOTICE("Rebuilding geographic rollups..."))
+
+        rows = rebuild_rollups()
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Successfully rebuilt {rows} rollup rows")
+        )
@@ -0,0 +1,51 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:25
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('location', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GeoRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('scope_key', models.CharField(max_length=40, unique=True)),
+                ('level', models.CharField(choices=[('national', 'National'), ('county', 'County'), ('subcounty', 'Subcounty'), ('ward', 'Ward')], max_length=20)),
+                ('schools', models.IntegerField(default=0)),
+                ('teachers', models.IntegerField(default=0)),
+                ('learners', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('county', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='location.county')),
+                ('sub_county', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='location.subcounty')),
+                ('ward', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='rollups', to='location.ward')),
+            ],
+            options={
+                'verbose_name': 'Geographic Rollup',
+                'verbose_name_plural': 'Geographic Rollups',
+                'ordering': ['level', 'scope_key'],
+            },
+        ),
+        migrations.CreateModel(
+            name='GradeRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('grade', models.CharField(choices=[('PP1', 'PP1'), ('PP2', 'PP2'), ('Grade 1', 'Grade 1'), ('Grade 2', 'Grade 2'), ('Grade 3', 'Grade 3'), ('Grade 4', 'Grade 4'), ('Grade 5', 'Grade 5'), ('Grade 6', 'Grade 6'), ('Grade 7', 'Grade 7'), ('Grade 8', 'Grade 8'), ('Grade 9', 'Grade 9'), ('Grade 10', 'Grade 10'), ('Grade 11', 'Grade 11'), ('Grade 12', 'Grade 12')], max_length=20)),
+                ('gender', models.CharField(choices=[('M', 'Male'), ('F', 'Female'), ('O', 'Other')], max_length=1)),
+                ('learners', models.IntegerField(default=0)),
+                ('rollup', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='grades', to='reports.georollup')),
+            ],
+            options={
+                'verbose_name': 'Grade Rollup',
+                'verbose_name_plural': 'Grade Rollups',
+                'unique_together': {('rollup', 'grade', 'gender')},
+            },
+        ),
+    ]
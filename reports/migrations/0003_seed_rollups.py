@@ -0,0 +1,76 @@
+from collections import Counter, defaultdict
+
+from django.db import migrations
+from django.db.models import Count
+
+
+def seed_rollups(apps, schema_editor):
+    """
+    Build the rollup rows from the existing schools, teachers and active
+    learners, as reports.rollups.rebuild_rollups() does: the signal
+    handlers only apply deltas, which on an upgraded database would start
+    from zero. Written against the historical models so later changes to
+    reports/rollups.py don't change what this migration does.
+    """
+    School = apps.get_model('schools', 'School')
+    Teacher = apps.get_model('teachers', 'Teacher')
+    Learner = apps.get_model('learners', 'Learner')
+    GeoRollup = apps.get_model('reports', 'GeoRollup')
+    GradeRollup = apps.get_model('reports', 'GradeRollup')
+
+    def scopes(county_id, sub_county_id, ward_id):
+        return [
+            ('national', {'level': 'national'}),
+            (f'county:{county_id}', {'level': 'county', 'county_id': county_id}),
+            (f'subcounty:{sub_county_id}', {
+                'level': 'subcounty', 'county_id': county_id, 'sub_county_id': sub_county_id,
+            }),
+            (f'ward:{ward_id}', {
+                'level': 'ward', 'county_id': county_id, 'sub_county_id': sub_county_id, 'ward_id': ward_id,
+            }),
+        ]
+
+    totals = defaultdict(lambda: [0, 0, 0])
+    grades = Counter()
+    fields = {}
+    counts = [
+        (0, School.objects.values_list('county_id', 'sub_county_id', 'ward_id')),
+        (1, Teacher.objects.values_list('school__county_id', 'school__sub_county_id', 'school__ward_id')),
+        (2, Learner.objects.filter(status='active').values_list(
+            'school__county_id', 'school__sub_county_id', 'school__ward_id', 'grade', 'gender',
+        )),
+    ]
+    for column, rows in counts:
+        for *row, n in rows.order_by().annotate(n=Count('pk')):
+            location, grade_gender = row[:3], row[3:]
+            for key, values in scopes(*location):
+                fields[key] = values
+                totals[key][column] += n
+                if grade_gender:
+                    grades[(key, *grade_gender)] += n
+
+    GradeRollup.objects.all().delete()
+    GeoRollup.objects.all().delete()
+    rollups = GeoRollup.objects.bulk_create([
+        GeoRollup(scope_key=key, schools=s, teachers=t, learners=l, **fields[key])
+        for key, (s, t, l) in totals.items()
+    ], batch_size=500)
+    rollup_ids = {rollup.scope_key: rollup.id for rollup in rollups}
+    GradeRollup.objects.bulk_create([
+        GradeRollup(rollup_id=rollup_ids[key], grade=grade, gender=gender, learners=n)
+        for (key, grade, gender), n in grades.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_dataversion'),
+        ('schools', '0002_school_indexes'),
+        ('teachers', '0004_one_class_teacher_per_stream_year'),
+        ('learners', '0006_duplicate_candidate'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_rollups, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,83 @@
 from django.db import models
 
-# Create your models here.
+from location.models import County, SubCounty, Ward
+from learners.models import Learner
+
+
+class GeoRollup(models.Model):
+    """
+    Precomputed school, teacher and learner totals for one geographic scope.
+
+    There is one row per ward, subcounty and county plus a single national
+    row. Rows are kept current by the signal handlers in reports/signals.py
+    and can be rebuilt from scratch with `manage.py rebuild_rollups`.
+    """
+
+    LEVEL_CHOICES = [
+        ('national', 'National'),
+        ('county', 'County'),
+        ('subcounty', 'Subcounty'),
+        ('ward', 'Ward'),
+    ]
+
+    # e.g. "national", "county:12", "subcounty:140", "ward:1021"
+    scope_key = models.CharField(max_length=40, unique=True)
+    level = models.CharField(max_length=20, choices=LEVEL_CHOICES)
+
+    county = models.ForeignKey(County, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    sub_county = models.ForeignKey(SubCounty, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+    ward = models.ForeignKey(Ward, on_delete=models.CASCADE, null=True, blank=True, related_name='rollups')
+
+    schools = models.IntegerField(default=0)
+    teachers = models.IntegerField(default=0)
+    learners = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['level', 'scope_key']
+        verbose_name = 'Geographic Rollup'
+        verbose_name_plural = 'Geographic Rollups'
+
+    def __str__(self):
+        return f"{self.scope_key}: {self.schools} schools, {self.teachers} teachers, {self.learners} learners"
+
+
+class GradeRollup(models.Model):
+    """
+    Learner count for one grade and gender inside a GeoRollup scope.
+    """
+
+    rollup = models.ForeignKey(GeoRollup, on_delete=models.CASCADE, related_name='grades')
+    grade = models.CharField(max_length=20, choices=Learner.GRADE_CHOICES)
+    gender = models.CharField(max_length=1, choices=Learner.GENDER_CHOICES)
+    learners = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ('rollup', 'grade', 'gender')
+        verbose_name = 'Grade Rollup'
+        verbose_name_plural = 'Grade Rollups'
+
+    def __str__(self):
+        return f"{self.rollup.scope_key} {self.grade}/{self.gender}: {self.learners}"
+
+
+class DataVersion(models.Model):
+    """
+    Monotonic change counter for one dashboard scope.
+
+    Bumped whenever data behind the scope changes (see reports/versions.py),
+    so dashboard APIs can answer conditional GETs from this row alone.
+    Scope keys follow GeoRollup.scope_key, plus "school:<id>" and "teacher:<id>".
+    """
+
+    scope_key = models.CharField(max_length=40, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = 'Data Version'
+        verbose_name_plural = 'Data Versions'
+
+    def __str__(self):
+        return f"{self.scope_key} v{self.version}"
@@ -0,0 +1,236 @@
+"""
+Geographic rollups for the national, county and subcounty dashboards.
+
+Every School, Teacher and active Learner counts towards four GeoRollup
+rows: its ward, its subcounty, its county and the national row. Teachers
+and learners are placed by the location of their school. Changes are applied as deltas
+(see reports/signals.py) so dashboards read a handful of rows instead of
+counting the underlying tables on every page view.
+"""
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from learners.models import Learner
+from schools.models import School
+from teachers.models import Teacher
+
+from .models import GeoRollup, GradeRollup
+from . import versions
+
+
+NATIONAL_KEY = 'national'
+
+
+def scope_key(level, pk=None):
+    """
+    Build the GeoRollup.scope_key for a level and object id.
+    """
+    if level == 'national':
+        return NATIONAL_KEY
+    return f"{level}:{pk}"
+
+
+def _scopes_for(location):
+    """
+    Return (scope_key, row fields) for every scope a
+    (county_id, sub_county_id, ward_id) location rolls up into.
+    """
+    county_id, sub_county_id, ward_id = location
+    return [
+        (NATIONAL_KEY, {'level': 'national'}),
+        (scope_key('county', county_id), {
+            'level': 'county', 'county_id': county_id,
+        }),
+        (scope_key('subcounty', sub_county_id), {
+            'level': 'subcounty', 'county_id': county_id, 'sub_county_id': sub_county_id,
+        }),
+        (scope_key('ward', ward_id), {
+            'level': 'ward', 'county_id': county_id, 'sub_county_id': sub_county_id, 'ward_id': ward_id,
+        }),
+    ]
+
+
+def school_location(school_id):
+    """
+    Return the (county_id, sub_county_id, ward_id) of a school, or None.
+    """
+    if school_id is None:
+        return None
+    return School.objects.filter(pk=school_id).values_list(
+        'county_id', 'sub_county_id', 'ward_id'
+    ).first()
+
+
+def _aggregate(schools, teachers, learners):
+    """
+    Expand location-keyed deltas into per-scope totals and grade/gender deltas.
+    """
+    totals = defaultdict(lambda: [0, 0, 0])
+    grades = Counter()
+    fields = {}
+
+    for column, deltas in ((0, schools), (1, teachers)):
+        for location, delta in (deltas or {}).items():
+            for key, values in _scopes_for(location):
+                fields[key] = values
+                totals[key][column] += delta
+
+    for (location, grade, gender), delta in (learners or {}).items():
+        for key, values in _scopes_for(location):
+            fields[key] = values
+            totals[key][2] += delta
+            grades[(key, grade, gender)] += delta
+
+    return totals, grades, fields
+
+
+def apply_deltas(schools=None, teachers=None, learners=None):
+    """
+    Add deltas to the rollup rows, creating missing rows as needed.
+
+    `schools` and `teachers` map a (county_id, sub_county_id, ward_id)
+    location to a count delta; `learners` maps (location, grade, gender)
+    to a count delta. Scopes sharing the same delta are updated with one
+    UPDATE, so a single learner save costs a constant number of queries.
+    """
+    totals, grades, fields = _aggregate(schools, teachers, learners)
+    grades = {key: delta for key, delta in grades.items() if delta}
+    touched = {key for key, values in totals.items() if any(values)}
+    touched.update(key for key, _, _ in grades)
+    if not touched:
+        return
+
+    with transaction.atomic():
+        GeoRollup.objects.bulk_create(
+            [GeoRollup(scope_key=key, **fields[key]) for key in touched],
+            ignore_conflicts=True,
+        )
+
+        now = timezone.now()
+        by_delta = defaultdict(list)
+        for key in touched:
+            by_delta[tuple(totals[key])].append(key)
+        for (d_schools, d_teachers, d_learners), keys in by_delta.items():
+            GeoRollup.objects.filter(scope_key__in=keys).update(
+                schools=F('schools') + d_schools,
+                teachers=F('teachers') + d_teachers,
+                learners=F('learners') + d_learners,
+                updated_at=now,
+            )
+        versions.bump(*touched)
+
+        if not grades:
+            return
+
+        rollup_ids = dict(
+            GeoRollup.objects.filter(
+                scope_key__in={key for key, _, _ in grades}
+            ).values_list('scope_key', 'id')
+        )
+        GradeRollup.objects.bulk_create(
+            [
+                GradeRollup(rollup_id=rollup_ids[key], grade=grade, gender=gender)
+                for key, grade, gender in grades
+            ],
+            ignore_conflicts=True,
+        )
+
+        by_delta = defaultdict(list)
+        for (key, grade, gender), delta in grades.items():
+            by_delta[(delta, grade, gender)].append(rollup_ids[key])
+        for (delta, grade, gender), ids in by_delta.items():
+            GradeRollup.objects.filter(
+                rollup_id__in=ids, grade=grade, gender=gender
+            ).update(learners=F('learners') + delta)
+
+
+@transaction.atomic
+def rebuild_rollups():
+    """
+    Recompute every rollup row from the School, Teacher and Learner tables.
+
+    Uses one grouped query per table; returns the number of GeoRollup rows written.
+    """
+    schools = Counter()
+    for row in School.objects.order_by().values(
+        'county_id', 'sub_county_id', 'ward_id'
+    ).annotate(n=Count('id')):
+        schools[(row['county_id'], row['sub_county_id'], row['ward_id'])] += row['n']
+
+    teachers = Counter()
+    for row in Teacher.objects.order_by().values(
+        'school__county_id', 'school__sub_county_id', 'school__ward_id'
+    ).annotate(n=Count('id')):
+        location = (row['school__county_id'], row['school__sub_county_id'], row['school__ward_id'])
+        teachers[location] += row['n']
+
+    learners = Counter()
+    for row in Learner.objects.filter(status=Learner.ACTIVE).order_by().values(
+        'school__county_id', 'school__sub_county_id', 'school__ward_id', 'grade', 'gender'
+    ).annotate(n=Count('pk')):
+        location = (row['school__county_id'], row['school__sub_county_id'], row['school__ward_id'])
+        learners[(location, row['grade'], row['gender'])] += row['n']
+
+    totals, grades, fields = _aggregate(schools, teachers, learners)
+
+    GradeRollup.objects.all().delete()
+    GeoRollup.objects.all().delete()
+
+    rollups = GeoRollup.objects.bulk_create([
+        GeoRollup(scope_key=key, schools=s, teachers=t, learners=l, **fields[key])
+        for key, (s, t, l) in totals.items()
+    ], batch_size=500)
+    rollup_ids = {rollup.scope_key: rollup.id for rollup in rollups}
+
+    GradeRollup.objects.bulk_create([
+        GradeRollup(rollup_id=rollup_ids[key], grade=grade, gender=gender, learners=n)
+        for (key, grade, gender), n in grades.items() if n
+    ], batch_size=500)
+
+    versions.bump_all()
+    versions.bump(*totals)
+    return len(rollups)
+
+
+def get_summary(level, pk=None):
+    """
+    Return the totals for one scope, read from its rollup rows.
+
+    The result has `schools`, `teachers`, `learners`, `updated_at` and a
+    `by_grade` list (in Learner.GRADE_CHOICES order) with per-gender counts.
+    """
+    summary = {'schools': 0, 'teachers': 0, 'learners': 0, 'by_grade': [], 'updated_at': None}
+    if level != 'national' and pk is None:
+        return summary
+
+    rollup = GeoRollup.objects.filter(scope_key=scope_key(level, pk)).first()
+    if rollup is None:
+        return summary
+
+    summary.update({
+        'schools': rollup.schools,
+        'teachers': rollup.teachers,
+        'learners': rollup.learners,
+        'updated_at': rollup.updated_at,
+    })
+
+    counts = defaultdict(dict)
+    for grade, gender, n in rollup.grades.values_list('grade', 'gender', 'learners'):
+        counts[grade][gender] = n
+
+    for grade, label in Learner.GRADE_CHOICES:
+        row = counts.get(grade)
+        if not row or not any(row.values()):
+            continue
+        summary['by_grade'].append({
+            'grade': label,
+            'male': row.get('M', 0),
+            'female': row.get('F', 0),
+            'other': row.get('O', 0),
+            'total': sum(row.values()),
+        })
+
+    return summary
@@ -0,0 +1,165 @@
+"""
+Keep GeoRollup rows current as School, Teacher and Learner rows change.
+
+pre_save stashes the row as it is in the database, post_save applies the
+difference between the old and new contribution, and post_delete removes
+the contribution. The same handlers bump the school and teacher data
+versions used for dashboard ETags. Bulk writes (bulk_create, queryset.update) bypass these
+signals; callers doing bulk writes should apply deltas themselves or run
+`manage.py rebuild_rollups`.
+"""
+from collections import Counter
+
+from django.db.models import Count
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from learners.models import Learner
+from schools.models import School
+from teachers.models import Teacher, ClassAssignment, SubjectAssignment
+
+from . import rollups, versions
+
+
+def _school_contribution(values):
+    if not values:
+        return {}
+    return {'schools': Counter({(values['county_id'], values['sub_county_id'], values['ward_id']): 1})}
+
+
+def _teacher_contribution(values):
+    location = rollups.school_location(values['school_id']) if values else None
+    if not location:
+        return {}
+    return {'teachers': Counter({location: 1})}
+
+
+def _learner_contribution(values):
+    # Graduated learners no longer count towards their school.
+    if not values or values['status'] != Learner.ACTIVE:
+        return {}
+    location = rollups.school_location(values['school_id'])
+    if not location:
+        return {}
+    return {'learners': Counter({(location, values['grade'], values['gender']): 1})}
+
+
+TRACKED = {
+    School: (('county_id', 'sub_county_id', 'ward_id'), _school_contribution),
+    Teacher: (('school_id',), _teacher_contribution),
+    Learner: (('school_id', 'grade', 'gender', 'status'), _learner_contribution),
+}
+
+
+def _current_values(instance):
+    fields, _ = TRACKED[type(instance)]
+    return {field: getattr(instance, field) for field in fields}
+
+
+def _difference(new, old):
+    """
+    Subtract one contribution from another, keyed like apply_deltas().
+    """
+    deltas = {}
+    for name in ('schools', 'teachers', 'learners'):
+        delta = Counter(new.get(name, {}))
+        delta.subtract(old.get(name, {}))
+        delta = Counter({key: n for key, n in delta.items() if n})
+        if delta:
+            deltas[name] = delta
+    return deltas
+
+
+def _school_moved(school_id, old, new):
+    """
+    Move a school's teachers and learners from its old location to the new one.
+    """
+    old = (old['county_id'], old['sub_county_id'], old['ward_id'])
+    new = (new['county_id'], new['sub_county_id'], new['ward_id'])
+
+    deltas = {'teachers': Counter(), 'learners': Counter()}
+    teachers = Teacher.objects.filter(school_id=school_id).count()
+    if teachers:
+        deltas['teachers'].update({old: -teachers, new: teachers})
+
+    for row in Learner.objects.filter(school_id=school_id, status=Learner.ACTIVE).order_by().values(
+        'grade', 'gender'
+    ).annotate(n=Count('pk')):
+        deltas['learners'][(old, row['grade'], row['gender'])] -= row['n']
+        deltas['learners'][(new, row['grade'], row['gender'])] += row['n']
+
+    return deltas
+
+
+@receiver(pre_save, sender=School)
+@receiver(pre_save, sender=Teacher)
+@receiver(pre_save, sender=Learner)
+def stash_previous_row(sender, instance, raw=False, **kwargs):
+    instance._rollup_previous = None
+    if raw or instance.pk is None:
+        return
+    fields, _ = TRACKED[sender]
+    instance._rollup_previous = sender._default_manager.filter(pk=instance.pk).values(*fields).first()
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Learner)
+def update_rollups_on_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_rollup_previous', None)
+    current = _current_values(instance)
+    if previous == current:
+        return
+
+    _, contribution = TRACKED[sender]
+    deltas = _difference(contribution(current), contribution(previous))
+    if sender is School and previous:
+        deltas.update(_school_moved(instance.pk, previous, current))
+    if deltas:
+        rollups.apply_deltas(**deltas)
+
+
+@receiver(post_delete, sender=School)
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Learner)
+def update_rollups_on_delete(sender, instance, **kwargs):
+    _, contribution = TRACKED[sender]
+    deltas = _difference({}, contribution(_current_values(instance)))
+    if deltas:
+        rollups.apply_deltas(**deltas)
+
+
+# --------------------------
+# School / teacher data versions
+# --------------------------
+
+def _school_keys(sender, instance, previous=None):
+    school_ids = {instance.pk if sender is School else instance.school_id}
+    if previous and sender is not School:
+        school_ids.add(previous['school_id'])
+    return [rollups.scope_key('school', pk) for pk in school_ids if pk]
+
+
+@receiver(post_save, sender=School)
+@receiver(post_save, sender=Teacher)
+@receiver(post_save, sender=Learner)
+def bump_school_version_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versions.bump(*_school_keys(sender, instance, getattr(instance, '_rollup_previous', None)))
+
+
+@receiver(post_delete, sender=Teacher)
+@receiver(post_delete, sender=Learner)
+def bump_school_version_on_delete(sender, instance, **kwargs):
+    versions.bump(*_school_keys(sender, instance))
+
+
+@receiver(post_save, sender=ClassAssignment)
+@receiver(post_save, sender=SubjectAssignment)
+@receiver(post_delete, sender=ClassAssignment)
+@receiver(post_delete, sender=SubjectAssignment)
+def bump_teacher_version(sender, instance, raw=False, **kwargs):
+    if not raw:
+        versions.bump(rollups.scope_key('teacher', instance.teacher_id))
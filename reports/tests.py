@@ -1,3 +1,230 @@
-from django.test import TestCase
+from importlib import import_module
 
-# Create your tests here.
+from types import SimpleNamespace
+
+from django.apps import apps
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from learners.models import Learner
+from subjects.models import Subject
+from teachers.models import Stream, SubjectAssignment, Teacher
+from utils.testing import make_learner, make_school, make_teacher, make_user, make_ward
+
+from .analytics import compute_analytics
+from .models import GeoRollup, GradeRollup
+from .rollups import apply_deltas, get_summary, rebuild_rollups, school_location
+from .views import export_scope
+
+
+def snapshot():
+    """
+    Every rollup row's counts, without zero rows: a delta can leave a row
+    at zero where a rebuild writes none.
+    """
+    totals = {
+        key: counts for key, *counts in
+        GeoRollup.objects.values_list('scope_key', 'schools', 'teachers', 'learners')
+        if any(counts)
+    }
+    grades = {
+        (key, grade, gender): n for key, grade, gender, n in
+        GradeRollup.objects.values_list('rollup__scope_key', 'grade', 'gender', 'learners')
+        if n
+    }
+    return totals, grades
+
+
+# --------------------------
+# Rollups
+# --------------------------
+
+class RollupDeltaTests(TestCase):
+    """
+    After any mix of saves and deletes, the rollups kept by the signal
+    handlers match a rebuild from the tables.
+    """
+
+    def setUp(self):
+        self.ward = make_ward('Nakuru', 'Naivasha')
+        self.other_ward = make_ward('Kisumu', 'Kisumu East')
+        self.school = make_school(self.ward, 'S1')
+        self.other_school = make_school(self.other_ward, 'S2')
+
+    def assertMatchesRebuild(self):
+        kept = snapshot()
+        rebuild_rollups()
+        self.assertEqual(kept, snapshot())
+
+    def test_creates(self):
+        make_teacher(self.school, 'wanjiru')
+        make_learner(self.school, 'BC1', grade='Grade 1', gender='F')
+        make_learner(self.other_school, 'BC2', grade='Grade 4', gender='M')
+
+        self.assertEqual(get_summary('national')['learners'], 2)
+        self.assertEqual(get_summary('county', self.school.county_id)['teachers'], 1)
+        self.assertMatchesRebuild()
+
+    def test_learner_changes(self):
+        learner = make_learner(self.school, 'BC1', grade='Grade 1', gender='F')
+        learner.grade, learner.gender = 'Grade 2', 'O'
+        learner.save()
+        learner.school = self.other_school
+        learner.save()
+        self.assertMatchesRebuild()
+
+        learner.status = Learner.GRADUATED
+        learner.save()
+        self.assertEqual(get_summary('national')['learners'], 0)
+        self.assertMatchesRebuild()
+
+    def test_teacher_moves_school(self):
+        teacher = make_teacher(self.school, 'wanjiru')
+        teacher.school = self.other_school
+        teacher.save()
+        self.assertEqual(get_summary('subcounty', self.school.sub_county_id)['teachers'], 0)
+        self.assertEqual(get_summary('subcounty', self.other_school.sub_county_id)['teachers'], 1)
+        self.assertMatchesRebuild()
+
+    def test_school_moves_location(self):
+        make_teacher(self.school, 'wanjiru')
+        make_learner(self.school, 'BC1')
+        make_learner(self.school, 'BC2', status=Learner.GRADUATED)
+
+        self.school.county_id = self.other_ward.sub_county.county_id
+        self.school.sub_county_id = self.other_ward.sub_county_id
+        self.school.ward = self.other_ward
+        self.school.save()
+
+        summary = get_summary('county', self.other_school.county_id)
+        self.assertEqual((summary['schools'], summary['teachers'], summary['learners']), (2, 1, 1))
+        self.assertMatchesRebuild()
+
+    def test_deletes(self):
+        make_teacher(self.school, 'wanjiru')
+        learner = make_learner(self.school, 'BC1')
+        make_learner(self.other_school, 'BC2')
+
+        learner.delete()
+        Teacher.objects.get(user__username='wanjiru').delete()
+        self.other_school.delete()
+        self.assertEqual(get_summary('national')['schools'], 1)
+        self.assertMatchesRebuild()
+
+    def test_apply_deltas_for_bulk_writes(self):
+        location = school_location(self.school.pk)
+        Learner.objects.bulk_create([
+            Learner(
+                birth_certificate_number=f"BULK{n}", admission_number=f"ADM-BULK{n}", first_name='Baraka',
+                last_name='Kip', gender='M', school=self.school, grade='PP1', parent_full_name='Ann Kip',
+                parent_contact='0722000000', relationship_to_learner='Mother', postal_address='P.O. Box 2',
+                county_id=self.school.county_id, sub_county_id=self.school.sub_county_id, ward_id=self.school.ward_id,
+            )
+            for n in range(3)
+        ])
+        apply_deltas(learners={(location, 'PP1', 'M'): 3})
+
+        self.assertEqual(get_summary('national')['by_grade'][0]['male'], 3)
+        self.assertMatchesRebuild()
+
+    def test_migration_seeds_existing_data(self):
+        """
+        On an upgraded database the rollups start from the existing rows,
+        not from zero.
+        """
+        make_teacher(self.school, 'wanjiru')
+        make_learner(self.school, 'BC1', grade='Grade 12')
+        make_learner(self.other_school, 'BC2', grade='Grade 3', gender='M')
+        make_learner(self.other_school, 'BC3', status=Learner.GRADUATED)
+        GradeRollup.objects.all().delete()
+        GeoRollup.objects.all().delete()
+
+        import_module('reports.migrations.0003_seed_rollups').seed_rollups(apps, None)
+
+        self.assertEqual(get_summary('national')['learners'], 2)
+        self.assertMatchesRebuild()
+        # Later deltas add to the seeded counts.
+        make_learner(self.school, 'BC4', grade='Grade 12')
+        self.assertEqual(get_summary('county', self.school.county_id)['by_grade'][0]['female'], 2)
+        self.assertMatchesRebuild()
+
+
+# --------------------------
+# Teacher analytics
+# --------------------------
+
+@override_settings(ANALYTICS={'TARGET_PTR': 2})
+class AnalyticsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        naivasha, gilgil = make_ward('Nakuru', 'Naivasha'), make_ward('Nakuru', 'Gilgil')
+        cls.school = make_school(naivasha, 'S1')
+        cls.gilgil_school = make_school(gilgil, 'S2')
+        cls.kisumu_school = make_school(make_ward('Kisumu', 'Kisumu East'), 'S3')
+
+        a, b = [Stream.objects.create(school=cls.school, grade='Grade 4', name=name) for name in 'AB']
+        maths = Subject.objects.create(name='Mathematics', grade_level='UpperPrimary', lessons_per_week=5)
+        english = Subject.objects.create(name='English', grade_level='UpperPrimary', lessons_per_week=4)
+        cls.teacher = make_teacher(cls.school, 'wanjiru')
+        for subject, stream in [(maths, a), (maths, b), (english, a)]:
+            SubjectAssignment.objects.create(teacher=cls.teacher, subject=subject, stream=stream, year=2025)
+        SubjectAssignment.objects.create(teacher=cls.teacher, subject=english, stream=b, year=2024)
+        make_teacher(cls.gilgil_school, 'otieno')
+
+        for n in range(3):
+            make_learner(cls.school, f'A{n}', grade='Grade 4')
+        make_learner(cls.school, 'A3', grade='Grade 4', status=Learner.GRADUATED)
+        make_learner(cls.kisumu_school, 'K1', grade='Grade 4')
+        make_learner(cls.kisumu_school, 'K2', grade='Grade 4')
+
+    def test_workload_and_ratios(self):
+        analytics = compute_analytics(2025)
+
+        # Three learners shared by two streams; the 2024 assignment is not counted.
+        rows = {row[0]: row for row in analytics.teacher_rows()}
+        self.assertEqual(rows['TSC-wanjiru'][4:], (14, 2, 3))
+        self.assertEqual(rows['TSC-otieno'][4:], (0, 0, 0))
+
+        schools = {row['code']: row for row in analytics.scope_rows('school')}
+        self.assertEqual((schools['S1']['ptr'], schools['S1']['teachers_needed']), (3.0, 1))
+        self.assertEqual((schools['S3']['ptr'], schools['S3']['teachers_needed']), (None, 1))
+        national = analytics.scope_row('national')
+        self.assertEqual((national['teachers'], national['learners']), (2, 5))
+
+    def test_scope_filters(self):
+        analytics = compute_analytics(2025)
+        nakuru, naivasha = self.school.county_id, self.school.sub_county_id
+
+        self.assertEqual([row['code'] for row in analytics.scope_rows('school', county_id=nakuru)], ['S1', 'S2'])
+        self.assertEqual([row['code'] for row in analytics.scope_rows('school', sub_county_id=naivasha)], ['S1'])
+        self.assertEqual([row['id'] for row in analytics.scope_rows('subcounty', sub_county_id=naivasha)], [naivasha])
+        self.assertEqual([row[0] for row in analytics.teacher_rows(sub_county_id=naivasha)], ['TSC-wanjiru'])
+        self.assertEqual(list(analytics.teacher_rows(sub_county_id=0)), [])
+        with self.assertRaises(ValueError):
+            analytics.scope_rows('county', sub_county_id=naivasha)
+
+    def test_export_scope(self):
+        subcounty = SimpleNamespace(pk=7, county_id=3)
+        director = SimpleNamespace(role='subcounty_director', subcounty=subcounty)
+        self.assertEqual(export_scope(director, requested=1), {'sub_county_id': 7})
+        self.assertEqual(export_scope(SimpleNamespace(role='county_director'), requested=1), {'county_id': 0})
+        self.assertEqual(export_scope(SimpleNamespace(role='cabinet_secretary'), requested=1), {'county_id': 1})
+
+    def test_exports(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        response = self.client.get(reverse('reports:workload_export'), {'year': 2025, 'county': self.school.county_id})
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('TSC-otieno') or lines[1].startswith('TSC-wanjiru'))
+        for year in ['1900', '3000', 'x']:
+            self.assertEqual(self.client.get(reverse('reports:workload_export'), {'year': year}).status_code, 400)
+
+        # Directors get nothing above their own level, and only their own
+        # area (not set here, so nothing).
+        self.client.force_login(make_user('director', role='subcounty_director'))
+        for level in ['county', 'national']:
+            response = self.client.get(reverse('reports:staffing_export'), {'level': level})
+            self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse('reports:workload_export'), {'year': 2025})
+        self.assertEqual(len(b''.join(response.streaming_content).decode().splitlines()), 1)
@@ -0,0 +1,9 @@
+from django.urls import path
+from . import views
+
+app_name = 'reports'
+
+urlpatterns = [
+    path('staffing.csv', views.staffing_export, name='staffing_export'),
+    path('teacher-workload.csv', views.workload_export, name='workload_export'),
+]
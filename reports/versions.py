@@ -0,0 +1,45 @@
+"""
+Per-scope data-version counters used for dashboard ETags.
+"""
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+
+def bump(*keys):
+    """
+    Increment the version of every given scope key, creating missing counters.
+    """
+    keys = {key for key in keys if key}
+    if not keys:
+        return
+    with transaction.atomic():
+        DataVersion.objects.bulk_create(
+            [DataVersion(scope_key=key) for key in keys],
+            ignore_conflicts=True,
+        )
+        DataVersion.objects.filter(scope_key__in=keys).update(
+            version=F('version') + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def bump_all():
+    """
+    Invalidate every counter, e.g. after the rollups were rebuilt.
+    """
+    DataVersion.objects.update(version=F('version') + 1, updated_at=timezone.now())
+
+
+def get_versions(*keys):
+    """
+    Return {scope_key: (version, updated_at)} for the counters that exist.
+    """
+    return {
+        key: (version, updated_at)
+        for key, version, updated_at in DataVersion.objects.filter(
+            scope_key__in=keys
+        ).values_list('scope_key', 'version', 'updated_at')
+    }
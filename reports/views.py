@@ -1,3 +1,94 @@
-from django.shortcuts import render
+from datetime import date
 
-# Create your views here.
+from django.contrib.auth.decorators import login_required
+from django.http import HttpResponseBadRequest, HttpResponseForbidden
+
+from utils.decorators import role_required
+from utils.exports import export_rows
+
+from .analytics import LEVELS, get_analytics
+
+
+STAFFING_HEADER = ['Level', 'Code', 'Name', 'Teachers', 'Learners', 'Pupil-Teacher Ratio', 'Teachers Needed']
+WORKLOAD_HEADER = ['TSC Number', 'Name', 'School Code', 'School', 'Lessons per Week', 'Streams', 'Learners Taught']
+
+
+# The CBC rollout began in 2017: there is nothing to report before it.
+FIRST_YEAR = 2017
+
+# Export levels each role may ask for: directors see no rows above their own.
+ROLE_LEVELS = {
+    'cabinet_secretary': LEVELS,
+    'county_director': ('school', 'subcounty', 'county'),
+    'subcounty_director': ('school', 'subcounty'),
+}
+
+
+def _year(request):
+    """
+    The ?year= asked for (default this year), or None when it is not a
+    year from FIRST_YEAR to next year: each year is computed and cached
+    on first request.
+    """
+    try:
+        year = int(request.GET.get('year') or date.today().year)
+    except ValueError:
+        return None
+    return year if FIRST_YEAR <= year <= date.today().year + 1 else None
+
+
+def export_scope(user, requested=None):
+    """
+    Filters for a user's exports, like home.api.owns_scope: their own
+    county (county directors) or subcounty (subcounty directors), 0, i.e.
+    nothing, if it is not set; the requested county or all (None) for the
+    Cabinet Secretary.
+    """
+    if user.role == 'county_director':
+        return {'county_id': getattr(getattr(user, 'county', None), 'pk', 0)}
+    if user.role == 'subcounty_director':
+        return {'sub_county_id': getattr(getattr(user, 'subcounty', None), 'pk', 0)}
+    return {'county_id': requested}
+
+
+def _scope(request):
+    try:
+        return export_scope(request.user, int(request.GET['county']) if request.GET.get('county') else None)
+    except ValueError:
+        return None
+
+
+# --------------------------
+# CSV exports for the dashboards
+# --------------------------
+@login_required
+@role_required(['cabinet_secretary', 'county_director', 'subcounty_director'])
+def staffing_export(request):
+    """
+    Pupil-teacher ratios per school, subcounty or county (?level=).
+    """
+    year, level, scope = _year(request), request.GET.get('level', 'school'), _scope(request)
+    if year is None or level not in LEVELS or scope is None:
+        return HttpResponseBadRequest("Invalid year, level or county.")
+    if level not in ROLE_LEVELS.get(request.user.role, LEVELS):
+        return HttpResponseForbidden("You do not have permission to export that level.")
+
+    rows = (
+        (level, row['code'], row['name'], row['teachers'], row['learners'], row['ptr'], row['teachers_needed'])
+        for row in get_analytics(year).scope_rows(level, **scope)
+    )
+    return export_rows(STAFFING_HEADER, rows, f'staffing_{level}_{year}.csv')
+
+
+@login_required
+@role_required(['cabinet_secretary', 'county_director', 'subcounty_director'])
+def workload_export(request):
+    """
+    Lessons, streams and learners per teacher.
+    """
+    year, scope = _year(request), _scope(request)
+    if year is None or scope is None:
+        return HttpResponseBadRequest("Invalid year or county.")
+
+    rows = get_analytics(year).teacher_rows(**scope)
+    return export_rows(WORKLOAD_HEADER, rows, f'teacher_workload_{year}.csv')
@@ -0,0 +1,24 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('location', '0001_initial'),
+        ('schools', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='school',
+            index=models.Index(fields=['name'], name='school_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='school',
+            index=models.Index(fields=['county', 'name'], name='school_county_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='school',
+            index=models.Index(fields=['sub_county', 'name'], name='school_subcounty_name_idx'),
+        ),
+    ]
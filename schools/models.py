@@ -15,6 +15,15 @@ class School(models.Model):
     sub_county = models.ForeignKey(SubCounty, on_delete=models.PROTECT)
     ward = models.ForeignKey(Ward, on_delete=models.PROTECT)
     address = models.CharField(max_length=100, blank=True, null=True)
-    
+
+    class Meta:
+        indexes = [
+            # Dashboard school tables are keyset paginated by (name, id),
+            # nationally or within a county / sub county.
+            models.Index(fields=['name'], name='school_name_idx'),
+            models.Index(fields=['county', 'name'], name='school_county_name_idx'),
+            models.Index(fields=['sub_county', 'name'], name='school_subcounty_name_idx'),
+        ]
+
     def __str__(self):
         return f"{self.name} ({self.code})"
@@ -1,3 +1,52 @@
+from unittest import mock
+
 from django.test import TestCase
+from django.urls import reverse
+
+from learners.models import Learner
+from utils.testing import make_learner, make_school, make_teacher, make_user, make_ward
+
+
+def csv_lines(response):
+    return b''.join(response.streaming_content).decode().splitlines()
+
+
+# --------------------------
+# CSV exports
+# --------------------------
+
+class ExportTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.school = make_school(make_ward('Nakuru', 'Naivasha'), 'S1')
+        cls.other_school = make_school(make_ward('Kisumu'), 'S2')
+
+    def test_school_export_follows_the_role(self):
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        # The header goes out first, then a chunk whenever the buffer fills.
+        with mock.patch('utils.exports.EXPORT_BUFFER_SIZE', 10):
+            response = self.client.get(reverse('schools:school_list'), {'export': 'csv'})
+            chunks = list(response.streaming_content)
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="schools.csv"')
+        self.assertEqual(len(chunks), 3)
+        lines = b''.join(chunks).decode().splitlines()
+        self.assertEqual(lines[0], 'Code,Name,Level,County,Sub County,Ward,Address')
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['S1', 'S2'])
+        self.assertEqual(lines[1].split(',')[3:5], ['Nakuru', 'Naivasha'])
+
+        # A director without an area exports nothing.
+        self.client.force_login(make_user('director', role='subcounty_director'))
+        response = self.client.get(reverse('schools:school_list'), {'export': 'csv'})
+        self.assertEqual(len(csv_lines(response)), 1)
+
+    def test_learner_export_is_limited_to_the_teachers_school(self):
+        first = make_learner(self.school, 'BC1')
+        make_learner(self.other_school, 'BC2')
+        make_learner(self.school, 'BC3', status=Learner.GRADUATED)
+        self.client.force_login(make_teacher(self.school, 'wanjiru').user)
+
+        lines = csv_lines(self.client.get(reverse('learners:learner_list'), {'export': 'csv'}))
 
-# Create your tests here.
+        self.assertEqual(len(lines), 2)
+        self.assertTrue(lines[1].startswith(f'{first.birth_certificate_number},'))
@@ -8,6 +8,18 @@ from location.models import SubCounty, Ward
 from .models import School
 from .forms import SchoolForm
 from utils.decorators import role_required
+from utils.exports import export_csv
+
+
+SCHOOL_EXPORT_COLUMNS = [
+    ('Code', 'code'),
+    ('Name', 'name'),
+    ('Level', 'school_level'),
+    ('County', 'county__name'),
+    ('Sub County', 'sub_county__name'),
+    ('Ward', 'ward__name'),
+    ('Address', 'address'),
+]
 
 
 @login_required
@@ -20,15 +32,18 @@ def school_list(request):
     if role == 'cabinet_secretary':
         schools = School.objects.all()
     elif role == 'county_director':
-        schools = School.objects.filter(county=user.county)
+        schools = School.objects.filter(county=getattr(user, 'county', None))
     elif role == 'subcounty_director':
-        schools = School.objects.filter(sub_county=user.sub_county)
+        schools = School.objects.filter(sub_county=getattr(user, 'subcounty', None))
     else:  # school_admin
         schools = School.objects.filter(id=getattr(user, 'school_id', None))
 
+    if request.GET.get('export') == 'csv':
+        return export_csv(schools, SCHOOL_EXPORT_COLUMNS, 'schools.csv')
+
     context = {
         'dashboard_title': "Schools",
-        'schools': schools,
+        'schools': schools.select_related('county', 'sub_county__county'),
         'breadcrumb': [
             {"name": "Home", "url": '/'},
             {"name": "Schools", "url": '#'}
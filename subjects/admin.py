@@ -4,5 +4,5 @@ from .models import Subject
 
 @admin.register(Subject)
 class SubjectAdmin(admin.ModelAdmin):
-    list_display = ('name',)
+    list_display = ('name', 'grade_level', 'lessons_per_week')
     search_fields = ('name',)
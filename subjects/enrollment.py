@@ -0,0 +1,158 @@
+"""
+Compulsory subject enrollment.
+
+A compulsory Subject is assigned to every active learner whose grade falls
+in its grade_level: national subjects (no school) to all such learners,
+school subjects to that school's learners only.
+
+enroll_compulsory() adds the missing Learner.subjects rows with one
+INSERT ... SELECT per batch of learners; the SELECT joins learners to the
+compulsory subjects of their level and skips pairs that already exist,
+so running it again only inserts what is missing. Subject changes are
+picked up by subjects/signals.py.
+
+Usage:
+    enroll_compulsory(learner_ids=[learner.pk])   # after creating learners
+    enroll_compulsory(subjects=[subject.pk])      # after adding a subject
+"""
+from functools import partial
+
+from django.db import connection, transaction
+
+from learners.detail_cache import invalidate_all_learners, invalidate_learners
+from learners.models import Learner
+
+from .models import Subject
+
+
+BATCH_SIZE = 5000
+
+# grade_level -> learner grades
+LEVEL_GRADES = {}
+for _grade, _ in Learner.GRADE_CHOICES:
+    LEVEL_GRADES.setdefault(Subject.level_for_grade(_grade), []).append(_grade)
+
+
+def _insert_sql(learner_filter, subject_filter):
+    learner, subject = Learner._meta, Subject._meta
+    through = Learner.subjects.through._meta.db_table
+    qn = connection.ops.quote_name
+    learner_pk, subject_pk = f"l.{qn(learner.pk.column)}", f"s.{qn(subject.pk.column)}"
+    # Learner.grade -> Subject.grade_level, as in Subject.level_for_grade().
+    level = " ".join(f"WHEN l.{qn('grade')} = %s THEN %s" for _ in Learner.GRADE_CHOICES)
+    return f"""
+        INSERT INTO {qn(through)} ({qn('learner_id')}, {qn('subject_id')})
+        SELECT {learner_pk}, {subject_pk}
+        FROM {qn(learner.db_table)} l
+        INNER JOIN {qn(subject.db_table)} s
+            ON s.{qn('grade_level')} = (CASE {level} END)
+            AND s.{qn('is_compulsory')} = %s
+            AND (s.{qn('school_id')} IS NULL OR s.{qn('school_id')} = l.{qn('school_id')})
+        WHERE l.{qn('status')} = %s {learner_filter} {subject_filter}
+        AND NOT EXISTS (
+            SELECT 1 FROM {qn(through)} t
+            WHERE t.{qn('learner_id')} = {learner_pk} AND t.{qn('subject_id')} = {subject_pk}
+        )
+    """
+
+
+def _level_params():
+    params = []
+    for grade, _ in Learner.GRADE_CHOICES:
+        params += [grade, Subject.level_for_grade(grade)]
+    return params
+
+
+def _learner_batches(learner_ids, batch_size):
+    """
+    Yield (SQL condition, params) selecting one batch of learners: chunks of
+    the given ids, or consecutive pk ranges covering every learner.
+    """
+    pk = f"l.{connection.ops.quote_name(Learner._meta.pk.column)}"
+    if learner_ids is not None:
+        learner_ids = list(learner_ids)
+        for start in range(0, len(learner_ids), batch_size):
+            batch = learner_ids[start:start + batch_size]
+            yield f"AND {pk} IN ({', '.join(['%s'] * len(batch))})", batch
+        return
+
+    pks = Learner.objects.order_by('pk').values_list('pk', flat=True)
+    low = None
+    while True:
+        window = pks if low is None else pks.filter(pk__gt=low)
+        high = next(iter(window[batch_size - 1:batch_size]), None)
+        condition, params = "", []
+        if low is not None:
+            condition, params = f"AND {pk} > %s ", [low]
+        if high is not None:
+            condition, params = condition + f"AND {pk} <= %s", params + [high]
+        yield condition, params
+        if high is None:
+            return
+        low = high
+
+
+def enroll_compulsory(learner_ids=None, subjects=None, batch_size=BATCH_SIZE):
+    """
+    Add missing compulsory subjects for active learners; returns rows inserted.
+
+    `learner_ids` limits the run to those learners and `subjects` to those
+    subject ids; by default every learner and compulsory subject is checked.
+    """
+    if learner_ids is not None:
+        learner_ids = list(learner_ids)
+    subject_filter, subject_params = "", []
+    if subjects is not None:
+        subjects = [getattr(subject, 'pk', subject) for subject in subjects]
+        if not subjects:
+            return 0
+        column = connection.ops.quote_name(Subject._meta.pk.column)
+        subject_filter = f"AND s.{column} IN ({', '.join(['%s'] * len(subjects))})"
+        subject_params = subjects
+
+    inserted = 0
+    for learner_filter, learner_params in _learner_batches(learner_ids, batch_size):
+        sql = _insert_sql(learner_filter, subject_filter)
+        params = _level_params() + [True, Learner.ACTIVE] + learner_params + subject_params
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            inserted += max(cursor.rowcount, 0)
+    if inserted:
+        # The raw INSERTs skip the m2m_changed handlers.
+        _invalidate(learner_ids)
+    return inserted
+
+
+def _invalidate(learner_ids):
+    if learner_ids is None:
+        transaction.on_commit(invalidate_all_learners)
+    else:
+        transaction.on_commit(partial(invalidate_learners, list(learner_ids)))
+
+
+def remove_other_levels(learner_ids, level):
+    """
+    Drop subjects not of `level` from learners who moved into it.
+    """
+    learner_ids = list(learner_ids)
+    removed = Learner.subjects.through.objects.filter(learner_id__in=learner_ids).exclude(
+        subject__grade_level=level
+    ).delete()[0]
+    if removed:
+        _invalidate(learner_ids)
+    return removed
+
+
+def remove_stale(subject):
+    """
+    Drop a compulsory subject from learners outside its level (or school)
+    after the subject was changed.
+    """
+    rows = Learner.subjects.through.objects.filter(subject_id=subject.pk)
+    stale = rows.exclude(learner__grade__in=LEVEL_GRADES.get(subject.grade_level, []))
+    if subject.school_id is not None:
+        stale = stale | rows.exclude(learner__school_id=subject.school_id)
+    removed = stale.delete()[0]
+    if removed:
+        _invalidate(None)
+    return removed
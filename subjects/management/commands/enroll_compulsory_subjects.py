@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from subjects.enrollment import BATCH_SIZE, enroll_compulsory
+from subjects.models import Subject
+
+
+class Command(BaseCommand):
+    help = "Enroll active learners in every compulsory subject of their grade level that they are missing"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", type=int, action="append", dest="subjects",
+                            help="Only this subject id (repeatable)")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="Learners per INSERT")
+
+    def handle(self, *args, **options):
+        subjects = options["subjects"]
+        if subjects:
+            missing = set(subjects) - set(Subject.objects.filter(pk__in=subjects).values_list('pk', flat=True))
+            if missing:
+                raise CommandError(f"No subject with id {', '.join(map(str, sorted(missing)))}")
+
+        self.stdout.write(self.style.NOTICE("Enrolling learners in compulsory subjects..."))
+        start = time.perf_counter()
+        inserted = enroll_compulsory(subjects=subjects, batch_size=options["batch_size"])
+        self.stdout.write(self.style.SUCCESS(
+            f"Added {inserted} subject enrollments in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('subjects', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subject',
+            name='lessons_per_week',
+            field=models.PositiveSmallIntegerField(default=4, help_text='Lessons per week in each stream taking this subject (used by the timetable generator).'),
+        ),
+    ]
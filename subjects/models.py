@@ -23,6 +23,10 @@ class Subject(models.Model):
         default=False,
         help_text="If true, this subject is automatically assigned to learners of this grade level."
     )
+    lessons_per_week = models.PositiveSmallIntegerField(
+        default=4,
+        help_text="Lessons per week in each stream taking this subject (used by the timetable generator)."
+    )
     school = models.ForeignKey(
         School,
         on_delete=models.CASCADE,
@@ -44,3 +48,20 @@ class Subject(models.Model):
     def __str__(self):
         school_name = self.school.name if self.school else "National"
         return f"{self.name} ({self.get_grade_level_display()}) - {school_name}"
+
+    @staticmethod
+    def level_for_grade(grade):
+        """
+        Map a learner grade ('PP1', 'Grade 5', ...) to its grade_level.
+        """
+        g = grade.strip()
+        if g.upper().startswith('PP'):
+            return 'PrePrimary'
+        n = int(g.split()[-1])
+        if n <= 3:
+            return 'LowerPrimary'
+        if n <= 6:
+            return 'UpperPrimary'
+        if n <= 9:
+            return 'JuniorSecondary'
+        return 'SeniorSecondary'
@@ -0,0 +1,43 @@
+"""
+Re-run compulsory enrollment when a subject becomes compulsory or moves
+to another grade level or school. The work runs after the transaction
+commits, once per save, and only touches the changed subject.
+"""
+from functools import partial
+
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save
+from django.dispatch import receiver
+
+from .enrollment import enroll_compulsory, remove_stale
+from .models import Subject
+
+
+TRACKED_FIELDS = ('is_compulsory', 'grade_level', 'school_id')
+
+
+def sync_subject(subject, moved):
+    if moved:
+        remove_stale(subject)
+    enroll_compulsory(subjects=[subject.pk])
+
+
+@receiver(pre_save, sender=Subject)
+def stash_previous_subject(sender, instance, raw=False, **kwargs):
+    instance._enrollment_previous = None
+    if not raw and instance.pk is not None:
+        instance._enrollment_previous = Subject.objects.filter(pk=instance.pk).values(*TRACKED_FIELDS).first()
+
+
+@receiver(post_save, sender=Subject)
+def enroll_on_subject_change(sender, instance, raw=False, **kwargs):
+    if raw or not instance.is_compulsory:
+        return
+    previous = getattr(instance, '_enrollment_previous', None)
+    current = {field: getattr(instance, field) for field in TRACKED_FIELDS}
+    if previous == current:
+        return
+    moved = bool(previous) and previous['is_compulsory'] and (
+        previous['grade_level'] != current['grade_level'] or previous['school_id'] != current['school_id']
+    )
+    transaction.on_commit(partial(sync_subject, instance, moved))
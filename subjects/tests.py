@@ -1,3 +1,62 @@
 from django.test import TestCase
 
-# Create your tests here.
+from learners.models import Learner
+from utils.testing import make_learner, make_school, make_ward
+
+from .enrollment import enroll_compulsory
+from .models import Subject
+from .signals import sync_subject
+
+
+def subject_names(learner):
+    return sorted(learner.subjects.values_list('name', flat=True))
+
+
+class CompulsoryEnrollmentTests(TestCase):
+
+    def setUp(self):
+        ward = make_ward()
+        self.school = make_school(ward, 'S1')
+        self.other_school = make_school(ward, 'S2')
+        self.literacy = Subject.objects.create(name='Literacy', grade_level='LowerPrimary', is_compulsory=True)
+        self.kiswahili = Subject.objects.create(
+            name='Kiswahili S1', grade_level='LowerPrimary', is_compulsory=True, school=self.school,
+        )
+        Subject.objects.create(name='Art', grade_level='LowerPrimary')
+        Subject.objects.create(name='Science', grade_level='UpperPrimary', is_compulsory=True)
+
+    def test_enrolls_by_level_and_school(self):
+        first = make_learner(self.school, 'BC1', grade='Grade 1')
+        other = make_learner(self.other_school, 'BC2', grade='Grade 3')
+        graduated = make_learner(self.school, 'BC3', grade='Grade 2', status=Learner.GRADUATED)
+
+        self.assertEqual(enroll_compulsory(batch_size=2), 3)
+
+        self.assertEqual(subject_names(first), ['Kiswahili S1', 'Literacy'])
+        self.assertEqual(subject_names(other), ['Literacy'])
+        self.assertEqual(subject_names(graduated), [])
+        # Only what is missing is inserted.
+        self.assertEqual(enroll_compulsory(), 0)
+        self.assertEqual(enroll_compulsory(learner_ids=[first.pk, other.pk]), 0)
+
+    def test_subject_changes(self):
+        learner = make_learner(self.school, 'BC1', grade='Grade 5')
+        art = Subject.objects.get(name='Art')
+
+        # Made compulsory for the learner's level.
+        art.grade_level, art.is_compulsory = 'UpperPrimary', True
+        with self.captureOnCommitCallbacks(execute=True):
+            art.save()
+        self.assertEqual(subject_names(learner), ['Art'])
+
+        # Moved to another level: dropped from learners outside it.
+        art.grade_level = 'JuniorSecondary'
+        with self.captureOnCommitCallbacks(execute=True):
+            art.save()
+        self.assertEqual(subject_names(learner), [])
+
+        # Other changes don't re-run enrollment.
+        with self.captureOnCommitCallbacks() as callbacks:
+            art.lessons_per_week = 2
+            art.save()
+        self.assertNotIn(sync_subject, [getattr(callback, 'func', None) for callback in callbacks])
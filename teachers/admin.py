@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Teacher, Stream, ClassAssignment, SubjectAssignment
+from .models import Teacher, Stream, ClassAssignment, SubjectAssignment, Timetable
 from subjects.models import Subject
 
 # --------------------------
@@ -35,6 +35,7 @@ class SubjectAssignmentInline(admin.TabularInline):
 @admin.register(Teacher)
 class TeacherAdmin(admin.ModelAdmin):
     list_display = ('get_name', 'role', 'school', 'phone', 'date_joined')
+    list_select_related = ('user', 'school')
     list_filter = ('role', 'school')
     search_fields = ('user__first_name', 'user__last_name', 'user__username', 'phone')
     ordering = ['school', 'role', 'user__last_name']
@@ -63,6 +64,7 @@ class StreamAdmin(admin.ModelAdmin):
 @admin.register(ClassAssignment)
 class ClassAssignmentAdmin(admin.ModelAdmin):
     list_display = ('teacher_name', 'stream', 'year', 'is_class_teacher')
+    list_select_related = ('teacher__user', 'stream__school')
     list_filter = ('year', 'is_class_teacher', 'stream__school', 'stream__grade')
     search_fields = ('teacher__user__first_name', 'teacher__user__last_name', 'stream__grade', 'stream__name')
     ordering = ['-year', 'stream__grade', 'stream__name']
@@ -79,6 +81,7 @@ class ClassAssignmentAdmin(admin.ModelAdmin):
 @admin.register(SubjectAssignment)
 class SubjectAssignmentAdmin(admin.ModelAdmin):
     list_display = ('teacher_name', 'subject', 'stream', 'year')
+    list_select_related = ('teacher__user', 'subject__school', 'stream__school')
     list_filter = ('year', 'stream__school', 'stream__grade', 'subject__name')
     search_fields = ('teacher__user__first_name', 'teacher__user__last_name', 'subject__name', 'stream__grade')
     ordering = ['-year', 'stream__grade', 'subject__name']
@@ -88,3 +91,15 @@ class SubjectAssignmentAdmin(admin.ModelAdmin):
     def teacher_name(self, obj):
         return obj.teacher.user.get_full_name() or obj.teacher.user.username
     teacher_name.short_description = "Teacher"
+
+# --------------------------
+# Timetable Admin
+# --------------------------
+@admin.register(Timetable)
+class TimetableAdmin(admin.ModelAdmin):
+    list_display = ('school', 'year', 'days', 'periods_per_day', 'generated_at')
+    list_select_related = ('school',)
+    list_filter = ('year',)
+    search_fields = ('school__name', 'school__code')
+    # Lessons are placed by `manage.py generate_timetable`, not edited here.
+    readonly_fields = ('school', 'year', 'days', 'periods_per_day', 'generated_at')
@@ -36,11 +36,67 @@ class TeacherForm(forms.ModelForm):
             self.fields.pop('school')
 
 
+class TeacherImportForm(forms.Form):
+    """
+    Validates one row of a bulk teacher upload (see teachers/provisioning.py).
+
+    School codes and uniqueness are checked once per batch by the
+    provisioner, so validating a row never touches the database.
+    """
+    tsc_number = forms.CharField(max_length=20)
+    first_name = forms.CharField(max_length=150)
+    last_name = forms.CharField(max_length=150)
+    email = forms.EmailField(help_text="Login details are sent here.")
+    username = forms.CharField(
+        max_length=150, required=False, validators=[User.username_validator],
+        help_text="Defaults to the TSC number.",
+    )
+    phone = forms.CharField(max_length=20, required=False)
+    role = forms.ChoiceField(choices=Teacher.ROLE_CHOICES, required=False)
+    date_joined = forms.DateField(required=False, input_formats=['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y'])
+
+    def clean_tsc_number(self):
+        return str(self.cleaned_data['tsc_number']).strip()
+
+    def clean_username(self):
+        username = self.cleaned_data['username'] or self.cleaned_data.get('tsc_number', '')
+        User.username_validator(username)
+        return username
+
+    def clean_role(self):
+        return self.cleaned_data['role'] or 'subject_teacher'
+
+
+class TeacherUploadForm(forms.Form):
+    file = forms.FileField(
+        label="Teacher file (.csv or .xlsx)",
+        widget=forms.ClearableFileInput(attrs={'class': 'form-control-file', 'accept': '.csv,.xlsx'})
+    )
+    dry_run = forms.BooleanField(
+        required=False,
+        label="Check only (do not save)",
+    )
+
+
 class ClassAssignmentForm(forms.ModelForm):
     class Meta:
         model = ClassAssignment
         fields = ['teacher', 'stream', 'year', 'is_class_teacher']
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # The one-class-teacher constraint is left to the database: checking
+        # it here costs a query per save and can still race. The view turns
+        # the IntegrityError into class_teacher_taken().
+        self.instance.check_class_teacher = False
+        return cleaned_data
+
+    def class_teacher_taken(self):
+        data = self.cleaned_data
+        self.add_error(
+            'is_class_teacher', f"{data['stream']} already has a class teacher for {data['year']}."
+        )
+
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
 
@@ -80,6 +136,12 @@ class SubjectAssignmentForm(forms.ModelForm):
 
 
 class TeacherSearchForm(forms.Form):
+    SORT_CHOICES = [
+        ('name', 'Name'),
+        ('role', 'Role'),
+        ('joined', 'Date joined'),
+    ]
+
     query = forms.CharField(
         required=False,
         label='Search Teacher',
@@ -88,6 +150,11 @@ class TeacherSearchForm(forms.Form):
             'class': 'border rounded px-3 py-2 w-full'
         })
     )
+    sort = forms.ChoiceField(
+        required=False,
+        choices=SORT_CHOICES,
+        widget=forms.Select(attrs={'class': 'border rounded px-3 py-2'})
+    )
 
 
 class LearnerForm(forms.ModelForm):
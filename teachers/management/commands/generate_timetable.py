@@ -0,0 +1,53 @@
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from schools.models import School
+from teachers.models import SubjectAssignment
+from teachers.timetable import TimetableError, generate_timetable
+
+
+class Command(BaseCommand):
+    help = "Generate clash-free weekly timetables from subject assignments, replacing saved ones"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--school", action="append", dest="schools", help="School code (repeatable; default: every school with assignments)")
+        parser.add_argument("--year", type=int, default=date.today().year, help="Academic year (default: this year)")
+        parser.add_argument("--days", type=int, help="School days per week (default: TIMETABLE['DAYS'])")
+        parser.add_argument("--periods", type=int, help="Periods per day (default: TIMETABLE['PERIODS_PER_DAY'])")
+
+    def handle(self, *args, **options):
+        for name in ("days", "periods"):
+            if options[name] is not None and options[name] < 1:
+                raise CommandError(f"--{name} must be at least 1")
+
+        if options["schools"]:
+            schools = list(School.objects.filter(code__in=options["schools"]))
+            missing = set(options["schools"]) - {school.code for school in schools}
+            if missing:
+                raise CommandError(f"No school with code {', '.join(sorted(missing))}")
+        else:
+            school_ids = SubjectAssignment.objects.filter(year=options["year"]).values('stream__school_id')
+            schools = list(School.objects.filter(pk__in=school_ids))
+
+        self.stdout.write(self.style.NOTICE(f"Generating {options['year']} timetables for {len(schools)} schools..."))
+
+        start = time.perf_counter()
+        done = failed = 0
+        for school in schools:
+            school_start = time.perf_counter()
+            try:
+                _, lessons = generate_timetable(
+                    school, year=options["year"], days=options["days"], periods_per_day=options["periods"]
+                )
+            except TimetableError as e:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f"{school.code} {school.name}: {e}"))
+                continue
+            done += 1
+            self.stdout.write(f"{school.code} {school.name}: {lessons} lessons in {time.perf_counter() - school_start:.2f}s")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {done} timetables ({failed} did not fit) in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,51 @@
+import os
+import time
+
+from django.core.files import File
+from django.core.management.base import BaseCommand, CommandError
+
+from schools.models import School
+from teachers.provisioning import TeacherImportError, provision_teachers
+
+
+class Command(BaseCommand):
+    help = "Create teacher accounts from a CSV or XLSX file and email each teacher their login details"
+
+    def add_arguments(self, parser):
+        parser.add_argument("file", help="Path to a .csv or .xlsx file")
+        parser.add_argument("--school", help="School code every teacher joins (ignores the school_code column)")
+        parser.add_argument("--workers", type=int, help="Processes hashing passwords (default: one per CPU)")
+        parser.add_argument("--dry-run", action="store_true", help="Validate only; save nothing")
+
+    def handle(self, *args, **options):
+        file_path = options["file"]
+        if not os.path.exists(file_path):
+            raise CommandError(f"File not found at: {file_path}")
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be at least 1")
+
+        school = None
+        if options["school"]:
+            school = School.objects.filter(code=options["school"]).first()
+            if school is None:
+                raise CommandError(f"No school with code {options['school']}")
+
+        self.stdout.write(self.style.NOTICE(f"Provisioning teachers from {file_path}..."))
+
+        start = time.perf_counter()
+        with open(file_path, "rb") as fh:
+            try:
+                report = provision_teachers(
+                    File(fh, name=file_path), school=school, dry_run=options["dry_run"], workers=options["workers"]
+                )
+            except TeacherImportError as e:
+                raise CommandError(str(e))
+
+        for row, column, message in report.errors:
+            self.stdout.write(self.style.WARNING(f"Row {row} [{column}]: {message}"))
+
+        verb = "validated" if options["dry_run"] else "created"
+        self.stdout.write(self.style.SUCCESS(
+            f"Successfully {verb} {report.created} of {report.rows} teachers ({report.failed_rows} rows with errors) "
+            f"in {time.perf_counter() - start:.1f}s"
+        ))
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['school', 'role', 'id'], name='teacher_school_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='teacher',
+            index=models.Index(fields=['school', 'date_joined', 'id'], name='teacher_school_joined_idx'),
+        ),
+    ]
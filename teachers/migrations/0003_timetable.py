@@ -0,0 +1,49 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('schools', '0002_school_indexes'),
+        ('teachers', '0002_teacher_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Timetable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField(default=2026)),
+                ('days', models.PositiveSmallIntegerField(default=5)),
+                ('periods_per_day', models.PositiveSmallIntegerField(default=8)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+                ('school', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timetables', to='schools.school')),
+            ],
+            options={
+                'verbose_name': 'Timetable',
+                'verbose_name_plural': 'Timetables',
+                'ordering': ['-year', 'school'],
+                'unique_together': {('school', 'year')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TimetableLesson',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveSmallIntegerField(help_text="Which of the assignment's weekly lessons this is.")),
+                ('day', models.PositiveSmallIntegerField()),
+                ('period', models.PositiveSmallIntegerField()),
+                ('assignment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='teachers.subjectassignment')),
+                ('stream', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='teachers.stream')),
+                ('teacher', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='teachers.teacher')),
+                ('timetable', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='lessons', to='teachers.timetable')),
+            ],
+            options={
+                'verbose_name': 'Timetable Lesson',
+                'verbose_name_plural': 'Timetable Lessons',
+                'ordering': ['day', 'period'],
+                'constraints': [models.UniqueConstraint(fields=('assignment', 'number'), name='lesson_assignment_number_uniq'), models.UniqueConstraint(fields=('timetable', 'stream', 'day', 'period'), name='lesson_stream_slot_uniq'), models.UniqueConstraint(fields=('timetable', 'teacher', 'day', 'period'), name='lesson_teacher_slot_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+
+
+def demote_extra_class_teachers(apps, schema_editor):
+    """
+    Before the constraint, keep the earliest class teacher of each stream
+    and year; later ones (saved past the old form check) become ordinary
+    assigned teachers.
+    """
+    ClassAssignment = apps.get_model('teachers', 'ClassAssignment')
+    class_teachers = ClassAssignment.objects.filter(is_class_teacher=True)
+    first = (
+        class_teachers.order_by().values('stream_id', 'year')
+        .annotate(first=models.Min('pk')).values_list('first', flat=True)
+    )
+    class_teachers.exclude(pk__in=first).update(is_class_teacher=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachers', '0003_timetable'),
+    ]
+
+    operations = [
+        migrations.RunPython(demote_extra_class_teachers, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='classassignment',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_class_teacher', True)), fields=('stream', 'year'), name='one_class_teacher_per_stream_year', violation_error_message='This stream already has a class teacher for that year.'),
+        ),
+    ]
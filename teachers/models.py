@@ -1,6 +1,5 @@
 from django.db import models
 from datetime import date
-from django.core.exceptions import ValidationError
 from django.conf import settings  # Use AUTH_USER_MODEL instead of direct User import
 
 from schools.models import School
@@ -72,6 +71,11 @@ class Teacher(models.Model):
         ordering = ['school', 'role', 'user__last_name']
         verbose_name = 'Teacher / Staff'
         verbose_name_plural = 'Teachers / Staff'
+        indexes = [
+            # Teacher list sorts (teachers.views.TEACHER_SORTS), keyset paginated.
+            models.Index(fields=['school', 'role', 'id'], name='teacher_school_role_idx'),
+            models.Index(fields=['school', 'date_joined', 'id'], name='teacher_school_joined_idx'),
+        ]
 
     def __str__(self):
         name = getattr(self.user, 'get_full_name', lambda: self.user.username)()
@@ -135,6 +139,16 @@ class ClassAssignment(models.Model):
 
     class Meta:
         unique_together = ('teacher', 'stream', 'year')
+        constraints = [
+            # One class teacher per stream and year, enforced by the
+            # database so bulk writes and concurrent saves can't break it.
+            models.UniqueConstraint(
+                fields=['stream', 'year'],
+                condition=models.Q(is_class_teacher=True),
+                name='one_class_teacher_per_stream_year',
+                violation_error_message="This stream already has a class teacher for that year.",
+            ),
+        ]
         ordering = ['year', 'stream__grade', 'stream__name', 'teacher']
         verbose_name = 'Class Assignment'
         verbose_name_plural = 'Class Assignments'
@@ -144,12 +158,25 @@ class ClassAssignment(models.Model):
         name = getattr(self.teacher.user, 'get_full_name', lambda: self.teacher.user.username)()
         return f"{name} - {role} for {self.stream.grade} {self.stream.name} ({self.year})"
 
-    def clean(self):
-        if self.is_class_teacher:
-            if ClassAssignment.objects.filter(
-                stream=self.stream, year=self.year, is_class_teacher=True
-            ).exclude(pk=self.pk).exists():
-                raise ValidationError(f"{self.stream} already has a class teacher for {self.year}.")
+    # False leaves one_class_teacher_per_stream_year to the database, which
+    # enforces it anyway, saving validation a query; the caller then turns
+    # the IntegrityError into an error (see has_class_teacher_conflict()).
+    check_class_teacher = True
+
+    def validate_constraints(self, exclude=None):
+        if not self.check_class_teacher:
+            exclude = {*(exclude or ()), 'is_class_teacher'}
+        super().validate_constraints(exclude=exclude)
+
+    def has_class_teacher_conflict(self):
+        """
+        Whether another assignment is already the stream's class teacher for
+        the year: tells a failed save caused by one_class_teacher_per_stream_year
+        from other integrity errors.
+        """
+        return self.is_class_teacher and ClassAssignment.objects.filter(
+            stream_id=self.stream_id, year=self.year, is_class_teacher=True,
+        ).exclude(pk=self.pk).exists()
 
 
 # --------------------------
@@ -170,3 +197,50 @@ class SubjectAssignment(models.Model):
     def __str__(self):
         name = getattr(self.teacher.user, 'get_full_name', lambda: self.teacher.user.username)()
         return f"{name} - {self.subject.name} ({self.stream.grade} {self.stream.name}, {self.year})"
+
+
+# --------------------------
+# Timetable (see teachers/timetable.py)
+# --------------------------
+class Timetable(models.Model):
+    school = models.ForeignKey(School, on_delete=models.CASCADE, related_name='timetables')
+    year = models.IntegerField(default=date.today().year)
+    days = models.PositiveSmallIntegerField(default=5)
+    periods_per_day = models.PositiveSmallIntegerField(default=8)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('school', 'year')
+        ordering = ['-year', 'school']
+        verbose_name = 'Timetable'
+        verbose_name_plural = 'Timetables'
+
+    def __str__(self):
+        return f"{self.school.name} timetable ({self.year})"
+
+
+class TimetableLesson(models.Model):
+    """
+    One weekly lesson of a SubjectAssignment. Stream and teacher are copied
+    from the assignment so the database rejects clashes.
+    """
+    timetable = models.ForeignKey(Timetable, on_delete=models.CASCADE, related_name='lessons')
+    assignment = models.ForeignKey(SubjectAssignment, on_delete=models.CASCADE, related_name='lessons')
+    number = models.PositiveSmallIntegerField(help_text="Which of the assignment's weekly lessons this is.")
+    stream = models.ForeignKey(Stream, on_delete=models.CASCADE, related_name='lessons')
+    teacher = models.ForeignKey(Teacher, on_delete=models.CASCADE, related_name='lessons')
+    day = models.PositiveSmallIntegerField()
+    period = models.PositiveSmallIntegerField()
+
+    class Meta:
+        ordering = ['day', 'period']
+        constraints = [
+            models.UniqueConstraint(fields=['assignment', 'number'], name='lesson_assignment_number_uniq'),
+            models.UniqueConstraint(fields=['timetable', 'stream', 'day', 'period'], name='lesson_stream_slot_uniq'),
+            models.UniqueConstraint(fields=['timetable', 'teacher', 'day', 'period'], name='lesson_teacher_slot_uniq'),
+        ]
+        verbose_name = 'Timetable Lesson'
+        verbose_name_plural = 'Timetable Lessons'
+
+    def __str__(self):
+        return f"{self.stream} day {self.day + 1} period {self.period + 1}"
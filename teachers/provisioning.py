@@ -0,0 +1,250 @@
+"""
+Bulk teacher account provisioning from CSV or XLSX uploads.
+
+Creates a CustomUser and a Teacher per row, in batches. Each batch is
+validated with TeacherImportForm (no database access), its school codes
+resolved from a lookup map, and its TSC numbers and usernames checked for
+duplicates with one query each. Every new account gets a random password;
+hashing it (PBKDF2, hundreds of milliseconds each) is nearly all the work,
+so the batch's passwords are hashed in a process pool before its
+transaction starts. Users and teachers are then inserted with bulk_create
+and each teacher's login details are queued in the mail outbox
+(accounts/outbox.py). Rows with errors are skipped and reported.
+
+Usage:
+    report = provision_teachers(request.FILES['file'], school=teacher.school)
+    report.created, report.errors
+"""
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.utils.crypto import get_random_string
+
+from accounts.outbox import enqueue_mails
+from home.stats import adjust_headline_stat
+from learners.importers import ImportReport, LearnerImportError, read_rows
+from reports import rollups, versions
+from schools.models import School
+
+from .forms import TeacherImportForm
+from .models import Teacher
+
+User = get_user_model()
+
+
+BATCH_SIZE = 500
+
+# Processes hashing passwords for an upload from the web: a request must
+# not take every CPU of the server (the management command defaults to all).
+WEB_WORKERS = 2
+
+COLUMNS = list(TeacherImportForm.base_fields) + ['school_code']
+REQUIRED_COLUMNS = ['tsc_number', 'first_name', 'last_name', 'email']
+
+# Initial passwords: no look-alike characters (l, I, 1, o, O, 0).
+PASSWORD_CHARS = 'abcdefghjkmnpqrstuvwxyzABCDEFGHJKLMNPQRSTUVWXYZ23456789'
+PASSWORD_LENGTH = 8
+
+
+class TeacherImportError(ValueError):
+    """
+    The file as a whole cannot be imported (unknown format, bad header).
+    """
+
+
+def generate_password():
+    return get_random_string(PASSWORD_LENGTH, PASSWORD_CHARS)
+
+
+def account_mail(user, password):
+    """
+    (subject, body, recipients) of the login details sent to a new teacher.
+    """
+    return (
+        "Your Teacher Account",
+        f"Hello {user.get_full_name()}\nUsername: {user.username}\nPassword: {password}",
+        [user.email],
+    )
+
+
+# --------------------------
+# Password hashing
+# --------------------------
+
+def _hash_passwords(passwords):
+    return [make_password(password) for password in passwords]
+
+
+class PasswordHasher:
+    """
+    Hashes lists of passwords across `workers` processes.
+
+    Workers are spawned rather than forked, so they share no database
+    connection, lock or thread with the web process, and are started on
+    first use: a file with no valid rows never starts them.
+    """
+
+    def __init__(self, workers=None):
+        self.workers = workers or os.cpu_count() or 1
+        self._pool = None
+
+    def hash(self, passwords):
+        if self.workers == 1 or len(passwords) < 2:
+            return _hash_passwords(passwords)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=django.setup,
+            )
+        size = -(-len(passwords) // self.workers)
+        chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        return [hashed for chunk in self._pool.map(_hash_passwords, chunks) for hashed in chunk]
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+# --------------------------
+# Provisioning
+# --------------------------
+
+def _process_batch(batch, school, schools, within, seen, report, hasher, dry_run):
+    """
+    Validate one batch of (row number, row) pairs and create the valid teachers.
+    """
+    if school is None:
+        codes = {str(row['school_code']) for _, row in batch if row.get('school_code')} - set(schools)
+        # Codes outside `within` are remembered as None: looked up once and
+        # reported as unknown, so the user learns nothing about other areas.
+        schools.update(dict.fromkeys(codes))
+        for found in within.filter(code__in=codes).only('pk', 'code', 'county_id', 'sub_county_id', 'ward_id'):
+            schools[found.code] = found
+
+    forms = [(number, row, TeacherImportForm(row)) for number, row in batch]
+    valid = [form.cleaned_data for _, _, form in forms if form.is_valid()]
+    taken_tsc = set(
+        Teacher.objects.filter(tsc_number__in=[data['tsc_number'] for data in valid])
+        .values_list('tsc_number', flat=True)
+    )
+    taken_usernames = set(
+        User.objects.filter(username__in=[data['username'] for data in valid]).values_list('username', flat=True)
+    )
+
+    accepted = []
+    for number, row, form in forms:
+        if not form.is_valid():
+            for field, errors in form.errors.items():
+                report.add_error(number, field, " ".join(errors))
+            continue
+        data = form.cleaned_data
+        tsc, username = data['tsc_number'], data['username']
+
+        if tsc in taken_tsc:
+            report.add_error(number, 'tsc_number', f"Teacher with TSC number {tsc} already exists.")
+            continue
+        if tsc in seen['tsc']:
+            report.add_error(number, 'tsc_number', f"TSC number {tsc} appears more than once in the file.")
+            continue
+        if username in taken_usernames:
+            report.add_error(number, 'username', f"Username {username} is already taken.")
+            continue
+        if username in seen['username']:
+            report.add_error(number, 'username', f"Username {username} appears more than once in the file.")
+            continue
+
+        row_school = school or schools.get(str(row.get('school_code', '')))
+        if row_school is None:
+            message = f"Unknown school code '{row['school_code']}'." if row.get('school_code') else "School code is required."
+            report.add_error(number, 'school_code', message)
+            continue
+
+        seen['tsc'].add(tsc)
+        seen['username'].add(username)
+        accepted.append((data, row_school))
+
+    if dry_run or not accepted:
+        report.created += len(accepted)
+        return
+
+    # Hash outside the transaction, so SQLite isn't locked while it runs.
+    passwords = [generate_password() for _ in accepted]
+    hashes = hasher.hash(passwords)
+
+    users, teachers = [], []
+    for (data, row_school), hashed in zip(accepted, hashes):
+        users.append(User(
+            username=data['username'], first_name=data['first_name'], last_name=data['last_name'],
+            email=data['email'], password=hashed,
+        ))
+        teacher = Teacher(
+            school_id=row_school.pk, role=data['role'], tsc_number=data['tsc_number'],
+            phone=data['phone'] or None,
+        )
+        if data['date_joined']:
+            teacher.date_joined = data['date_joined']
+        teachers.append(teacher)
+
+    with transaction.atomic():
+        User.objects.bulk_create(users, batch_size=BATCH_SIZE)
+        for user, teacher in zip(users, teachers):
+            teacher.user_id = user.pk
+        Teacher.objects.bulk_create(teachers, batch_size=BATCH_SIZE)
+
+        # bulk_create skips the rollup signal handlers.
+        rollup = Counter(
+            (row_school.county_id, row_school.sub_county_id, row_school.ward_id) for _, row_school in accepted
+        )
+        rollups.apply_deltas(teachers=rollup)
+        versions.bump(*{rollups.scope_key('school', row_school.pk) for _, row_school in accepted})
+        enqueue_mails([account_mail(user, password) for user, password in zip(users, passwords)])
+
+    adjust_headline_stat(Teacher, len(teachers))
+    report.created += len(teachers)
+
+
+def provision_teachers(uploaded, school=None, within=None, dry_run=False, workers=None, batch_size=BATCH_SIZE):
+    """
+    Create teacher accounts from an uploaded .csv or .xlsx file.
+
+    When `school` is given every teacher joins that school and the
+    school_code column is ignored; otherwise each row needs the
+    school_code of a school in `within` (a School queryset, default all).
+    `workers` processes hash passwords (default: one per CPU). With
+    dry_run=True rows are validated but nothing is saved. Raises
+    TeacherImportError when the file cannot be read at all.
+    """
+    report = ImportReport()
+    schools = {}
+    within = School.objects.all() if within is None else within
+    seen = {'tsc': set(), 'username': set()}
+
+    try:
+        with PasswordHasher(workers) as hasher:
+            batch = []
+            for number, row in read_rows(uploaded, columns=COLUMNS, required=REQUIRED_COLUMNS):
+                report.rows += 1
+                batch.append((number, row))
+                if len(batch) >= batch_size:
+                    _process_batch(batch, school, schools, within, seen, report, hasher, dry_run)
+                    batch = []
+            if batch:
+                _process_batch(batch, school, schools, within, seen, report, hasher, dry_run)
+    except LearnerImportError as e:
+        raise TeacherImportError(str(e))
+
+    return report
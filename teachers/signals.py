@@ -0,0 +1,32 @@
+"""
+Re-solve a saved timetable when one of its subject assignments is created
+or changed (teachers/timetable.py), once the transaction commits. Deleted
+assignments take their lessons with them (on_delete=CASCADE).
+"""
+import logging
+from functools import partial
+
+from django.db import IntegrityError, transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import SubjectAssignment
+from .timetable import TimetableError, update_timetable
+
+logger = logging.getLogger(__name__)
+
+
+def _update_timetable_logged(pk):
+    try:
+        update_timetable(pk)
+    except SubjectAssignment.DoesNotExist:
+        pass
+    except (TimetableError, IntegrityError) as e:
+        # Doesn't fit any more, or a concurrent update moved the same lessons.
+        logger.warning("Timetable not updated for subject assignment %s (run generate_timetable): %s", pk, e)
+
+
+@receiver(post_save, sender=SubjectAssignment)
+def resolve_timetable(sender, instance, raw=False, **kwargs):
+    if not raw:
+        transaction.on_commit(partial(_update_timetable_logged, instance.pk))
@@ -1,3 +1,255 @@
+import random
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import IntegrityError, connection, transaction
+from django.forms import modelform_factory
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from accounts.models import OutboxMessage
+from reports.rollups import get_summary
+from schools.models import School
+from subjects.models import Subject
+from utils.testing import make_school, make_teacher, make_user, make_ward
+
+from .forms import ClassAssignmentForm
+from .models import ClassAssignment, Stream, SubjectAssignment, Teacher, Timetable, TimetableLesson
+from .provisioning import WEB_WORKERS, provision_teachers
+from .timetable import Solver, TimetableError, check_loads, generate_timetable, update_timetable
+
+
+# --------------------------
+# Timetable solver
+# --------------------------
+
+class SolverTests(TestCase):
+
+    def assertNoClashes(self, solver):
+        for node in [('t', teacher) for teacher, _, _ in solver.lessons.values()] + \
+                    [('s', stream) for _, stream, _ in solver.lessons.values()]:
+            keys = [key for key, lesson in solver.lessons.items() if node in {('t', lesson[0]), ('s', lesson[1])}]
+            self.assertEqual(len({solver.slots[key] for key in keys}), len(keys))
+            self.assertEqual({slot: key for key, slot in solver.slots.items() if key in keys}, solver.busy[node])
+
+    def test_full_week(self):
+        """
+        Every teacher and stream has a lesson in every slot, so lessons
+        late in the order only fit through swap chains.
+        """
+        rng = random.Random(7)
+        solver = Solver(days=2, periods_per_day=5)
+        lessons = []
+        for _ in range(solver.size):
+            streams = list(range(8))
+            rng.shuffle(streams)
+            lessons += [(teacher, stream, rng.randrange(3)) for teacher, stream in enumerate(streams)]
+
+        with mock.patch.object(Solver, '_swap_chain', autospec=True, side_effect=Solver._swap_chain) as swap:
+            for key, lesson in enumerate(lessons):
+                solver.add(key, *lesson)
+        self.assertTrue(swap.called)
+        self.assertEqual(len(solver.slots), len(lessons))
+        self.assertNoClashes(solver)
+
+        with self.assertRaises(TimetableError):
+            solver.add('extra', 0, 0, 0)
+
+    def test_remove_and_add(self):
+        solver = Solver(days=1, periods_per_day=3)
+        for key, lesson in enumerate([(1, 1, 1), (1, 2, 1), (2, 1, 2)]):
+            solver.add(key, *lesson)
+        solver.remove(0)
+        solver.add(3, 2, 2, 2)
+        self.assertNoClashes(solver)
+
+    def test_check_loads(self):
+        check_loads([(1, 1, 1, 20), (1, 2, 1, 20)], 40)
+        with self.assertRaisesMessage(TimetableError, "teacher 1: 41"):
+            check_loads([(1, 1, 1, 20), (1, 2, 1, 21)], 40)
+
+
+class TimetableTests(TestCase):
+
+    def setUp(self):
+        self.school = make_school(make_ward(), 'S1')
+        self.streams = [Stream.objects.create(school=self.school, grade='Grade 4', name=name) for name in 'ABC']
+        self.teachers = [make_teacher(self.school, name) for name in ['wanjiru', 'otieno', 'mutua']]
+        self.subjects = [
+            Subject.objects.create(name=name, grade_level='UpperPrimary', lessons_per_week=n)
+            for name, n in [('Mathematics', 5), ('English', 4), ('Science', 3)]
+        ]
+        # Each teacher takes one subject in every stream.
+        for teacher, subject in zip(self.teachers, self.subjects):
+            for stream in self.streams:
+                SubjectAssignment.objects.create(teacher=teacher, subject=subject, stream=stream, year=2025)
+
+    def assertNoClashes(self, timetable):
+        lessons = list(timetable.lessons.values_list('stream_id', 'teacher_id', 'day', 'period'))
+        self.assertEqual(len({(s, d, p) for s, _, d, p in lessons}), len(lessons))
+        self.assertEqual(len({(t, d, p) for _, t, d, p in lessons}), len(lessons))
+
+    def test_generate(self):
+        timetable, count = generate_timetable(self.school, year=2025, days=2, periods_per_day=8)
+        self.assertEqual(count, 36)
+        self.assertEqual(timetable.lessons.count(), 36)
+        self.assertNoClashes(timetable)
+
+        # Each subject is spread over both days.
+        days = timetable.lessons.filter(assignment__subject=self.subjects[0], stream=self.streams[0])
+        self.assertEqual(set(days.values_list('day', flat=True)), {0, 1})
+
+        # Mutua's 18 lessons no longer fit.
+        self.subjects[2].lessons_per_week = 6
+        self.subjects[2].save()
+        with self.assertRaises(TimetableError):
+            generate_timetable(self.school, year=2025, days=2, periods_per_day=8)
+        self.assertEqual(timetable.lessons.count(), 36)
+
+    def test_update(self):
+        timetable, _ = generate_timetable(self.school, year=2025, days=2, periods_per_day=8)
+        assignment = SubjectAssignment.objects.get(teacher=self.teachers[2], stream=self.streams[0])
+
+        assignment.teacher = self.teachers[1]
+        with self.captureOnCommitCallbacks(execute=True):
+            assignment.save()
+        self.assertEqual(timetable.lessons.filter(teacher=self.teachers[1]).count(), 12 + 3)
+        self.assertNoClashes(timetable)
+
+        # Moved to a year without a timetable: its lessons go.
+        self.assertEqual(TimetableLesson.objects.filter(assignment=assignment).count(), 3)
+        SubjectAssignment.objects.filter(pk=assignment.pk).update(year=2026)
+        self.assertIsNone(update_timetable(assignment))
+        self.assertFalse(TimetableLesson.objects.filter(assignment=assignment).exists())
+        self.assertEqual(Timetable.objects.get().lessons.count(), 33)
+
+
+# --------------------------
+# One class teacher per stream and year
+# --------------------------
+
+class ClassTeacherTests(TestCase):
+
+    def setUp(self):
+        self.school = make_school(make_ward(), 'S1')
+        self.stream = Stream.objects.create(school=self.school, grade='Grade 2', name='A')
+        self.first = make_teacher(self.school, 'wanjiru')
+        self.second = make_teacher(self.school, 'otieno', role='school_admin', user_role='school_admin')
+        ClassAssignment.objects.create(teacher=self.first, stream=self.stream, year=2025, is_class_teacher=True)
+        self.data = {'teacher': self.second.pk, 'stream': self.stream.pk, 'year': 2025, 'is_class_teacher': 'on'}
+
+    def test_database_enforces_it(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ClassAssignment.objects.create(teacher=self.second, stream=self.stream, year=2025, is_class_teacher=True)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ClassAssignment.objects.bulk_create([
+                ClassAssignment(teacher=self.second, stream=self.stream, year=2025, is_class_teacher=True),
+            ])
+        # Ordinary assignments and other years are fine.
+        ClassAssignment.objects.create(teacher=self.second, stream=self.stream, year=2025)
+        ClassAssignment.objects.create(teacher=self.second, stream=self.stream, year=2026, is_class_teacher=True)
+
+    def test_forms(self):
+        # The app's form leaves the check to the database...
+        form = ClassAssignmentForm(self.data)
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(form.is_valid())
+        self.assertFalse([query for query in queries if '"is_class_teacher"' in query['sql']])
+        self.assertTrue(form.instance.has_class_teacher_conflict())
+
+        # ...other ModelForms, like the admin's, still validate it.
+        form = modelform_factory(ClassAssignment, fields=['teacher', 'stream', 'year', 'is_class_teacher'])(self.data)
+        self.assertFalse(form.is_valid())
+        self.assertIn("This stream already has a class teacher for that year.", form.non_field_errors())
+
+    def test_view_reports_taken_stream(self):
+        self.client.force_login(self.second.user)
+        response = self.client.post(reverse('teachers:class_assignment_add'), self.data)
+        self.assertEqual(response.status_code, 200)
+        self.assertFormError(
+            response.context['form'], 'is_class_teacher', f"{self.stream} already has a class teacher for 2025.",
+        )
+        self.assertEqual(ClassAssignment.objects.count(), 1)
+
+    def test_other_integrity_errors_are_raised(self):
+        self.client.force_login(self.second.user)
+        data = {**self.data, 'year': 2026}
+        with mock.patch.object(ClassAssignmentForm, 'save', side_effect=IntegrityError("disk full")):
+            with self.assertRaises(IntegrityError):
+                self.client.post(reverse('teachers:class_assignment_add'), data)
+
+
+# --------------------------
+# Teacher provisioning
+# --------------------------
+
+def teacher_file(*rows, name='teachers.csv'):
+    lines = ['tsc_number,first_name,last_name,email,school_code,role'] + [','.join(row) for row in rows]
+    return SimpleUploadedFile(name, '\n'.join(lines).encode())
+
+
+class ProvisioningTests(TestCase):
+
+    def setUp(self):
+        self.school = make_school(make_ward('Nakuru'), 'S1')
+        self.other_school = make_school(make_ward('Kisumu'), 'S2')
+
+    def test_creates_accounts_and_reports_bad_rows(self):
+        make_teacher(self.school, 'taken')
+        uploaded = teacher_file(
+            ('T1', 'Jane', 'Wambui', 'jane@example.com', 'S1', 'head_teacher'),
+            ('T2', 'Peter', 'Ouma', 'peter@example.com', 'S2', ''),
+            ('TSC-taken', 'Tom', 'Kip', 'tom@example.com', 'S1', ''),
+            ('T1', 'Jane', 'Again', 'jane2@example.com', 'S1', ''),
+            ('T3', 'Ann', 'Mumbi', 'not-an-email', 'S1', ''),
+            ('T4', 'Ann', 'Mumbi', 'ann@example.com', 'NOPE', ''),
+        )
+
+        report = provision_teachers(uploaded, workers=1, batch_size=2)
+
+        self.assertEqual((report.rows, report.created, report.failed_rows), (6, 2, 4))
+        self.assertEqual([column for _, column, _ in report.errors], ['tsc_number', 'tsc_number', 'email', 'school_code'])
+        jane = Teacher.objects.select_related('user').get(tsc_number='T1')
+        self.assertEqual((jane.school, jane.role, jane.user.username), (self.school, 'head_teacher', 'T1'))
+        self.assertTrue(jane.user.has_usable_password())
+        self.assertEqual(Teacher.objects.get(tsc_number='T2').role, 'subject_teacher')
+        # bulk_create skips the signals; the provisioner applies the deltas.
+        self.assertEqual(get_summary('county', self.school.county_id)['teachers'], 2)
+        self.assertEqual(OutboxMessage.objects.filter(recipients=['jane@example.com']).count(), 1)
+
+    def test_dry_run_and_fixed_school(self):
+        uploaded = teacher_file(('T1', 'Jane', 'Wambui', 'jane@example.com', 'S2', ''))
+        self.assertEqual(provision_teachers(uploaded, school=self.school, dry_run=True, workers=1).created, 1)
+        self.assertFalse(Teacher.objects.exists())
+
+        uploaded.seek(0)
+        provision_teachers(uploaded, school=self.school, workers=1)
+        self.assertEqual(Teacher.objects.get().school, self.school)
+
+    def test_codes_outside_the_area_are_unknown(self):
+        uploaded = teacher_file(
+            ('T1', 'Jane', 'Wambui', 'jane@example.com', 'S1', ''),
+            ('T2', 'Peter', 'Ouma', 'peter@example.com', 'S2', ''),
+        )
+        within = School.objects.filter(county_id=self.school.county_id)
+
+        report = provision_teachers(uploaded, within=within, workers=1)
+
+        self.assertEqual(report.created, 1)
+        self.assertEqual(report.errors, [(3, 'school_code', "Unknown school code 'S2'.")])
+
+    def test_import_view_limits_directors_to_their_area(self):
+        rows = [('T1', 'Jane', 'Wambui', 'jane@example.com', 'S1', '')]
+        url = reverse('teachers:teacher_import')
+
+        # Directors' county or subcounty is not set: no school is theirs.
+        self.client.force_login(make_user('director', role='subcounty_director'))
+        response = self.client.post(url, {'file': teacher_file(*rows)})
+        self.assertEqual(response.context['report'].errors, [(2, 'school_code', "Unknown school code 'S1'.")])
 
-# Create your tests here.
+        self.client.force_login(make_user('cs', role='cabinet_secretary'))
+        with mock.patch('teachers.views.provision_teachers', wraps=provision_teachers) as provision:
+            response = self.client.post(url, {'file': teacher_file(*rows)})
+        self.assertEqual(response.context['report'].created, 1)
+        self.assertEqual(provision.call_args.kwargs['workers'], WEB_WORKERS)
@@ -0,0 +1,278 @@
+"""
+School timetables built from SubjectAssignments.
+
+Every SubjectAssignment (teacher, subject, stream) needs
+subject.lessons_per_week lessons a week, each in a (day, period) slot,
+with no stream and no teacher in two lessons at once. Seen as a graph,
+each lesson is an edge between its teacher and its stream and the slots
+are colours: a timetable is a proper edge colouring of a bipartite graph.
+By König's theorem that needs only as many slots as the busiest teacher
+or stream has lessons, and one can be found one lesson at a time:
+
+- put the lesson in a slot free for both its teacher and its stream,
+  preferring days where the stream doesn't have the subject yet and that
+  are less full, so lessons spread over the week;
+- if none is free for both, take slot a free for the teacher and slot b
+  free for the stream, swap a and b along the chain of a/b lessons that
+  starts at the stream, and slot a is now free for both. The chain never
+  reaches the teacher, so no other lesson clashes.
+
+So a timetable is always found when no stream or teacher has more lessons
+than the week has periods (otherwise TimetableError names them), in time
+linear in lessons x slots: a 40-stream school takes well under a second.
+
+Changing one assignment re-solves only its lessons (update_timetable):
+the rest of the week stays where it was, except lessons on a swapped chain.
+The signal in teachers/signals.py does this when an assignment is saved;
+run `manage.py generate_timetable` after bulk changes or after changing
+subject lesson counts.
+
+Usage:
+    timetable, lessons = generate_timetable(school, year=2025)
+    update_timetable(assignment)
+"""
+from collections import Counter, defaultdict
+from datetime import date
+
+from django.conf import settings
+from django.db import transaction
+
+from .models import SubjectAssignment, Timetable, TimetableLesson
+
+
+DEFAULTS = {
+    'DAYS': 5,
+    'PERIODS_PER_DAY': 8,
+}
+
+
+def _config():
+    return {**DEFAULTS, **getattr(settings, 'TIMETABLE', {})}
+
+
+class TimetableError(ValueError):
+    """
+    The lessons cannot fit in the week: some stream or teacher has more
+    lessons than there are periods.
+    """
+
+
+# --------------------------
+# Solver
+# --------------------------
+
+class Solver:
+    """
+    Places lessons in slots 0 .. days * periods_per_day - 1.
+
+    A lesson is identified by a hashable key (the timetable uses
+    (assignment id, number)) and belongs to a teacher, a stream and a
+    subject, given as ids.
+    """
+
+    def __init__(self, days, periods_per_day):
+        self.days = days
+        self.periods_per_day = periods_per_day
+        self.size = days * periods_per_day
+        self.lessons = {}   # key -> (teacher, stream, subject)
+        self.slots = {}     # key -> slot
+        self.busy = defaultdict(dict)   # ('t', teacher) / ('s', stream) -> {slot: key}
+        self.subject_days = Counter()   # (stream, subject, day) -> lessons
+        self.stream_days = Counter()    # (stream, day) -> lessons
+
+    def day_period(self, slot):
+        return divmod(slot, self.periods_per_day)
+
+    def _nodes(self, key):
+        teacher, stream, _ = self.lessons[key]
+        return ('t', teacher), ('s', stream)
+
+    def _place(self, key, slot):
+        _, stream, subject = self.lessons[key]
+        day = slot // self.periods_per_day
+        for node in self._nodes(key):
+            self.busy[node][slot] = key
+        self.slots[key] = slot
+        self.subject_days[(stream, subject, day)] += 1
+        self.stream_days[(stream, day)] += 1
+
+    def _unplace(self, key):
+        _, stream, subject = self.lessons[key]
+        slot = self.slots.pop(key)
+        day = slot // self.periods_per_day
+        for node in self._nodes(key):
+            del self.busy[node][slot]
+        self.subject_days[(stream, subject, day)] -= 1
+        self.stream_days[(stream, day)] -= 1
+
+    def _cost(self, stream, subject, slot):
+        day = slot // self.periods_per_day
+        return (self.subject_days[(stream, subject, day)], self.stream_days[(stream, day)], slot)
+
+    def _swap_chain(self, node, a, b):
+        """
+        Swap slots a and b on the chain of a/b lessons starting at `node`.
+        """
+        chain, slot, other = [], a, b
+        while slot in self.busy[node]:
+            key = self.busy[node][slot]
+            chain.append(key)
+            teacher, stream = self._nodes(key)
+            node = stream if node == teacher else teacher
+            slot, other = other, slot
+        moved = [(key, b if self.slots[key] == a else a) for key in chain]
+        for key, _ in moved:
+            self._unplace(key)
+        for key, slot in moved:
+            self._place(key, slot)
+
+    def load(self, key, teacher, stream, subject, slot):
+        """
+        Put a lesson back in the slot it was saved in, without solving.
+        """
+        self.lessons[key] = (teacher, stream, subject)
+        self._place(key, slot)
+
+    def add(self, key, teacher, stream, subject):
+        """
+        Place a new lesson; returns its slot.
+        """
+        t, s = ('t', teacher), ('s', stream)
+        for kind, node, pk in (('Teacher', t, teacher), ('Stream', s, stream)):
+            if len(self.busy[node]) >= self.size:
+                raise TimetableError(f"{kind} {pk} already has all {self.size} periods of the week.")
+        self.lessons[key] = (teacher, stream, subject)
+        free = [slot for slot in range(self.size) if slot not in self.busy[t] and slot not in self.busy[s]]
+        if free:
+            slot = min(free, key=lambda slot: self._cost(stream, subject, slot))
+        else:
+            a = next(slot for slot in range(self.size) if slot not in self.busy[t])
+            b = min(
+                (slot for slot in range(self.size) if slot not in self.busy[s]),
+                key=lambda slot: self._cost(stream, subject, slot),
+            )
+            self._swap_chain(s, a, b)
+            slot = a
+        self._place(key, slot)
+        return slot
+
+    def remove(self, key):
+        self._unplace(key)
+        del self.lessons[key]
+
+
+def check_loads(lessons, size):
+    """
+    Raise TimetableError listing every teacher and stream with more than
+    `size` lessons; `lessons` is [(teacher, stream, subject, count)].
+    """
+    teachers, streams = Counter(), Counter()
+    for teacher, stream, _, count in lessons:
+        teachers[teacher] += count
+        streams[stream] += count
+    over = [f"teacher {pk}: {n}" for pk, n in teachers.items() if n > size]
+    over += [f"stream {pk}: {n}" for pk, n in streams.items() if n > size]
+    if over:
+        raise TimetableError(f"More lessons than the {size} periods in the week ({'; '.join(over)}).")
+
+
+# --------------------------
+# Timetables
+# --------------------------
+
+def _assignment_lessons(assignments):
+    """
+    [(assignment id, teacher, stream, subject, lessons per week)] for SubjectAssignment rows.
+    """
+    return list(assignments.values_list('pk', 'teacher_id', 'stream_id', 'subject_id', 'subject__lessons_per_week'))
+
+
+def _lesson_row(timetable, solver, key):
+    (assignment_id, number), slot = key, solver.slots[key]
+    teacher, stream, _ = solver.lessons[key]
+    day, period = solver.day_period(slot)
+    return TimetableLesson(
+        timetable=timetable, assignment_id=assignment_id, number=number,
+        stream_id=stream, teacher_id=teacher, day=day, period=period,
+    )
+
+
+def generate_timetable(school, year=None, days=None, periods_per_day=None):
+    """
+    Build the school's timetable for a year from scratch, replacing any
+    saved one. Returns (Timetable, number of lessons).
+    Raises TimetableError when the lessons do not fit.
+    """
+    config = _config()
+    year = year or date.today().year
+    days = days or config['DAYS']
+    periods_per_day = periods_per_day or config['PERIODS_PER_DAY']
+
+    wanted = _assignment_lessons(SubjectAssignment.objects.filter(stream__school=school, year=year).order_by())
+    check_loads([row[1:] for row in wanted], days * periods_per_day)
+
+    solver = Solver(days, periods_per_day)
+    # Subjects with the most lessons first: they are the hardest to spread.
+    for pk, teacher, stream, subject, count in sorted(wanted, key=lambda row: (-row[4], row[0])):
+        for number in range(count):
+            solver.add((pk, number), teacher, stream, subject)
+
+    with transaction.atomic():
+        timetable, _ = Timetable.objects.update_or_create(
+            school=school, year=year, defaults={'days': days, 'periods_per_day': periods_per_day},
+        )
+        timetable.lessons.all().delete()
+        TimetableLesson.objects.bulk_create(
+            [_lesson_row(timetable, solver, key) for key in solver.slots], batch_size=1000,
+        )
+    return timetable, len(solver.slots)
+
+
+def load_solver(timetable):
+    """
+    A Solver holding a saved timetable's lessons in their slots.
+    """
+    solver = Solver(timetable.days, timetable.periods_per_day)
+    for assignment_id, number, teacher, stream, subject, day, period in timetable.lessons.order_by().values_list(
+        'assignment_id', 'number', 'teacher_id', 'stream_id', 'assignment__subject_id', 'day', 'period',
+    ):
+        solver.load((assignment_id, number), teacher, stream, subject, day * timetable.periods_per_day + period)
+    return solver
+
+
+def update_timetable(assignment):
+    """
+    Re-solve one SubjectAssignment's lessons in its school's saved
+    timetable after the assignment was created or changed. Other lessons
+    only move when a swap needs them to. Returns the number of lessons
+    written, or None when the school has no timetable for that year.
+    Raises TimetableError when the lessons no longer fit.
+    """
+    assignment = SubjectAssignment.objects.select_related('stream', 'subject').get(pk=getattr(assignment, 'pk', assignment))
+    timetable = Timetable.objects.filter(school_id=assignment.stream.school_id, year=assignment.year).first()
+    # Moved to another school or year: drop its lessons from the old timetable.
+    TimetableLesson.objects.filter(assignment=assignment).exclude(timetable=timetable).delete()
+    if timetable is None:
+        return None
+
+    solver = load_solver(timetable)
+    before = dict(solver.slots)
+    for key in [key for key in solver.lessons if key[0] == assignment.pk]:
+        solver.remove(key)
+    for number in range(assignment.subject.lessons_per_week):
+        solver.add((assignment.pk, number), assignment.teacher_id, assignment.stream_id, assignment.subject_id)
+
+    # The assignment's own lessons are always rewritten (its teacher or
+    # stream may have changed); others only if a swap moved them.
+    changed = [key for key, slot in solver.slots.items() if key[0] == assignment.pk or before.get(key) != slot]
+    stale = [key for key in before if key[0] == assignment.pk or solver.slots.get(key) != before[key]]
+    with transaction.atomic():
+        # Delete before inserting: moved lessons may trade slots, which row
+        # by row updates would see as clashes.
+        for assignment_id in {pk for pk, _ in stale}:
+            timetable.lessons.filter(
+                assignment_id=assignment_id, number__in=[number for pk, number in stale if pk == assignment_id],
+            ).delete()
+        TimetableLesson.objects.bulk_create([_lesson_row(timetable, solver, key) for key in changed])
+        timetable.save(update_fields=['generated_at'])
+    return len(changed)
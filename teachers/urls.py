@@ -20,6 +20,7 @@ urlpatterns = [
     # -------------------------
     path('list/', views.teacher_list, name='teacher_list'),
     path('add/', views.teacher_add, name='teacher_add'),
+    path('import/', views.teacher_import, name='teacher_import'),
     path('<int:pk>/edit/', views.teacher_update, name='teacher_update'),
     path('<int:pk>/', views.teacher_detail, name='teacher_detail'),
 
@@ -36,6 +37,11 @@ urlpatterns = [
     path('subject-assignments/', views.subject_assignment_list, name='subject_assignment_list'),
     path('subject-assignments/add/', views.subject_assignment_add, name='subject_assignment_add'),
 
+    # -------------------------
+    # Timetables
+    # -------------------------
+    path('streams/<int:stream_id>/timetable/', views.stream_timetable, name='stream_timetable'),
+
     # -------------------------
     # Future-ready Endpoints (Phase 7+)
     # -------------------------
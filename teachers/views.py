@@ -1,30 +1,72 @@
 # teachers/views.py
 
+from datetime import date
+
+from django.http import HttpResponseBadRequest
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth import authenticate, login, logout
 from django.contrib import messages
-from django.db import transaction
+from django.db import IntegrityError, transaction
 from django.db.models import Q
 from django.urls import reverse, reverse_lazy
 
-from accounts.models import CustomUser as User
+from accounts.outbox import enqueue_mail
 
-from .models import Teacher, ClassAssignment, SubjectAssignment
+from .models import Teacher, ClassAssignment, SubjectAssignment, Stream, Timetable
 from learners.models import Learner
+from schools.models import School
 
 from .forms import (
     UserForm,
     TeacherForm,
     ClassAssignmentForm,
     SubjectAssignmentForm,
-    TeacherSearchForm
+    TeacherSearchForm,
+    TeacherUploadForm,
+)
+from .provisioning import (
+    COLUMNS, WEB_WORKERS, TeacherImportError, account_mail, generate_password, provision_teachers,
 )
 
 from utils.decorators import role_required
+from utils.exports import export_csv
+from utils.pagination import InvalidCursor, KeysetPaginator
 from accounts.views import redirect_user_by_role
 
 
+TEACHER_EXPORT_COLUMNS = [
+    ('TSC Number', 'tsc_number'),
+    ('First Name', 'user__first_name'),
+    ('Last Name', 'user__last_name'),
+    ('Email', 'user__email'),
+    ('Phone', 'phone'),
+    ('Role', 'role'),
+    ('School Code', 'school__code'),
+    ('School', 'school__name'),
+    ('Date Joined', 'date_joined'),
+]
+
+TEACHER_PAGE_SIZE = 25
+
+DAY_NAMES = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Sort option -> keyset ordering. Role and date joined are served by the
+# Teacher indexes on (school, role, id) / (school, date_joined, id); names
+# live in the user table, so a name sort orders one school's staff in memory.
+TEACHER_SORTS = {
+    'name': ('user__last_name', 'user__first_name', 'pk'),
+    'role': ('role', 'pk'),
+    'joined': ('date_joined', 'pk'),
+}
+
+# The columns teacher_list.html shows.
+TEACHER_LIST_FIELDS = (
+    'role', 'phone', 'date_joined', 'profile_image',
+    'user__first_name', 'user__last_name', 'user__email',
+)
+
+
 # ============================================================
 # TEACHER HOME / DASHBOARD
 # ============================================================
@@ -36,7 +78,8 @@ def home(request):
     school = getattr(teacher_profile, 'school', None)
 
     total_teachers = Teacher.objects.filter(school=school).count() if school else Teacher.objects.count()
-    total_learners = Learner.objects.filter(school=school).count() if school else Learner.objects.count()
+    learners = Learner.objects.filter(status=Learner.ACTIVE)
+    total_learners = learners.filter(school=school).count() if school else learners.count()
     total_schools = 1 if school else Teacher.objects.values('school').distinct().count()
 
     context = {
@@ -59,24 +102,46 @@ def home(request):
 @login_required
 @role_required(['school_admin', 'head_teacher'])
 def teacher_list(request):
+    """
+    The school's staff, a page at a time, sorted by ?sort= (see TEACHER_SORTS).
+    ?export=csv streams every matching teacher.
+    """
     teacher_profile = getattr(request.user, 'teacher_profile', None)
     school = getattr(teacher_profile, 'school', None)
 
-    teachers = Teacher.objects.filter(school=school).order_by('role', 'user__last_name')
+    teachers = Teacher.objects.filter(school=school)
 
     search_form = TeacherSearchForm(request.GET)
-    if search_form.is_valid() and search_form.cleaned_data.get('query'):
-        q = search_form.cleaned_data['query']
-        teachers = teachers.filter(
-            Q(user__first_name__icontains=q) |
-            Q(user__last_name__icontains=q) |
-            Q(user__email__icontains=q) |
-            Q(phone__icontains=q)
-        )
+    sort = 'name'
+    if search_form.is_valid():
+        q = search_form.cleaned_data.get('query')
+        if q:
+            teachers = teachers.filter(
+                Q(user__first_name__icontains=q) |
+                Q(user__last_name__icontains=q) |
+                Q(user__email__icontains=q) |
+                Q(phone__icontains=q)
+            )
+        sort = search_form.cleaned_data.get('sort') or sort
+
+    if request.GET.get('export') == 'csv':
+        return export_csv(teachers, TEACHER_EXPORT_COLUMNS, 'teachers.csv')
+
+    paginator = KeysetPaginator(
+        teachers.select_related('user').only(*TEACHER_LIST_FIELDS),
+        ordering=TEACHER_SORTS[sort],
+        per_page=TEACHER_PAGE_SIZE,
+    )
+    try:
+        page = paginator.page(request.GET.get('cursor'))
+    except InvalidCursor:
+        return HttpResponseBadRequest("Invalid cursor.")
 
     context = {
         'dashboard_title': "Teachers",
-        'teachers': teachers,
+        'teachers': page.object_list,
+        'page': page,
+        'sort': sort,
         'search_form': search_form,
         'breadcrumb': [
             {"name": "Home", "url": reverse_lazy('home:home')},
@@ -129,7 +194,7 @@ def teacher_add(request):
 
             # Create user (CustomUser)
             user = user_form.save(commit=False)
-            password = User.objects.make_random_password(8)
+            password = generate_password()
             user.set_password(password)
             user.save()
 
@@ -139,18 +204,9 @@ def teacher_add(request):
             teacher.school = school
             teacher.save()
 
-            # Attempt to send email (non-blocking)
-            try:
-                from django.core.mail import send_mail
-                send_mail(
-                    subject="Your Teacher Account",
-                    message=f"Hello {user.get_full_name()}\nUsername: {user.username}\nPassword: {password}",
-                    from_email="no-reply@myschool.com",
-                    recipient_list=[user.email],
-                    fail_silently=True,
-                )
-            except Exception:
-                messages.warning(request, "Teacher added but email failed to send.")
+            # Queued with the teacher; sent in the background after commit
+            if not enqueue_mail(*account_mail(user, password)):
+                messages.warning(request, "Teacher added but has no email address for their login details.")
 
             messages.success(request, "Teacher added successfully.")
             return redirect('teachers:teacher_list')
@@ -173,6 +229,65 @@ def teacher_add(request):
     })
 
 
+# ============================================================
+# IMPORT TEACHERS
+# ============================================================
+def _import_schools(user):
+    """
+    Schools whose codes a user without a school of their own may import
+    teachers into: their county or subcounty for directors (none if it is
+    not set), every school for the Cabinet Secretary.
+    """
+    if user.is_superuser or user.role == 'cabinet_secretary':
+        return School.objects.all()
+    county, subcounty = getattr(user, 'county', None), getattr(user, 'subcounty', None)
+    if user.role == 'county_director' and county:
+        return School.objects.filter(county=county)
+    if user.role == 'subcounty_director' and subcounty:
+        return School.objects.filter(sub_county=subcounty)
+    return School.objects.none()
+
+
+@login_required
+@role_required(['school_admin', 'head_teacher', 'subcounty_director', 'county_director', 'cabinet_secretary'])
+def teacher_import(request):
+    """
+    Create teacher accounts from a CSV/XLSX file and show a per-row error
+    report. School-level users import into their own school; other users
+    must give a school_code for every row, of a school in their area
+    (_import_schools). Login details are emailed.
+    """
+    teacher_profile = getattr(request.user, 'teacher_profile', None)
+    school = getattr(teacher_profile, 'school', None)
+
+    report = None
+    if request.method == 'POST':
+        form = TeacherUploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            try:
+                report = provision_teachers(
+                    form.cleaned_data['file'], school=school, within=_import_schools(request.user),
+                    dry_run=form.cleaned_data['dry_run'], workers=WEB_WORKERS,
+                )
+            except TeacherImportError as e:
+                form.add_error('file', str(e))
+    else:
+        form = TeacherUploadForm()
+
+    return render(request, 'teachers/teacher_import.html', {
+        'dashboard_title': "Import Teachers",
+        'form': form,
+        'report': report,
+        'school': school,
+        'columns': COLUMNS,
+        'breadcrumb': [
+            {"name": "Home", "url": reverse_lazy('home:home')},
+            {"name": "Teachers", "url": reverse_lazy('teachers:teacher_list')},
+            {"name": "Import Teachers", "url": '#'}
+        ]
+    })
+
+
 # ============================================================
 # UPDATE TEACHER
 # ============================================================
@@ -252,11 +367,19 @@ def class_assignment_add(request):
     if request.method == 'POST':
         form = ClassAssignmentForm(request.POST)
         if form.is_valid():
-            form.save()
-            messages.success(request, "Class assignment added successfully.")
-            return redirect('teachers:teacher_list')
-        else:
-            messages.error(request, "Please fix the errors below.")
+            try:
+                with transaction.atomic():
+                    form.save()
+            except IntegrityError:
+                # The form leaves the one-class-teacher check to the
+                # database; anything else is unexpected.
+                if not form.instance.has_class_teacher_conflict():
+                    raise
+                form.class_teacher_taken()
+            else:
+                messages.success(request, "Class assignment added successfully.")
+                return redirect('teachers:teacher_list')
+        messages.error(request, "Please fix the errors below.")
     else:
         form = ClassAssignmentForm()
 
@@ -281,7 +404,7 @@ def subject_assignment_list(request):
 
     assignments = SubjectAssignment.objects.filter(
         teacher__school=school
-    ).select_related('teacher', 'subject').order_by('stream__grade', 'subject__name')
+    ).select_related('teacher__user', 'subject', 'stream').order_by('stream__grade', 'subject__name')
 
     return render(request, 'teachers/subject_assignment_list.html', {
         'dashboard_title': "Subject Assignments",
@@ -345,3 +468,51 @@ def login_teacher(request):
 def logout_teacher(request):
     logout(request)
     return redirect("teachers:login_teacher")
+
+
+# ============================================================
+# TIMETABLES
+# ============================================================
+@login_required
+@role_required(['school_admin', 'head_teacher', 'teacher'])
+def stream_timetable(request, stream_id):
+    """
+    A stream's weekly timetable (see teachers/timetable.py), periods down
+    and days across. School-level users only see their own school's streams.
+    """
+    stream = get_object_or_404(Stream.objects.select_related('school'), pk=stream_id)
+    teacher_profile = getattr(request.user, 'teacher_profile', None)
+    school = getattr(teacher_profile, 'school', None)
+    if school and stream.school_id != school.pk:
+        return redirect('teachers:home')
+
+    try:
+        year = int(request.GET.get('year') or date.today().year)
+    except ValueError:
+        return HttpResponseBadRequest("Invalid year.")
+
+    timetable = Timetable.objects.filter(school_id=stream.school_id, year=year).first()
+    grid = []
+    if timetable:
+        cells = {
+            (lesson.period, lesson.day): lesson
+            for lesson in timetable.lessons.filter(stream=stream).select_related('assignment__subject', 'teacher__user')
+        }
+        grid = [
+            (period + 1, [cells.get((period, day)) for day in range(timetable.days)])
+            for period in range(timetable.periods_per_day)
+        ]
+
+    return render(request, 'teachers/stream_timetable.html', {
+        'dashboard_title': f"Timetable: {stream.grade} {stream.name}",
+        'stream': stream,
+        'year': year,
+        'timetable': timetable,
+        'days': DAY_NAMES[:timetable.days] if timetable else [],
+        'grid': grid,
+        'breadcrumb': [
+            {"name": "Home", "url": reverse_lazy('home:home')},
+            {"name": "Subject Assignments", "url": reverse_lazy('teachers:subject_assignment_list')},
+            {"name": f"{stream.grade} {stream.name} Timetable", "url": '#'}
+        ]
+    })
@@ -0,0 +1,72 @@
+# utils/exports.py
+import csv
+
+from django.http import StreamingHttpResponse
+
+
+# Rows fetched from the database per round trip.
+EXPORT_CHUNK_SIZE = 2000
+
+# Approximate size of each chunk sent to the client.
+EXPORT_BUFFER_SIZE = 64 * 1024
+
+
+class Echo:
+    """
+    File-like object whose write() returns the value, so csv.writer
+    produces strings we can yield instead of writing to a buffer.
+    """
+
+    def write(self, value):
+        return value
+
+
+def _stream(header, rows):
+    writer = csv.writer(Echo())
+    # Send the header straight away so the download starts before the query runs.
+    yield writer.writerow(header)
+
+    buffer, size = [], 0
+    for row in rows:
+        line = writer.writerow(row)
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_BUFFER_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def export_csv(queryset, columns, filename):
+    """
+    Stream a queryset as a CSV download with constant memory.
+
+    `columns` is a list of (header, field lookup) pairs, e.g.
+    [('Name', 'name'), ('County', 'county__name')]. Only those columns are
+    selected, rows are read in chunks with .iterator(), and they are
+    written in primary key order so the database never has to sort.
+
+    Usage:
+        if request.GET.get('export') == 'csv':
+            return export_csv(schools, SCHOOL_EXPORT_COLUMNS, 'schools.csv')
+    """
+    headers = [header for header, _ in columns]
+    rows = queryset.order_by('pk').values_list(*[lookup for _, lookup in columns]).iterator(
+        chunk_size=EXPORT_CHUNK_SIZE
+    )
+    response = StreamingHttpResponse(_stream(headers, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+def export_rows(header, rows, filename):
+    """
+    Stream already computed rows (an iterable of tuples) as a CSV download.
+
+    Usage:
+        return export_rows(['County', 'PTR'], rows, 'staffing.csv')
+    """
+    response = StreamingHttpResponse(_stream(header, rows), content_type='text/csv; charset=utf-8')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
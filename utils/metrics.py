@@ -0,0 +1,297 @@
+# utils/metrics.py
+"""
+Per-view request metrics in Prometheus text format.
+
+MetricsMiddleware records, per URL name, the request count, a latency
+histogram, the number of DB queries, DB time and template render time.
+Each worker process aggregates in memory and periodically writes a snapshot
+of its totals to its own file in METRICS['DIR'] (write to a temp file, then
+os.replace, so readers never see a partial file and workers never share a
+lock). The /metrics/ endpoint merges every process's file.
+
+Configure with the METRICS setting:
+
+    METRICS = {
+        'ENABLED': True,
+        'DIR': '/var/run/cbc_nemis/metrics',   # shared by all workers
+        'FLUSH_INTERVAL': 5,                    # seconds between snapshots
+        'BUCKETS': (0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+        'ALLOWED_IPS': ['127.0.0.1'],
+    }
+
+Clear DIR when the server is restarted (e.g. in the service's ExecStartPre);
+files of exited workers are kept so counters never go backwards mid-run.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from contextvars import ContextVar
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.http import HttpResponse, HttpResponseForbidden
+
+
+DEFAULTS = {
+    'ENABLED': False,
+    'DIR': Path(tempfile.gettempdir()) / 'cbc_nemis_metrics',
+    'FLUSH_INTERVAL': 5,
+    'BUCKETS': (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+    'ALLOWED_IPS': ['127.0.0.1', '::1'],
+}
+
+UNRESOLVED = '<unresolved>'
+
+# Per-request counters, set by the middleware and filled in by the DB and
+# template hooks running in the same thread / task.
+_current = ContextVar('metrics_request', default=None)
+
+
+def get_config():
+    return {**DEFAULTS, **getattr(settings, 'METRICS', {})}
+
+
+# --------------------------
+# Per-process store
+# --------------------------
+
+class MetricsStore:
+    """
+    In-memory totals for this process, flushed to <DIR>/<pid>-<start>.json.
+    """
+
+    def __init__(self, directory, buckets, flush_interval):
+        self.directory = Path(directory)
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self.flush_interval = flush_interval
+        self._reset()
+
+    def _reset(self):
+        # A forked worker inherits its parent's totals; start it afresh.
+        self.pid = os.getpid()
+        self.path = self.directory / f"{self.pid}-{time.time_ns()}.json"
+        self.views = {}
+        self.lock = threading.Lock()
+        self.last_flush = 0.0
+
+    def _empty(self):
+        return {
+            'requests': 0,
+            'buckets': [0] * len(self.buckets),
+            'duration': 0.0,
+            'db_queries': 0,
+            'db_seconds': 0.0,
+            'template_seconds': 0.0,
+        }
+
+    def record(self, view, duration, db_queries, db_seconds, template_seconds):
+        if os.getpid() != self.pid:
+            self._reset()
+
+        with self.lock:
+            row = self.views.get(view)
+            if row is None:
+                row = self.views[view] = self._empty()
+            row['requests'] += 1
+            row['duration'] += duration
+            row['db_queries'] += db_queries
+            row['db_seconds'] += db_seconds
+            row['template_seconds'] += template_seconds
+            for i, bound in enumerate(self.buckets):
+                if duration <= bound:
+                    row['buckets'][i] += 1
+                    break
+            due = time.monotonic() - self.last_flush >= self.flush_interval
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self.lock:
+            snapshot = json.dumps({'buckets': self.buckets, 'views': self.views})
+            self.last_flush = time.monotonic()
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(snapshot)
+        os.replace(tmp, self.path)
+
+    def collect(self):
+        """
+        Merge the snapshots of every process (this one flushed first).
+        """
+        self.flush()
+        merged = {}
+        for path in self.directory.glob('*.json'):
+            try:
+                data = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue  # removed or being replaced; picked up next scrape
+            if tuple(data['buckets']) != self.buckets:
+                continue  # written under different BUCKETS settings
+            for view, row in data['views'].items():
+                total = merged.setdefault(view, self._empty())
+                for key, value in row.items():
+                    if key == 'buckets':
+                        total[key] = [a + b for a, b in zip(total[key], value)]
+                    else:
+                        total[key] += value
+        return merged
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                config = get_config()
+                _store = MetricsStore(config['DIR'], config['BUCKETS'], config['FLUSH_INTERVAL'])
+    return _store
+
+
+# --------------------------
+# Instrumentation
+# --------------------------
+
+def _time_query(execute, sql, params, many, context):
+    stats = _current.get()
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if stats is not None:
+            stats['db_queries'] += 1
+            stats['db_seconds'] += time.perf_counter() - start
+
+
+def _patch_template_render():
+    """
+    Time top-level template renders. Included templates render inside the
+    backend Template.render call, so they are not counted twice.
+    """
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, 'metrics_timed', False):
+        return
+    original = Template.render
+
+    def render(self, context=None, request=None):
+        stats = _current.get()
+        if stats is None:
+            return original(self, context, request)
+        start = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            stats['template_seconds'] += time.perf_counter() - start
+
+    render.metrics_timed = True
+    Template.render = render
+
+
+class MetricsMiddleware:
+    """
+    Record per-view metrics for every request (see module docstring).
+
+    Place it first in MIDDLEWARE so the latency covers the whole stack.
+    """
+
+    def __init__(self, get_response):
+        if not get_config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        _patch_template_render()
+
+    def __call__(self, request):
+        stats = {'db_queries': 0, 'db_seconds': 0.0, 'template_seconds': 0.0}
+        token = _current.set(stats)
+        start = time.perf_counter()
+        try:
+            with ExitStack() as stack:
+                for alias in connections:
+                    stack.enter_context(connections[alias].execute_wrapper(_time_query))
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else UNRESOLVED
+        get_store().record(
+            view, time.perf_counter() - start,
+            stats['db_queries'], stats['db_seconds'], stats['template_seconds'],
+        )
+        return response
+
+
+# --------------------------
+# Exposition
+# --------------------------
+
+def _label(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def render_prometheus(views, buckets):
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+
+    ordered = sorted(views.items())
+
+    histogram = []
+    for view, row in ordered:
+        label = f'view="{_label(view)}"'
+        cumulative = 0
+        for bound, count in zip(buckets, row['buckets']):
+            cumulative += count
+            histogram.append(f'cbc_http_request_duration_seconds_bucket{{{label},le="{bound:g}"}} {cumulative}')
+        histogram.append(f'cbc_http_request_duration_seconds_bucket{{{label},le="+Inf"}} {row["requests"]}')
+        histogram.append(f'cbc_http_request_duration_seconds_sum{{{label}}} {row["duration"]:.6f}')
+        histogram.append(f'cbc_http_request_duration_seconds_count{{{label}}} {row["requests"]}')
+    metric('cbc_http_request_duration_seconds', 'histogram',
+           'Request latency by URL name.', histogram)
+
+    for name, key, help_text, fmt in (
+        ('cbc_http_requests_total', 'requests', 'Requests handled by URL name.', 'd'),
+        ('cbc_db_queries_total', 'db_queries', 'Database queries run by URL name.', 'd'),
+        ('cbc_db_query_seconds_total', 'db_seconds', 'Time spent in database queries by URL name.', '.6f'),
+        ('cbc_template_render_seconds_total', 'template_seconds', 'Time spent rendering templates by URL name.', '.6f'),
+    ):
+        metric(name, 'counter', help_text, [
+            f'{name}{{view="{_label(view)}"}} {row[key]:{fmt}}' for view, row in ordered
+        ])
+
+    return "\n".join(lines) + "\n"
+
+
+def metrics_view(request):
+    """
+    Prometheus scrape endpoint, restricted to METRICS['ALLOWED_IPS'] and staff.
+    """
+    config = get_config()
+    if not config['ENABLED']:
+        return HttpResponse(status=404)
+
+    user = getattr(request, 'user', None)
+    is_staff = user is not None and user.is_authenticated and user.is_staff
+    if request.META.get('REMOTE_ADDR') not in config['ALLOWED_IPS'] and not is_staff:
+        return HttpResponseForbidden("Metrics are only available to internal clients.")
+
+    store = get_store()
+    return HttpResponse(
+        render_prometheus(store.collect(), store.buckets),
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -0,0 +1,127 @@
+# utils/pagination.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(values):
+    """
+    Encode the last row's ordering values as an opaque URL-safe cursor.
+    """
+    raw = json.dumps(values, separators=(',', ':'), default=str)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor, fields):
+    """
+    Decode a cursor into one value per model field in `fields`, converted
+    with the field's to_python(). Raises InvalidCursor for anything that
+    isn't a cursor of this ordering, including tampered values.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursor("Malformed pagination cursor.")
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise InvalidCursor("Pagination cursor does not match this ordering.")
+    try:
+        values = [field.to_python(value) for field, value in zip(fields, values)]
+    except (ValidationError, ValueError, TypeError):
+        raise InvalidCursor("Pagination cursor does not match this ordering.")
+    if None in values:
+        raise InvalidCursor("Pagination cursor does not match this ordering.")
+    return values
+
+
+class KeysetPage:
+    def __init__(self, object_list, next_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+
+class KeysetPaginator:
+    """
+    Cursor (keyset) pagination over a queryset.
+
+    Unlike OFFSET pagination, fetching page N costs the same as page 1:
+    each page is `WHERE (ordering) > (last row seen) ORDER BY ordering LIMIT n`.
+    The ordering must be unique (end it with the primary key) and should be
+    backed by an index. Only ascending orderings are supported.
+
+    Usage:
+        paginator = KeysetPaginator(School.objects.all(), ordering=('name', 'id'))
+        page = paginator.page(request.GET.get('cursor'))
+        ... page.object_list, page.next_cursor
+    """
+
+    def __init__(self, queryset, ordering=('pk',), per_page=25):
+        self.queryset = queryset
+        self.ordering = tuple(ordering)
+        self.per_page = per_page
+
+    def page(self, cursor=None):
+        queryset = self.queryset.order_by(*self.ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(self.decode(cursor)))
+
+        # Fetch one extra row to know whether there is a next page.
+        rows = list(queryset[:self.per_page + 1])
+        if len(rows) <= self.per_page:
+            return KeysetPage(rows, None)
+
+        rows = rows[:self.per_page]
+        return KeysetPage(rows, self.encode(rows[-1]))
+
+    def _after(self, values):
+        """
+        Build (a > x) OR (a = x AND b > y) OR ... for the ordering fields.
+
+        For multi-column orderings the whole condition is also ANDed with
+        a >= x, which the database can use to seek the index instead of
+        filtering every row before the cursor.
+        """
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            clause = Q(**{f"{field}__gt": values[i]})
+            for prev_field, prev_value in zip(self.ordering[:i], values[:i]):
+                clause &= Q(**{prev_field: prev_value})
+            condition |= clause
+        if len(self.ordering) > 1:
+            condition = Q(**{f"{self.ordering[0]}__gte": values[0]}) & condition
+        return condition
+
+    def _field(self, path):
+        opts, field = self.queryset.model._meta, None
+        for part in path.split('__'):
+            if field is not None:
+                opts = field.related_model._meta
+            field = opts.pk if part == 'pk' else opts.get_field(part)
+        return field
+
+    def _value(self, obj, field):
+        for part in field.split('__'):
+            obj = getattr(obj, part)
+        return obj
+
+    def encode(self, obj):
+        return encode_cursor([self._value(obj, field) for field in self.ordering])
+
+    def decode(self, cursor):
+        return decode_cursor(cursor, [self._field(path) for path in self.ordering])
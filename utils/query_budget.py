@@ -0,0 +1,186 @@
+# utils/query_budget.py
+"""
+Per-request query budget and N+1 detection.
+
+QueryBudgetMiddleware counts the SQL statements each request runs and groups
+them by shape (the SQL with its parameters left as placeholders). A request
+that runs more than MAX_QUERIES statements, or repeats one shape more than
+MAX_DUPLICATES times - the signature of `{{ teacher.user }}` inside a loop -
+is reported with the view name and the template line or Python line that
+issued the repeated query. Reports are logged, or raised when RAISE is set.
+
+Configure with the QUERY_BUDGET setting:
+
+    QUERY_BUDGET = {
+        'ENABLED': DEBUG,
+        'MAX_QUERIES': 50,
+        'MAX_DUPLICATES': 5,
+        'RAISE': False,
+    }
+
+A view that legitimately needs more can declare its own limits:
+
+    @query_budget(max_queries=200)
+    def bulk_report(request):
+        ...
+
+Only queries run on the request thread are counted; the worker threads used
+by home/async_views.py keep their own connections.
+"""
+import logging
+import re
+import sys
+from collections import Counter
+from contextlib import ExitStack
+from functools import wraps
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    'ENABLED': False,
+    'MAX_QUERIES': 50,
+    'MAX_DUPLICATES': 5,
+    'RAISE': False,
+}
+
+# "IN (%s, %s, %s)" and "VALUES (%s, %s), (%s, %s)" vary in length with the data.
+_PLACEHOLDER_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+_ROW_LIST = re.compile(r"(\([^()]*\))(?:\s*,\s*\1)+")
+
+_PROJECT_DIR = str(Path(settings.BASE_DIR).resolve())
+_DJANGO_DIR = str(Path(sys.modules['django'].__file__).resolve().parent)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+def query_budget(max_queries=None, max_duplicates=None):
+    """
+    Override the global QUERY_BUDGET limits for one view.
+
+    Usage:
+        @query_budget(max_queries=200, max_duplicates=20)
+        def my_view(request):
+            ...
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(*args, **kwargs):
+            return view_func(*args, **kwargs)
+        wrapper.query_budget = {
+            key: value for key, value in (
+                ('MAX_QUERIES', max_queries), ('MAX_DUPLICATES', max_duplicates)
+            ) if value is not None
+        }
+        return wrapper
+    return decorator
+
+
+def sql_shape(sql):
+    """
+    Normalise a statement so repeats of the same query compare equal.
+    """
+    sql = _PLACEHOLDER_LIST.sub("%s, ...", sql)
+    sql = _ROW_LIST.sub(r"\1, ...", sql)
+    return " ".join(sql.split())
+
+
+def _origin():
+    """
+    Describe where the current query came from: the innermost template
+    line being rendered, else the innermost project source line.
+    """
+    code_line = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        node = frame.f_locals.get('self') if frame.f_code.co_name == 'render_annotated' else None
+        token = getattr(node, 'token', None)
+        origin = getattr(node, 'origin', None)
+        if token is not None and origin is not None:
+            return f"{origin.template_name or origin.name}:{token.lineno}"
+
+        filename = frame.f_code.co_filename
+        if (code_line is None and filename.startswith(_PROJECT_DIR)
+                and not filename.startswith(_DJANGO_DIR) and filename != __file__
+                and 'site-packages' not in filename):
+            code_line = f"{Path(filename).relative_to(_PROJECT_DIR)}:{frame.f_lineno}"
+        frame = frame.f_back
+    return code_line or "<unknown>"
+
+
+class QueryRecorder:
+    """
+    connection.execute_wrapper() callback that tallies statements by shape.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.shapes = Counter()
+        self.origins = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        shape = sql_shape(sql)
+        self.total += 1
+        self.shapes[shape] += 1
+        if self.shapes[shape] == 2:
+            # Only repeated shapes are ever reported, so skip the stack walk
+            # for one-off queries.
+            self.origins[shape] = _origin()
+        return execute(sql, params, many, context)
+
+    def duplicates(self, threshold):
+        return [(shape, n, self.origins.get(shape, "<unknown>"))
+                for shape, n in self.shapes.most_common() if n > threshold]
+
+
+class QueryBudgetMiddleware:
+    """
+    Enforce QUERY_BUDGET on every request (see module docstring).
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.config = {**DEFAULTS, **getattr(settings, 'QUERY_BUDGET', {})}
+        if not self.config['ENABLED']:
+            raise MiddlewareNotUsed
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with ExitStack() as stack:
+            for alias in connections:
+                stack.enter_context(connections[alias].execute_wrapper(recorder))
+            response = self.get_response(request)
+            # Lazy querysets in TemplateResponse render here, not in the view.
+            if hasattr(response, 'render') and not getattr(response, 'is_rendered', True):
+                response.render()
+
+        self.check(request, recorder)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._query_budget = {**self.config, **getattr(view_func, 'query_budget', {})}
+
+    def check(self, request, recorder):
+        config = getattr(request, '_query_budget', self.config)
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else request.path
+
+        problems = []
+        if recorder.total > config['MAX_QUERIES']:
+            problems.append(f"{recorder.total} queries (budget {config['MAX_QUERIES']})")
+        for shape, count, origin in recorder.duplicates(config['MAX_DUPLICATES']):
+            problems.append(f"{count}x from {origin}: {shape[:300]}")
+        if not problems:
+            return
+
+        message = f"Query budget exceeded in {view} ({request.method} {request.path}):\n  " + "\n  ".join(problems)
+        if config['RAISE']:
+            raise QueryBudgetExceeded(message)
+        logger.warning(message)
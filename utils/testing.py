@@ -0,0 +1,65 @@
+# utils/testing.py
+"""
+Small factories for the apps' tests: locations, schools, teachers and
+learners with every required field filled in.
+
+Usage:
+    ward = make_ward('Nakuru')
+    school = make_school(ward, 'SCH1')
+    learner = make_learner(school, 'BC1', grade='Grade 3')
+"""
+from itertools import count
+
+from django.contrib.auth import get_user_model
+
+from learners.models import Learner
+from location.models import County, SubCounty, Ward
+from schools.models import School
+from teachers.models import Teacher
+
+_numbers = count(1)
+
+
+def make_ward(county='Nakuru', sub_county=None):
+    """
+    A ward in `sub_county` of `county`, creating either when missing.
+    """
+    county, _ = County.objects.get_or_create(name=county)
+    sub_county, _ = SubCounty.objects.get_or_create(name=sub_county or f"{county.name} Central", county=county)
+    return Ward.objects.create(name=f"Ward {next(_numbers)}", sub_county=sub_county)
+
+
+def make_school(ward, code, level='Primary'):
+    return School.objects.create(
+        name=f"School {code}", code=code, school_level=level,
+        county_id=ward.sub_county.county_id, sub_county_id=ward.sub_county_id, ward=ward,
+    )
+
+
+def make_user(username, role='teacher', **fields):
+    return get_user_model().objects.create_user(
+        username=username, password='pass-1234', role=role, email=f"{username}@example.com", **fields,
+    )
+
+
+def make_teacher(school, username, role='subject_teacher', user_role='teacher'):
+    user = make_user(username, role=user_role, first_name=username.title(), last_name='Teacher')
+    return Teacher.objects.create(user=user, school=school, role=role, tsc_number=f"TSC-{username}")
+
+
+def make_learner(school, birth_certificate_number, grade='Grade 1', gender='F', **fields):
+    values = {
+        'admission_number': f"ADM-{birth_certificate_number}",
+        'first_name': 'Amani',
+        'last_name': 'Otieno',
+        'parent_full_name': 'Grace Otieno',
+        'parent_contact': '0712000000',
+        'relationship_to_learner': 'Mother',
+        'postal_address': 'P.O. Box 1',
+        **fields,
+    }
+    return Learner.objects.create(
+        birth_certificate_number=birth_certificate_number, school=school, grade=grade, gender=gender,
+        county_id=school.county_id, sub_county_id=school.sub_county_id, ward_id=school.ward_id,
+        **values,
+    )